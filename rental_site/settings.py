@@ -4,6 +4,7 @@ Django settings for rental_site project.
 
 from pathlib import Path
 import os
+import sys
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -15,6 +16,9 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-b1r$e%=2q9$arp!4ebrve
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = 'RENDER' not in os.environ
 
+# True while running `manage.py test`
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = []
 
 RENDER_EXTERNAL_HOSTNAME = os.environ.get('RENDER_EXTERNAL_HOSTNAME')
@@ -42,6 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so it sees every query, including session and auth lookups
+    'rentalapp.instrumentation.QueryInstrumentationMiddleware',
+    # Before sessions and auth, so their reads and writes are routed too
+    'rentalapp.routing.ReadReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,7 +64,8 @@ ROOT_URLCONF = 'rental_site.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for the Server-Timing header
+        'BACKEND': 'rentalapp.instrumentation.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -88,6 +97,79 @@ DATABASES = {
     )
 }
 
+# Optional read replica (rentalapp.routing): browse and dashboard pages read
+# from it, writes and the reads that follow them stay on the primary. Two
+# local SQLite files work too: copy db.sqlite3 after migrating and point
+# DATABASE_REPLICA_URL at the copy.
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL, conn_max_age=600)
+elif TESTING:
+    # Tests always route, over a second connection to the test database
+    DATABASES['replica'] = dict(DATABASES['default'])
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['rentalapp.routing.ReadReplicaRouter']
+
+# Seconds a visitor keeps reading from the primary after a request that
+# wrote; should cover the replica's usual lag
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+# Cache: set REDIS_URL in production so every worker shares the page cache
+# and its catalogue generation counter; local dev uses per-process memory.
+# Without a shared cache a generation bump only reaches the process that
+# made it: see PAGE_CACHE_ENABLED and CACHE_POLL_SECONDS below.
+SHARED_CACHE = bool(os.environ.get('REDIS_URL'))
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Property image variants (rentalapp.images): resized on a background
+# thread pool after upload; inline under tests so results are deterministic
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 2))
+IMAGE_VARIANTS_ASYNC = not TESTING
+
+# "Similar homes" of a saved listing (rentalapp.similar) are refreshed on a
+# background thread after commit; inline under tests
+SIMILAR_REFRESH_ASYNC = not TESTING
+
+# Stale market rent stats (rentalapp.market) are rebuilt on a background
+# thread while the previous ones are served; inline under tests
+MARKET_REFRESH_ASYNC = not TESTING
+
+# The hourly rebuild of the rent-suggestion feature matrix
+# (rentalapp.comparables) runs in the background; inline under tests
+COMPARABLES_REBUILD_ASYNC = not TESTING
+
+# Dashboard queries run concurrently on this many threads (rentalapp.dashboards),
+# each with its own DB connection; 1 runs them one after another
+DASHBOARD_QUERY_WORKERS = int(os.environ.get('DASHBOARD_QUERY_WORKERS', 4))
+
+# Anonymous full-page cache (rentalapp.page_cache), in seconds. Listing
+# changes reach cached pages through the shared generation counter, so the
+# cache is off without REDIS_URL: other gunicorn workers would keep serving
+# stale pages for the whole timeout. PAGE_CACHE_ENABLED=1 turns it on for a
+# single-process server.
+PAGE_CACHE_TIMEOUT = 300
+PAGE_CACHE_ENABLED = SHARED_CACHE or TESTING or os.environ.get('PAGE_CACHE_ENABLED') == '1'
+
+# Market stats, facet counts and the rent-suggestion matrix also follow
+# that counter. Without a shared cache they cannot see other workers'
+# bumps, so they are treated as stale after this many seconds instead
+CACHE_POLL_SECONDS = None if SHARED_CACHE else 60
+FACET_CACHE_TIMEOUT = PAGE_CACHE_TIMEOUT if SHARED_CACHE else CACHE_POLL_SECONDS
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -116,10 +198,28 @@ if not DEBUG:
 
 # Authentication
 AUTH_USER_MODEL = "rentalapp.CustomUser"
+
+# request.user comes from a cached snapshot (rentalapp.auth); ModelBackend
+# stays listed so sessions created before the switch remain valid
+AUTHENTICATION_BACKENDS = [
+    'rentalapp.auth.CachedUserBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+# Snapshots are dropped on save, but only in the shared cache: without Redis
+# each worker has its own copy, so keep them short-lived
+USER_CACHE_TIMEOUT = 3600 if os.environ.get('REDIS_URL') else 30
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
+# Property browse pagination (keyset / cursor based)
+PROPERTY_PAGE_SIZE = 12
+PROPERTY_MAX_PAGE_SIZE = 60
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -140,6 +240,14 @@ MESSAGE_TAGS = {
     messages_constants.ERROR: 'danger',
 }
 
+# Per-view query budgets (@query_budget): log a warning when a view goes
+# over, or raise QueryBudgetExceeded when strict (turned on for tests)
+QUERY_BUDGET_STRICT = TESTING or os.environ.get('QUERY_BUDGET_STRICT') == '1'
+
+# Requests slower than this (total ms) are logged at WARNING by
+# rentalapp.instrumentation, every other request at INFO
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -166,5 +274,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'rentalapp.instrumentation': {
+            'handlers': ['console'],
+            'level': 'WARNING' if TESTING else 'INFO',
+            'propagate': False,
+        },
     },
 }
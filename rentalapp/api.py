@@ -0,0 +1,79 @@
+# rentalapp/api.py
+
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.utils.http import parse_etags
+
+
+# =========================
+# JSON property API
+# =========================
+# Read-only cards for the mobile app, one keyset page at a time with the
+# same filters as property_list. The ETag is computed from the page rows
+# alone (ids, updated_at, distances, next cursor), so a matching If-None-Match is
+# answered with a 304 before any card is serialized.
+
+# Bump when the card payload changes shape, so clients drop stale copies
+API_VERSION = 2
+
+
+def _image_payload(prop):
+    if not prop.image:
+        return None
+    variants = prop.image_variants or {}
+    if variants.get("source") != prop.image.name:
+        return {"url": prop.image.url}
+    return {
+        name: {
+            "width": variant["width"],
+            "webp": default_storage.url(variant["webp"]),
+            "jpeg": default_storage.url(variant["jpeg"]),
+        }
+        for name, variant in variants.items()
+        if isinstance(variant, dict) and variant.get("jpeg")
+    }
+
+
+def card_payload(prop):
+    """The fields a listing card shows, as JSON-ready values."""
+    payload = {
+        "id": prop.pk,
+        "title": prop.title,
+        "district": prop.district,
+        "property_type": prop.property_type,
+        "rent": str(prop.rent),
+        "bedrooms": prop.bedrooms,
+        "bathrooms": prop.bathrooms,
+        "size": prop.size,
+        "available": prop.available,
+        "image": _image_payload(prop),
+        "updated_at": prop.updated_at.isoformat(),
+        "latitude": prop.latitude,
+        "longitude": prop.longitude,
+    }
+    # Set by geo.nearest_page on "near" searches
+    if hasattr(prop, "distance_km"):
+        payload["distance_km"] = prop.distance_km
+    return payload
+
+
+def page_etag(page):
+    """Strong ETag of a KeysetPage: same rows at the same versions, same tag."""
+    digest = hashlib.sha1(f"v{API_VERSION}|{page.next_cursor}".encode())
+    for prop in page.items:
+        digest.update(f"|{prop.pk}:{prop.updated_at.timestamp():.6f}".encode())
+        # Same rows from another origin are at other distances
+        if hasattr(prop, "distance_km"):
+            digest.update(f"@{prop.distance_km}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match uses weak comparison, so W/ (added by gzip) still matches."""
+    if not if_none_match:
+        return False
+    tags = parse_etags(if_none_match)
+    if "*" in tags:
+        return True
+    return etag in (tag.removeprefix("W/") for tag in tags)
@@ -0,0 +1,75 @@
+# rentalapp/auth.py
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router
+
+from .routing import primary_reads
+
+
+# =========================
+# Cached user snapshots
+# =========================
+# Every authenticated request loads request.user by pk. CachedUserBackend
+# serves it from a slim snapshot in the cache instead: the fields the
+# templates, role checks and admin read on every page, plus the session
+# auth hash (so the password hash never goes into the cache). The user is
+# rebuilt as a model instance with every other field deferred, so reading
+# one of those still works (one query), and save() only writes the fields
+# that were loaded. rentalapp/signals.py drops the snapshot on every save
+# that can change it, password changes included, and on delete.
+
+SNAPSHOT_FIELDS = (
+    "id", "email", "role", "full_name", "first_name", "last_name",
+    "is_active", "is_staff", "is_superuser",
+)
+USER_CACHE_TIMEOUT = getattr(settings, "USER_CACHE_TIMEOUT", 3600)
+CACHE_VERSION = 1
+
+
+def user_cache_key(user_id):
+    return f"auth:user:v{CACHE_VERSION}:{user_id}"
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def user_snapshot(user):
+    data = {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+    data["session_auth_hash"] = user.get_session_auth_hash()
+    return data
+
+
+def user_from_snapshot(data):
+    User = get_user_model()
+    fields = [f for f in User._meta.concrete_fields if f.attname in SNAPSHOT_FIELDS]
+    user = User.from_db(
+        router.db_for_read(User), [f.attname for f in fields], [data[f.attname] for f in fields]
+    )
+    user._session_auth_hash = data["session_auth_hash"]
+    return user
+
+
+class CachedUserBackend(ModelBackend):
+    """ModelBackend whose get_user() reads the cached snapshot first."""
+
+    def get_user(self, user_id):
+        data = cache.get(user_cache_key(user_id))
+        if data is None:
+            # The snapshot is shared by all the user's requests: load it
+            # from the primary (rentalapp.routing)
+            with primary_reads():
+                user = super().get_user(user_id)
+            if user is not None:
+                cache.set(user_cache_key(user_id), user_snapshot(user), USER_CACHE_TIMEOUT)
+            return user
+        user = user_from_snapshot(data)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend.aget_user queries directly; go through the snapshot
+        return await sync_to_async(self.get_user)(user_id)
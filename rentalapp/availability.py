@@ -0,0 +1,41 @@
+# rentalapp/availability.py
+
+from django.db.models import Exists, OuterRef
+
+from .models import Booking
+
+
+# =========================
+# Date-range availability
+# =========================
+# A stay is the half-open range [start_date, end_date): the check-out day is
+# free for the next tenant. Only approved bookings block a property; pending
+# ones are just requests. Two ranges overlap when each starts before the
+# other ends, which the booking_approved_range_idx partial index answers with
+# a single range scan per property.
+
+
+def overlapping_bookings(check_in, check_out):
+    """Approved bookings that intersect [check_in, check_out)."""
+    return Booking.objects.filter(
+        status="approved",
+        start_date__lt=check_out,
+        end_date__gt=check_in,
+    )
+
+
+def available_between(queryset, check_in, check_out):
+    """
+    Narrow a Property queryset to those free for the whole stay. This is one
+    NOT EXISTS anti-join, so it composes with the other browse filters and
+    keyset pagination without loading any booking rows.
+    """
+    clashes = overlapping_bookings(check_in, check_out).filter(property=OuterRef("pk"))
+    return queryset.filter(~Exists(clashes))
+
+
+def is_available(property_id, check_in, check_out, exclude_booking=None):
+    clashes = overlapping_bookings(check_in, check_out).filter(property_id=property_id)
+    if exclude_booking is not None:
+        clashes = clashes.exclude(pk=exclude_booking)
+    return not clashes.exists()
@@ -0,0 +1,417 @@
+# rentalapp/benchmark.py
+
+import json
+import logging
+import math
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.cookiejar import CookieJar
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import urls as rentalapp_urls
+from .models import Booking, CustomUser, Payment, Property
+
+
+# =========================
+# Route benchmarks
+# =========================
+# Every named GET route in rentalapp/urls.py is requested repeatedly as an
+# anonymous visitor, a tenant and/or a landlord, through the in-process test
+# client or over HTTP against a running server (gunicorn, runserver). Query
+# counts are read back from the Server-Timing header that
+# QueryInstrumentationMiddleware adds, so both drivers report them.
+
+ROLES = ("anonymous", "tenant", "landlord")
+
+# Routes that change data on GET, need POST, or cannot render on GET
+SKIPPED_ROUTES = {
+    "logout": "POST only",
+    "cancel_application": "changes data on GET",
+    "cancel_booking": "changes data on GET",
+    "delete_property": "action endpoint",
+    "update_maintenance": "POST only",
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+# Role-specific pages outside the tenant/ and landlord/ prefixes
+ROUTE_ROLES = {
+    "book_property": ("tenant",),
+    "contact_landlord": ("tenant",),
+    "add_property": ("landlord",),
+}
+
+
+def route_roles(pattern):
+    """Which sessions make sense for a route: by name, else by URL prefix."""
+    if pattern.name in ROUTE_ROLES:
+        return ROUTE_ROLES[pattern.name]
+    route = str(pattern.pattern)
+    if route.startswith(("tenant/", "payment/")):
+        return ("tenant",)
+    if route.startswith("landlord/"):
+        return ("landlord",)
+    return ROLES
+
+
+def named_routes():
+    return [
+        pattern for pattern in rentalapp_urls.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    ]
+
+
+# -------------------------
+# Fixtures: who and what to request
+# -------------------------
+def pick_users(tenant_email=None, landlord_email=None):
+    """The given users, else the busiest tenant and landlord in the database."""
+    if tenant_email:
+        tenant = CustomUser.objects.get(email=tenant_email)
+    else:
+        tenant = (
+            CustomUser.objects.filter(role="tenant")
+            .annotate(n=Count("booking")).order_by("-n", "pk").first()
+        )
+    if landlord_email:
+        landlord = CustomUser.objects.get(email=landlord_email)
+    else:
+        landlord = (
+            CustomUser.objects.filter(role="landlord")
+            .annotate(n=Count("property")).order_by("-n", "pk").first()
+        )
+    return tenant, landlord
+
+
+def route_kwargs(pattern, role, tenant, landlord):
+    """URL kwargs for a route, or None when the data it needs does not exist."""
+    params = set(pattern.pattern.converters)
+    kwargs = {}
+    for param in params:
+        if param in ("pk", "property_id"):
+            # Landlord pages (edit_property) need one of their own listings
+            properties = Property.objects.filter(owner=landlord) if role == "landlord" else Property.objects.filter(available=True)
+            kwargs[param] = properties.order_by("-created_at").values_list("pk", flat=True).first()
+        elif param == "booking_id":
+            kwargs[param] = Booking.objects.filter(user=tenant, status="approved").values_list("pk", flat=True).first()
+        elif param == "payment_id":
+            kwargs[param] = Payment.objects.filter(
+                booking__user=tenant, status__in=["pending", "failed"]
+            ).values_list("pk", flat=True).first()
+        elif param == "status":
+            kwargs[param] = "approved"
+        elif param == "dataset":
+            kwargs[param] = "payments"
+        else:
+            kwargs[param] = None
+
+    if any(value is None for value in kwargs.values()):
+        return None
+    return kwargs
+
+
+# -------------------------
+# Drivers
+# -------------------------
+def _server_name():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host not in ("*",) and not host.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+class ClientDriver:
+    """In-process requests through django.test.Client (no network, no server)."""
+
+    name = "client"
+
+    def __init__(self):
+        self.clients = {}
+
+    def login(self, role, user):
+        # A broken view should show up as a 500 in the report, not abort the run
+        client = Client(SERVER_NAME=_server_name(), raise_request_exception=False)
+        if user is not None:
+            client.force_login(user)
+        self.clients[role] = client
+
+    def get(self, role, path):
+        response = self.clients[role].get(path)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response.status_code, response.get("Server-Timing", "")
+
+
+class HTTPDriver:
+    """Real HTTP requests to a running server, authenticated with a session cookie."""
+
+    name = "http"
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = {}
+
+    def login(self, role, user):
+        if user is None:
+            self.cookies[role] = ""
+            return
+        # force_login writes the session to the shared session store; the
+        # server accepts the cookie as if the user had signed in
+        client = Client()
+        client.force_login(user)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+        self.cookies[role] = f"{settings.SESSION_COOKIE_NAME}={cookie.value}"
+
+    def get(self, role, path):
+        request = urllib.request.Request(self.base_url + path)
+        if self.cookies.get(role):
+            request.add_header("Cookie", self.cookies[role])
+        opener = urllib.request.build_opener(_NoRedirect, urllib.request.HTTPCookieProcessor(CookieJar()))
+        try:
+            with opener.open(request, timeout=30) as response:
+                response.read()
+                return response.status, response.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as exc:
+            exc.read()
+            return exc.code, exc.headers.get("Server-Timing", "")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Measure the view itself, not the page it redirects to
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# -------------------------
+# Servers: the same project under WSGI and ASGI
+# -------------------------
+SERVER_COMMANDS = {
+    "wsgi": [
+        "gunicorn", "rental_site.wsgi:application", "--bind", "{host}:{port}",
+        "--workers", "{workers}", "--threads", "{threads}",
+    ],
+    "asgi": [
+        "uvicorn", "rental_site.asgi:application", "--host", "{host}", "--port", "{port}",
+        "--workers", "{workers}", "--no-access-log",
+    ],
+}
+
+
+def _free_port(host):
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(kind, workers=1, threads=8, host="127.0.0.1", timeout=30):
+    """
+    Start gunicorn ("wsgi") or uvicorn ("asgi") on a free port, with this
+    process's environment (so the same DATABASE_URL), and yield its base URL.
+    """
+    port = _free_port(host)
+    args = [part.format(host=host, port=port, workers=workers, threads=threads) for part in SERVER_COMMANDS[kind]]
+    # Request logs go to a file: a full pipe would block the server
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen([sys.executable, "-m", *args], stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f"{args[0]} exited: {log.read().decode(errors='replace')[-2000:]}")
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{args[0]} did not start listening on {host}:{port} in {timeout}s")
+                time.sleep(0.1)
+        yield f"http://{host}:{port}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        log.close()
+
+
+# -------------------------
+# Measuring
+# -------------------------
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(driver, role, path, requests, warmup=2, concurrency=1):
+    for _ in range(warmup):
+        driver.get(role, path)
+
+    latencies, queries, statuses = [], [], {}
+    lock = threading.Lock()
+
+    def worker(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            status, server_timing = driver.get(role, path)
+            elapsed = (time.perf_counter() - started) * 1000
+            match = SERVER_TIMING_QUERIES.search(server_timing)
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+                if match:
+                    queries.append(int(match.group(1)))
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+        threads = [threading.Thread(target=worker, args=(share,)) for share in shares]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        worker(requests)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "status": statuses,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "queries": statistics.median(queries) if queries else None,
+        "queries_max": max(queries) if queries else None,
+    }
+
+
+def run_benchmark(driver, requests=50, warmup=2, concurrency=1, roles=ROLES,
+                  only=None, tenant_email=None, landlord_email=None, progress=None):
+    tenant, landlord = pick_users(tenant_email, landlord_email)
+    users = {"anonymous": None, "tenant": tenant, "landlord": landlord}
+
+    # Per-request log lines would drown the report
+    instrumentation_logger = logging.getLogger("rentalapp.instrumentation")
+    previous_level = instrumentation_logger.level
+    instrumentation_logger.setLevel(logging.WARNING)
+
+    results, skipped, sessions = [], [], set()
+    try:
+        for role in roles:
+            if role != "anonymous" and users[role] is None:
+                skipped.append({"route": "*", "role": role, "reason": f"no {role} in the database"})
+                continue
+            driver.login(role, users[role])
+            sessions.add(role)
+
+        for pattern in named_routes():
+            if only and pattern.name not in only:
+                continue
+            if pattern.name in SKIPPED_ROUTES:
+                skipped.append({"route": pattern.name, "role": "*", "reason": SKIPPED_ROUTES[pattern.name]})
+                continue
+            for role in route_roles(pattern):
+                if role not in sessions:
+                    continue
+                kwargs = route_kwargs(pattern, role, tenant, landlord)
+                if kwargs is None:
+                    skipped.append({"route": pattern.name, "role": role, "reason": "no matching rows"})
+                    continue
+                path = reverse(pattern.name, kwargs=kwargs)
+                result = {"route": pattern.name, "role": role, "path": path}
+                result.update(measure(driver, role, path, requests, warmup, concurrency))
+                results.append(result)
+                if progress:
+                    progress(result)
+    finally:
+        instrumentation_logger.setLevel(previous_level)
+
+    return {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "driver": driver.name,
+            "base_url": getattr(driver, "base_url", None),
+            "database": connection.vendor,
+            "requests": requests,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "tenant": getattr(tenant, "email", None),
+            "landlord": getattr(landlord, "email", None),
+            "rows": {
+                "properties": Property.objects.count(),
+                "bookings": Booking.objects.count(),
+                "payments": Payment.objects.count(),
+            },
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+# -------------------------
+# Comparing runs
+# -------------------------
+def compare_runs(base, head, threshold_pct=20.0, metric="p95_ms", min_delta_ms=1.0):
+    """
+    Match results by (route, role) and flag regressions: ``metric`` slower
+    by more than ``threshold_pct`` percent (and at least ``min_delta_ms``,
+    so sub-millisecond jitter on fast pages is ignored), or more queries
+    per request.
+    """
+    base_results = {(r["route"], r["role"]): r for r in base["results"]}
+    rows = []
+    for result in head["results"]:
+        key = (result["route"], result["role"])
+        before = base_results.pop(key, None)
+        if before is None:
+            rows.append({"route": key[0], "role": key[1], "change": "new", "regression": False})
+            continue
+
+        old, new = before[metric], result[metric]
+        change_pct = ((new - old) / old * 100) if old else 0.0
+        query_delta = (
+            (result["queries"] or 0) - (before["queries"] or 0)
+            if result["queries"] is not None and before["queries"] is not None else 0
+        )
+        rows.append({
+            "route": key[0],
+            "role": key[1],
+            "before_ms": old,
+            "after_ms": new,
+            "change_pct": round(change_pct, 1),
+            "queries_before": before["queries"],
+            "queries_after": result["queries"],
+            "regression": (change_pct > threshold_pct and new - old >= min_delta_ms) or query_delta > 0,
+        })
+    for route, role in base_results:
+        rows.append({"route": route, "role": role, "change": "removed", "regression": False})
+    return rows
+
+
+def load_run(path):
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
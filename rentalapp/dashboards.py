@@ -0,0 +1,94 @@
+# rentalapp/dashboards.py
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .instrumentation import RequestMetrics, current_metrics
+
+
+# =========================
+# Concurrent dashboard queries
+# =========================
+# The dashboards run several independent counts and lists. The async views
+# hand each of them to a small thread pool: every pool thread has its own DB
+# connection, so the queries really overlap. Django's async ORM would not
+# help here, it queues every query on the same thread-sensitive executor.
+#
+# Inside a transaction (the test suite, ATOMIC_REQUESTS) other connections
+# cannot see the uncommitted rows, so the jobs then run one after another on
+# the request's own connection.
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Each worker keeps one connection open (CONN_MAX_AGE), so this
+            # is also the number of extra connections per process
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "DASHBOARD_QUERY_WORKERS", 4),
+                thread_name_prefix="dashboard-queries",
+            )
+    return _executor
+
+
+def _can_fan_out():
+    if getattr(settings, "DASHBOARD_QUERY_WORKERS", 4) < 2:
+        return False
+    return not any(conn.in_atomic_block for conn in connections.all(initialized_only=True))
+
+
+def _run_inline(jobs):
+    return {name: job() for name, job in jobs.items()}
+
+
+def _run_in_worker(job):
+    # Queries on this thread's connection are counted separately and added
+    # to the request's metrics afterwards, so @query_budget still holds
+    metrics = RequestMetrics()
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(metrics.execute_wrapper))
+            return job(), metrics
+    finally:
+        close_old_connections()
+
+
+async def gather(jobs):
+    """
+    Run ``{name: callable}`` concurrently and return ``{name: result}``.
+    Each callable must do all its queries itself (return lists, counts or
+    model instances, not lazy querysets).
+    """
+    if not await sync_to_async(_can_fan_out)():
+        return await sync_to_async(_run_inline)(jobs)
+
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    names = list(jobs)
+    # Each job runs in a copy of the request's context, so it is routed like
+    # the request itself (rentalapp.routing)
+    outcomes = await asyncio.gather(*(
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run_in_worker, jobs[name])
+        for name in names
+    ))
+
+    request_metrics = current_metrics()
+    results = {}
+    for name, (result, metrics) in zip(names, outcomes):
+        if request_metrics is not None:
+            request_metrics.merge(metrics)
+        results[name] = result
+    return results
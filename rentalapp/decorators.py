@@ -24,3 +24,37 @@ def role_required(allowed_roles=[]):
             return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
+
+
+def query_budget(max_queries):
+    """
+    Declare how many DB queries a view may run per request (session and
+    auth lookups included). QueryInstrumentationMiddleware logs a warning
+    when the view goes over, or raises QueryBudgetExceeded when
+    settings.QUERY_BUDGET_STRICT is on (as in the test suite).
+    Usage:
+        @query_budget(8)
+        @role_required(['landlord'])
+        def landlord_dashboard(request):
+            ...
+    """
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def replica_reads(view_func):
+    """
+    Let the view's GET/HEAD requests read from the read replica, when one is
+    configured (rentalapp.routing). Only for views that render what is
+    already there: reads after a write in the same request, or shortly
+    after one by the same visitor, still go to the primary.
+    Usage:
+        @replica_reads
+        @query_budget(6)
+        def property_detail(request, pk):
+            ...
+    """
+    view_func.replica_reads = True
+    return view_func
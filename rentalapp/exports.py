@@ -0,0 +1,156 @@
+# rentalapp/exports.py
+
+import csv
+import io
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Booking, Maintenance, Payment
+
+
+# =========================
+# Landlord data exports
+# =========================
+# Each export is a values_list() queryset walked with .iterator(), so rows
+# arrive as plain tuples in chunks (a server-side cursor on PostgreSQL) and
+# are encoded straight into ~64 KB pieces of the response. Neither model
+# instances nor the whole file are ever held in memory.
+
+CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+
+EXPORTS = {
+    "payments": {
+        "model": Payment,
+        "owner_field": "booking__property__owner",
+        "date_field": "date",
+        "columns": [
+            ("id", "id"),
+            ("date", "date"),
+            ("month", "month"),
+            ("due_date", "due_date"),
+            ("amount", "amount"),
+            ("status", "status"),
+            ("booking_id", "booking_id"),
+            ("property_id", "booking__property_id"),
+            ("property", "booking__property__title"),
+            ("tenant_email", "booking__user__email"),
+        ],
+    },
+    "bookings": {
+        "model": Booking,
+        "owner_field": "property__owner",
+        "date_field": "start_date",
+        "columns": [
+            ("id", "id"),
+            ("created_at", "created_at"),
+            ("property_id", "property_id"),
+            ("property", "property__title"),
+            ("tenant_email", "user__email"),
+            ("start_date", "start_date"),
+            ("end_date", "end_date"),
+            ("status", "status"),
+        ],
+    },
+    "maintenance": {
+        "model": Maintenance,
+        "owner_field": "property__owner",
+        "date_field": "created_at",
+        "columns": [
+            ("id", "id"),
+            ("created_at", "created_at"),
+            ("property_id", "property_id"),
+            ("property", "property__title"),
+            ("tenant_email", "tenant__email"),
+            ("category", "category"),
+            ("status", "status"),
+            ("issue", "issue"),
+            ("completed_at", "completed_at"),
+        ],
+    },
+}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(name, landlord, date_from=None, date_to=None):
+    """values_list queryset for one export, scoped to the landlord's properties."""
+    spec = EXPORTS[name]
+    model = spec["model"]
+    queryset = model.objects.filter(**{spec["owner_field"]: landlord})
+
+    # Both bounds are inclusive days. DateTimeFields are compared against
+    # day boundaries so the column stays a plain range (no __date cast).
+    date_field = spec["date_field"]
+    is_datetime = model._meta.get_field(date_field).get_internal_type() == "DateTimeField"
+    if date_from:
+        queryset = queryset.filter(**{f"{date_field}__gte": _day_start(date_from) if is_datetime else date_from})
+    if date_to:
+        if is_datetime:
+            queryset = queryset.filter(**{f"{date_field}__lt": _day_start(date_to + timedelta(days=1))})
+        else:
+            queryset = queryset.filter(**{f"{date_field}__lte": date_to})
+
+    fields = [field for _, field in spec["columns"]]
+    return queryset.order_by("id").values_list(*fields)
+
+
+def header(name):
+    return [label for label, _ in EXPORTS[name]["columns"]]
+
+
+def encode_csv(name, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header(name))
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_jsonl(name, rows):
+    labels = header(name)
+    encoder = DjangoJSONEncoder()
+    pieces, size = [], 0
+    for row in rows:
+        line = encoder.encode(dict(zip(labels, row))) + "\n"
+        pieces.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield "".join(pieces)
+            pieces, size = [], 0
+    yield "".join(pieces)
+
+
+ENCODERS = {
+    "csv": (encode_csv, "text/csv; charset=utf-8"),
+    "jsonl": (encode_jsonl, "application/x-ndjson; charset=utf-8"),
+}
+
+
+def gzip_stream(chunks):
+    """Gzip a stream of str chunks on the fly (wbits=31 writes a gzip header)."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(name, landlord, fmt="csv", date_from=None, date_to=None, compress=False):
+    encode, _ = ENCODERS[fmt]
+    rows = export_rows(name, landlord, date_from, date_to).iterator(chunk_size=CHUNK_SIZE)
+    chunks = encode(name, rows)
+    if compress:
+        return gzip_stream(chunks)
+    return (chunk.encode("utf-8") for chunk in chunks)
@@ -0,0 +1,113 @@
+# rentalapp/filters.py
+
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from .availability import available_between
+from .geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, parse_point, within_bounding_box
+from .search import get_search_backend
+
+
+# =========================
+# Property browse filters
+# =========================
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_decimal(value):
+    try:
+        return Decimal(value)
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+
+
+def _to_date(value):
+    try:
+        return date.fromisoformat((value or "").strip())
+    except ValueError:
+        return None
+
+
+def clean_property_filters(params):
+    """
+    Normalize the browse query string (district, max_rent, bedrooms,
+    property_type, available, q, check_in/check_out, near/radius) into a
+    dict of valid values. Bad input is
+    dropped instead of raising, so a typo in the URL never turns into a 500.
+    """
+    filters = {}
+
+    district = (params.get("district") or "").strip()
+    if district and district != "all":
+        filters["district"] = district
+
+    max_rent = _to_decimal(params.get("max_rent"))
+    if max_rent is not None:
+        filters["max_rent"] = max_rent
+
+    bedrooms = _to_int(params.get("bedrooms"))
+    if bedrooms is not None:
+        filters["bedrooms"] = bedrooms
+
+    property_type = (params.get("property_type") or "").strip().lower()
+    if property_type:
+        filters["property_type"] = property_type
+
+    available = (params.get("available") or "").strip().lower()
+    if available in ("1", "true", "yes", "on"):
+        filters["available"] = True
+
+    q = (params.get("q") or "").strip()
+    if q:
+        filters["q"] = q
+
+    # Dates only count as a pair describing a non-empty stay
+    check_in = _to_date(params.get("check_in"))
+    check_out = _to_date(params.get("check_out"))
+    if check_in and check_out and check_in < check_out:
+        filters["check_in"] = check_in
+        filters["check_out"] = check_out
+
+    # "near" is "lat,lng", a pincode or a district; radius in km
+    near = parse_point(params.get("near"))
+    if near:
+        filters["near"] = near
+        radius = _to_decimal(params.get("radius"))
+        radius = float(radius) if radius is not None and radius.is_finite() and radius > 0 else DEFAULT_RADIUS_KM
+        filters["radius_km"] = min(radius, MAX_RADIUS_KM)
+
+    return filters
+
+
+def apply_property_filters(queryset, filters):
+    """Apply the output of ``clean_property_filters`` to a Property queryset."""
+    if "district" in filters:
+        queryset = queryset.filter(district=filters["district"])
+    if "max_rent" in filters:
+        queryset = queryset.filter(rent__lte=filters["max_rent"])
+    if "bedrooms" in filters:
+        queryset = queryset.filter(bedrooms=filters["bedrooms"])
+    if "property_type" in filters:
+        queryset = queryset.filter(property_type=filters["property_type"])
+    if filters.get("available"):
+        queryset = queryset.filter(available=True)
+    if "check_in" in filters:
+        queryset = available_between(queryset, filters["check_in"], filters["check_out"])
+    if "near" in filters:
+        # Bounding box only: geo.nearest_page trims the corners
+        queryset = within_bounding_box(queryset, *filters["near"], filters["radius_km"])
+    if "q" in filters:
+        # Full-text match, annotated with search_rank
+        queryset = get_search_backend().search(queryset, filters["q"])
+    return queryset
+
+
+def browse_ordering(filters):
+    """Keyset pagination keys: relevance first when there is a search term."""
+    if "q" in filters:
+        return ("search_rank", "created_at", "id")
+    return ("created_at", "id")
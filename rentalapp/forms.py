@@ -88,7 +88,8 @@ class EmailAuthenticationForm(AuthenticationForm):
 class PropertyForm(forms.ModelForm):
     class Meta:
         model = Property
-        exclude = ['owner']  # Owner is assigned in views
+        # Owner is assigned in views; coordinates are geocoded from the address
+        exclude = ['owner', 'latitude', 'longitude']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'district': forms.Select(attrs={'class': 'form-select'}),
@@ -103,6 +104,12 @@ class PropertyForm(forms.ModelForm):
             'available': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
+    def save(self, commit=True):
+        # A new address or district needs new coordinates (geocoded on save)
+        if {'address', 'district'} & set(self.changed_data):
+            self.instance.latitude = self.instance.longitude = None
+        return super().save(commit)
+
 # =========================
 # ✅ Booking Form for Tenants
 # =========================
@@ -115,6 +122,15 @@ class BookingForm(forms.ModelForm):
             "end_date": forms.DateInput(attrs={"type": "date"}),
         }
 
+    # ✅ A stay must end after it starts
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("start_date")
+        end_date = cleaned_data.get("end_date")
+        if start_date and end_date and end_date <= start_date:
+            raise forms.ValidationError("End date must be after the start date.")
+        return cleaned_data
+
 # =========================
 # ✅ Maintenance Form for Tenants
 # =========================
@@ -0,0 +1,167 @@
+# rentalapp/geo.py
+
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import ExpressionWrapper
+
+from .pagination import DEFAULT_PAGE_SIZE, KeysetPage, decode_cursor, encode_cursor
+
+
+# =========================
+# Offline geocoding
+# =========================
+# Coordinates come from a bundled centroid table (rentalapp/data/
+# kerala_centroids.csv), never from a network service: an exact pincode
+# first, then the pincode's 3-digit sorting prefix, then the district. The
+# result is only as precise as that table, which is enough for "within N km".
+
+CENTROIDS_PATH = Path(__file__).resolve().parent / "data" / "kerala_centroids.csv"
+
+# Kerala pincodes start with 67, 68 or 69 ("682 011" is written both ways)
+PINCODE_RE = re.compile(r"\b(6[7-9]\d)\s?(\d{3})\b")
+POINT_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+DEFAULT_RADIUS_KM = 5
+MAX_RADIUS_KM = 50
+# nearest_page first looks this far (past the cursor), then 4x further each
+# time: 1, 4, 16, 50 km is at most four index range scans
+INITIAL_SEARCH_KM = 1.0
+SEARCH_GROWTH = 4
+
+
+@lru_cache(maxsize=1)
+def centroids():
+    """{(kind, key): (latitude, longitude)} for kind in pincode/prefix/district."""
+    with open(CENTROIDS_PATH, newline="", encoding="utf-8") as handle:
+        return {
+            (row["kind"], row["key"]): (float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(handle)
+        }
+
+
+def geocode(address="", district=""):
+    """(latitude, longitude) for an address/district, or None if nothing matches."""
+    table = centroids()
+    match = PINCODE_RE.search(address or "")
+    if match:
+        prefix, rest = match.groups()
+        point = table.get(("pincode", prefix + rest)) or table.get(("prefix", prefix))
+        if point:
+            return point
+    return table.get(("district", (district or "").strip().lower()))
+
+
+def fill_coordinates(prop):
+    """Geocode a Property that has no coordinates yet. Returns True if it set them."""
+    if prop.latitude is not None and prop.longitude is not None:
+        return False
+    point = geocode(prop.address, prop.district)
+    if point is None:
+        return False
+    prop.latitude, prop.longitude = point
+    return True
+
+
+def parse_point(value):
+    """A search origin: "lat,lng", a pincode or a district name; None if unknown."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    match = POINT_RE.match(value)
+    if match:
+        lat, lng = float(match.group(1)), float(match.group(2))
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            return lat, lng
+        return None
+    return geocode(value, value)
+
+
+# =========================
+# Radius search
+# =========================
+# Distances are measured on an equirectangular projection around the search
+# origin: longitude differences are scaled by cos(origin latitude) and the
+# plane distance is in degrees of latitude. Within MAX_RADIUS_KM in Kerala
+# that is within 0.05% of the great-circle distance, and it is plain
+# arithmetic, so SQL can filter and sort on it: each page is one LIMITed
+# query over an index range, not a Python pass over every row in a box.
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) of a box that contains the circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+def within_bounding_box(queryset, lat, lng, radius_km):
+    """Cheap prefilter on the (latitude, longitude) index; corners still need trimming."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    return queryset.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+
+
+def squared_distance(lat, lng):
+    """Squared plane distance from (lat, lng), in degrees of latitude, as an expression."""
+    scale = max(math.cos(math.radians(lat)), 1e-6)
+    dlat = F("latitude") - lat
+    dlng = (F("longitude") - lng) * scale
+    return ExpressionWrapper(dlat * dlat + dlng * dlng, output_field=FloatField())
+
+
+def _degrees(km):
+    return km / KM_PER_DEGREE_LAT
+
+
+def nearest_page(queryset, lat, lng, radius_km, after=None, page_size=None):
+    """
+    One page of ``queryset`` rows within ``radius_km`` of (lat, lng), nearest
+    first, with ``distance_km`` set on each item. The cursor is the
+    (squared distance, id) of the last row, like keyset_paginate's.
+
+    Each lookup reads the annulus between the cursor and a search circle:
+    the box around the circle is an index range, and the squared distance
+    bounds both sides in SQL, so rows already shown (a pincode centroid
+    can hold a whole district) are never sent back. The circle starts just
+    past the cursor and grows until it holds a full page: every row inside
+    it is nearer than any row outside.
+    """
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    cursor = decode_cursor(after, 2)
+    if not (cursor and all(isinstance(value, (int, float)) for value in cursor)):
+        cursor = None
+
+    queryset = queryset.annotate(distance_sq=squared_distance(lat, lng))
+    cursor_km = 0.0
+    if cursor:
+        shown_sq, shown_id = cursor
+        queryset = queryset.filter(
+            Q(distance_sq__gt=shown_sq) | Q(distance_sq=shown_sq, id__gt=shown_id)
+        )
+        cursor_km = math.sqrt(max(shown_sq, 0)) * KM_PER_DEGREE_LAT
+    search_km = min(radius_km, cursor_km + INITIAL_SEARCH_KM)
+
+    while True:
+        rows = list(
+            within_bounding_box(queryset, lat, lng, search_km)
+            .filter(distance_sq__lte=_degrees(search_km) ** 2)
+            .order_by("distance_sq", "id")[:page_size + 1]
+        )
+        if len(rows) > page_size or search_km >= radius_km:
+            break
+        search_km = min(radius_km, search_km * SEARCH_GROWTH)
+
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+    for prop in items:
+        prop.distance_km = round(math.sqrt(max(prop.distance_sq, 0)) * KM_PER_DEGREE_LAT, 2)
+
+    next_cursor = encode_cursor((items[-1].distance_sq, items[-1].pk)) if has_more else ""
+    return KeysetPage(items=items, has_more=has_more, next_cursor=next_cursor, page_size=page_size)
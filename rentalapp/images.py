@@ -0,0 +1,131 @@
+# rentalapp/images.py
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# Responsive image variants
+# =========================
+# Each uploaded Property.image gets resized WebP + JPEG copies per variant.
+# Their paths are recorded in Property.image_variants, so templates can build
+# a srcset without touching storage:
+#   {"source": "properties/x.jpg",
+#    "card": {"width": 400, "webp": "...", "jpeg": "..."}, ...}
+
+VARIANT_WIDTHS = {
+    "card": 400,
+    "detail": 1000,
+    "full": 1920,
+}
+VARIANT_DIR = "properties/variants"
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "IMAGE_VARIANT_WORKERS", 2),
+                thread_name_prefix="image-variants",
+            )
+    return _executor
+
+
+def needs_variants(prop):
+    return bool(prop.image) and (prop.image_variants or {}).get("source") != prop.image.name
+
+
+def _save(path, data):
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(data))
+
+
+def build_variants(prop):
+    """Resize ``prop.image`` into every variant and return the image_variants dict."""
+    from PIL import Image, ImageOps
+
+    stem = os.path.splitext(os.path.basename(prop.image.name))[0]
+    with prop.image.open("rb") as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert("RGB")
+
+    variants = {"source": prop.image.name}
+    for name, target_width in VARIANT_WIDTHS.items():
+        # Never upscale: small uploads keep their own width
+        width = min(target_width, image.width)
+        height = round(image.height * width / image.width)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+
+        paths = {}
+        for fmt, ext, options in (
+            ("WEBP", "webp", {"quality": WEBP_QUALITY, "method": 4}),
+            ("JPEG", "jpg", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}),
+        ):
+            buffer = BytesIO()
+            resized.save(buffer, fmt, **options)
+            path = f"{VARIANT_DIR}/{prop.pk}/{stem}_{name}.{ext}"
+            paths["webp" if fmt == "WEBP" else "jpeg"] = _save(path, buffer.getvalue())
+
+        variants[name] = {"width": width, **paths}
+    return variants
+
+
+def generate_variants(property_id, force=False):
+    """Build and store the variants for one property. Returns True if built."""
+    from .models import Property
+    from .page_cache import bump_catalogue_generation
+
+    prop = Property.objects.filter(pk=property_id).only("id", "image", "image_variants").first()
+    if prop is None or not prop.image or not (force or needs_variants(prop)):
+        return False
+    try:
+        variants = build_variants(prop)
+    except Exception:
+        logger.exception("Could not build image variants for property %s", property_id)
+        return False
+    # update() skips the Property signals: nothing else changed. It also
+    # skips auto_now, and the API ETags must see the new image URLs
+    Property.objects.filter(pk=property_id, image=prop.image.name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    transaction.on_commit(bump_catalogue_generation)
+    return True
+
+
+def _generate_in_worker(property_id, force=False):
+    # Worker threads own their DB connections, so tidy them up around each job
+    close_old_connections()
+    try:
+        return generate_variants(property_id, force=force)
+    finally:
+        close_old_connections()
+
+
+def submit_variants(property_id, force=False):
+    return get_executor().submit(_generate_in_worker, property_id, force)
+
+
+def schedule_variants(property_id):
+    """Queue variant generation once the current transaction commits."""
+    if getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+        transaction.on_commit(lambda: submit_variants(property_id))
+    else:
+        transaction.on_commit(lambda: generate_variants(property_id))
@@ -0,0 +1,185 @@
+# rentalapp/importers.py
+
+import csv
+import io
+import json
+from collections import Counter
+
+from django.db import connection, models, transaction
+
+from .forms import PropertyForm
+from .geo import fill_coordinates
+from .models import CustomUser, ImportCheckpoint, Property
+from .search import get_search_backend
+from .stats import apply_deltas
+
+
+# =========================
+# Bulk property import
+# =========================
+# Rows are streamed from disk, validated one by one with PropertyForm and
+# written in batches, so memory holds at most one batch whatever the file
+# size. bulk_create/COPY skip the Property signals, so after_properties_inserted
+# does their work (search index, LandlordStats) once per batch and the
+# import_properties command bumps the page cache generation at the end.
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def read_rows(path, fmt):
+    """Yield (row_number, dict) pairs without loading the whole file."""
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        if fmt == "jsonl":
+            for number, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield number, exc
+        else:
+            # Row 1 is the header, so data rows start at 2 like in a spreadsheet
+            for number, row in enumerate(csv.DictReader(handle), start=2):
+                yield number, row
+
+
+class OwnerResolver:
+    """Maps owner emails to landlord ids, one query per distinct email."""
+
+    def __init__(self, default_email=None):
+        self.cache = {}
+        self.default_email = default_email
+
+    def __call__(self, email):
+        email = (email or self.default_email or "").strip().lower()
+        if not email:
+            return None
+        if email not in self.cache:
+            self.cache[email] = CustomUser.objects.filter(
+                email__iexact=email, role="landlord"
+            ).values_list("pk", flat=True).first()
+        return self.cache[email]
+
+
+def build_property(row, resolve_owner):
+    """Validate one row with PropertyForm. Returns (Property, None) or (None, errors)."""
+    if isinstance(row, Exception):
+        return None, str(row)
+    if not isinstance(row, dict):
+        return None, "expected an object per line"
+
+    data = {key: value for key, value in row.items() if key}
+    # An import column that is left out means "listed", not an unticked checkbox
+    if data.get("available") in (None, ""):
+        data["available"] = "true"
+
+    owner_id = resolve_owner(data.pop("owner_email", None))
+    if owner_id is None:
+        return None, "owner_email: no landlord with that email (or --owner missing)"
+
+    form = PropertyForm(data=data)
+    if not form.is_valid():
+        return None, "; ".join(
+            f"{field}: {' '.join(errors)}" for field, errors in form.errors.items()
+        )
+    prop = form.save(commit=False)
+    prop.owner_id = owner_id
+    # bulk_create/COPY skip the pre_save geocoding signal
+    fill_coordinates(prop)
+    return prop, None
+
+
+# -------------------------
+# Writers
+# -------------------------
+def _copy_literal(field, value):
+    if value is None:
+        return r"\N"
+    if isinstance(field, models.JSONField):
+        value = json.dumps(value)
+    # Quoted values never match the NULL marker in CSV COPY, so "" stays ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_insert(model, objs):
+    """Insert ``objs`` with PostgreSQL COPY ... FROM STDIN (no pks are returned)."""
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    buffer = io.StringIO()
+    for obj in objs:
+        values = [field.pre_save(obj, add=True) for field in fields]
+        buffer.write(",".join(_copy_literal(f, v) for f, v in zip(fields, values)) + "\n")
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = ", ".join(connection.ops.quote_name(f.column) for f in fields)
+    sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def can_copy():
+    return connection.vendor == "postgresql"
+
+
+def after_properties_inserted(objs):
+    """What the Property post_save signals would have done, once per batch."""
+    search = get_search_backend()
+    for obj in objs:
+        if obj.pk:
+            search.index(obj)
+    for owner_id, count in Counter(obj.owner_id for obj in objs).items():
+        apply_deltas(owner_id, {"total_properties": count})
+
+
+def insert_batch(objs, use_copy=False, checkpoint=None, row=None):
+    """Insert one batch; with ``checkpoint``, move it to ``row`` in the same transaction."""
+    with transaction.atomic():
+        if use_copy:
+            copy_insert(Property, objs)
+        else:
+            objs = Property.objects.bulk_create(objs)
+        after_properties_inserted(objs)
+        if checkpoint is not None:
+            checkpoint.save(row, checkpoint.inserted + len(objs))
+    return len(objs)
+
+
+# -------------------------
+# Checkpoints
+# -------------------------
+class Checkpoint:
+    """
+    Remembers the last row committed for a given source file, so an
+    interrupted import can be re-run and continue after that row. The state
+    lives in ImportCheckpoint; save() belongs inside the batch's transaction.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.row = 0
+        self.inserted = 0
+        if name:
+            state = ImportCheckpoint.objects.filter(source=name).first()
+            if state is not None:
+                self.row, self.inserted = state.row, state.inserted
+
+    def save(self, row, inserted):
+        self.row, self.inserted = row, inserted
+        if not self.name:
+            return
+        ImportCheckpoint.objects.update_or_create(source=self.name, defaults={"row": row, "inserted": inserted})
+
+    def clear(self):
+        if self.name:
+            ImportCheckpoint.objects.filter(source=self.name).delete()
+        self.row = self.inserted = 0
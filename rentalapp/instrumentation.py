@@ -0,0 +1,149 @@
+# rentalapp/instrumentation.py
+
+import contextvars
+import json
+import logging
+from contextlib import ExitStack
+from dataclasses import dataclass
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger("rentalapp.instrumentation")
+
+
+# =========================
+# Per-request metrics
+# =========================
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    db_ms: float = 0.0
+    template_ms: float = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (perf_counter() - start) * 1000
+
+    def merge(self, other):
+        """Add metrics collected on another thread (db_ms then sums overlapping time)."""
+        self.queries += other.queries
+        self.db_ms += other.db_ms
+        self.template_ms += other.template_ms
+
+
+_current_metrics = contextvars.ContextVar("rentalapp_request_metrics", default=None)
+
+
+def current_metrics():
+    """Metrics of the request being handled, or None outside a request."""
+    return _current_metrics.get()
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# =========================
+# Template timing
+# =========================
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        start = perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics = current_metrics()
+            if metrics is not None:
+                metrics.template_ms += (perf_counter() - start) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that adds render time to the request metrics."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+# =========================
+# Middleware
+# =========================
+class QueryInstrumentationMiddleware:
+    """
+    Counts DB queries and measures DB, template and total time per request.
+    The numbers go into a Server-Timing header and one JSON log line (a
+    WARNING above settings.SLOW_REQUEST_MS), and are checked against the
+    view's @query_budget if it declares one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(metrics.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        total_ms = (perf_counter() - start) * 1000
+
+        view_name = self._view_name(request)
+        response["Server-Timing"] = (
+            f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries", '
+            f'tpl;dur={metrics.template_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+        # Every request gets a line; slow ones are raised to WARNING so they
+        # can be filtered out of the rest
+        slow = total_ms >= getattr(settings, "SLOW_REQUEST_MS", 500)
+        logger.log(logging.WARNING if slow else logging.INFO, json.dumps({
+            "event": "slow_request" if slow else "request_metrics",
+            "method": request.method,
+            "path": request.path,
+            "view": view_name,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_ms, 2),
+            "template_ms": round(metrics.template_ms, 2),
+            "total_ms": round(total_ms, 2),
+        }))
+
+        self._check_budget(request, view_name, metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._instrumented_view = view_func
+
+    def _view_name(self, request):
+        match = getattr(request, "resolver_match", None)
+        return match.view_name if match else None
+
+    def _check_budget(self, request, view_name, metrics):
+        view_func = getattr(request, "_instrumented_view", None)
+        budget = getattr(view_func, "query_budget", None)
+        if budget is None or metrics.queries <= budget:
+            return
+        message = f"{view_name} ran {metrics.queries} queries (budget {budget}) for {request.path}"
+        if getattr(settings, "QUERY_BUDGET_STRICT", False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,186 @@
+# rentalapp/mail.py
+
+import logging
+import queue
+import random
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# Outbox
+# =========================
+def queue_email(subject, body, to, from_email=None, reply_to=None):
+    """Write an email to the outbox; the request only pays for one INSERT."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        reply_to=list(reply_to or []),
+    )
+
+
+def retry_delay(attempts, base=30, cap=3600):
+    """Exponential backoff with jitter: ~30s, 60s, 120s ... capped at an hour."""
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_batch(limit, stale_after=timedelta(minutes=10), max_attempts=5):
+    """
+    Move up to ``limit`` due messages from pending to sending and return
+    them. The due rows are locked with SKIP LOCKED and claimed with one
+    UPDATE, so several worker processes can share the outbox without
+    waiting on each other or claiming the same message.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Messages left in "sending" by a crashed worker go back in the queue.
+        # The lost send counts as an attempt, so a message that kills its
+        # worker every time still ends up dead instead of looping forever.
+        stale = OutboundEmail.objects.filter(status="sending", locked_at__lt=now - stale_after)
+        stale.filter(attempts__gte=max_attempts - 1).update(
+            status="dead", attempts=F("attempts") + 1, locked_at=None, last_error="Worker lost while sending",
+        )
+        stale.update(status="pending", attempts=F("attempts") + 1, next_attempt_at=now, locked_at=None)
+
+        candidates = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        return _claim(candidates, now)
+
+
+def _claim(candidates, stamp):
+    """
+    Claim whichever ``candidates`` are still pending. SQLite ignores
+    select_for_update, so another worker may have claimed some of them since
+    they were selected: the UPDATE re-checks the status, and only the rows
+    carrying this claim's stamp are returned.
+    """
+    OutboundEmail.objects.filter(pk__in=candidates, status="pending").update(status="sending", locked_at=stamp)
+    return list(OutboundEmail.objects.filter(pk__in=candidates, status="sending", locked_at=stamp).order_by("id"))
+
+
+class MailWorkerPool:
+    """
+    Sends claimed outbox rows on ``threads`` threads. Each thread keeps one
+    SMTP connection open and reuses it for every message it sends, and only
+    reconnects after a failure.
+    """
+
+    def __init__(self, threads=4, max_attempts=5, backend=None):
+        self.threads = threads
+        self.max_attempts = max_attempts
+        self.backend = backend
+        self.jobs = queue.Queue(maxsize=threads * 4)
+        self.stats = {"sent": 0, "retried": 0, "dead": 0}
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def start(self):
+        for i in range(self.threads):
+            worker = threading.Thread(target=self._run, name=f"mail-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, message):
+        self.jobs.put(message)
+
+    def stop(self):
+        for _ in self._workers:
+            self.jobs.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _run(self):
+        connection = None
+        try:
+            while True:
+                message = self.jobs.get()
+                if message is None:
+                    break
+                try:
+                    if connection is None:
+                        connection = get_connection(self.backend)
+                        connection.open()
+                    self._send(connection, message)
+                except Exception as exc:
+                    # Drop the (possibly broken) connection; reconnect next time
+                    if connection is not None:
+                        try:
+                            connection.close()
+                        except Exception:
+                            pass
+                    connection = None
+                    self._failed(message, exc)
+        finally:
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            close_old_connections()
+
+    def _own(self, message):
+        """Rows still held by this claim; empty once another worker reclaimed it."""
+        return OutboundEmail.objects.filter(pk=message.pk, status="sending", locked_at=message.locked_at)
+
+    def _send(self, connection, message):
+        # A message may wait in the queue for a while: restamp the claim as
+        # the send starts, so it only goes stale stale_after from now
+        locked_at = timezone.now()
+        if not self._own(message).update(locked_at=locked_at):
+            logger.warning("Outbound email %s was reclaimed before it was sent, skipping", message.pk)
+            return
+        message.locked_at = locked_at
+        email = EmailMessage(
+            subject=message.subject,
+            body=message.body,
+            from_email=message.from_email or None,
+            to=message.to,
+            reply_to=message.reply_to or None,
+            connection=connection,
+        )
+        email.send(fail_silently=False)
+        marked = self._own(message).update(
+            status="sent", sent_at=timezone.now(), attempts=message.attempts + 1,
+            locked_at=None, last_error="",
+        )
+        if not marked:
+            logger.warning("Outbound email %s was reclaimed while it was being sent", message.pk)
+        self._count("sent")
+
+    def _failed(self, message, exc):
+        attempts = message.attempts + 1
+        error = f"{type(exc).__name__}: {exc}"
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = "dead", timezone.now()
+            logger.error("Outbound email %s dead after %s attempts: %s", message.pk, attempts, error)
+            self._count("dead")
+        else:
+            status, next_attempt_at = "pending", timezone.now() + retry_delay(attempts)
+            logger.warning("Outbound email %s failed (attempt %s), retrying: %s", message.pk, attempts, error)
+            self._count("retried")
+        self._own(message).update(
+            status=status, attempts=attempts, next_attempt_at=next_attempt_at,
+            locked_at=None, last_error=error,
+        )
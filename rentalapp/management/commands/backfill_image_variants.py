@@ -0,0 +1,39 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from rentalapp.images import needs_variants, submit_variants
+from rentalapp.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Generates resized WebP/JPEG variants for existing property images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that already exist')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Properties read and queued per chunk (default: 200)')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        properties = Property.objects.exclude(image='').exclude(image__isnull=True).only(
+            'id', 'image', 'image_variants'
+        ).order_by('id')
+
+        # One chunk at a time: a large catalogue never sits in the executor's
+        # queue all at once, and no read cursor stays open (SQLite would
+        # lock the table) while the workers write
+        last_pk, submitted, built = 0, 0, 0
+        while True:
+            chunk = list(properties.filter(pk__gt=last_pk)[:options['chunk_size']])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            futures = [submit_variants(prop.pk, force=force) for prop in chunk if force or needs_variants(prop)]
+            submitted += len(futures)
+            built += sum(1 for future in wait(futures).done if future.result())
+
+        failed = submitted - built
+        self.stdout.write(self.style.SUCCESS(f'✅ Built variants for {built} properties'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'⚠️ {failed} properties skipped or failed (see log)'))
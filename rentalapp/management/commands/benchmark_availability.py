@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from rentalapp.availability import available_between
+from rentalapp.models import Booking, CustomUser, Property
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the check_in/check_out availability query against synthetic bookings (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=2000, help='Synthetic properties (default: 2000)')
+        parser.add_argument('--bookings', type=int, default=200000, help='Synthetic bookings (default: 200000)')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per date window (default: 20)')
+        parser.add_argument('--page-size', type=int, default=12, help='LIMIT of the browse page (default: 12)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Everything is seeded inside one transaction that is rolled back,
+        # so the benchmark never leaves rows behind
+        try:
+            with transaction.atomic():
+                self.seed(options)
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('✅ Benchmark finished, synthetic rows rolled back'))
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        landlord = CustomUser.objects.create_user(email='bench-landlord@example.invalid', password=None, role='landlord')
+        tenant = CustomUser.objects.create_user(email='bench-tenant@example.invalid', password=None, role='tenant')
+
+        properties = Property.objects.bulk_create(
+            Property(
+                owner=landlord, title=f'Bench home {i}', address='Bench Road', description='',
+                rent=8000 + i % 40 * 500, property_type='apartment', district='ernakulam',
+            )
+            for i in range(options['properties'])
+        )
+
+        # Back-to-back stays per property from up to a year ago, ~60% approved
+        today = date.today()
+        per_property = max(1, options['bookings'] // len(properties))
+        bookings = []
+        for prop in properties:
+            start = today - timedelta(days=rng.randint(0, 365))
+            for _ in range(per_property):
+                length = rng.randint(7, 90)
+                status = 'approved' if rng.random() < 0.6 else rng.choice(['pending', 'rejected', 'cancelled'])
+                bookings.append(Booking(
+                    property=prop, user=tenant, status=status,
+                    start_date=start, end_date=start + timedelta(days=length),
+                ))
+                start += timedelta(days=length + rng.randint(0, 10))
+            if len(bookings) >= 5000:
+                Booking.objects.bulk_create(bookings)
+                bookings = []
+        Booking.objects.bulk_create(bookings)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        total = Booking.objects.count()
+        self.stdout.write(
+            f'📦 Seeded {len(properties)} properties and {total} bookings '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def run(self, options):
+        today = date.today()
+        windows = [
+            ('next weekend', today + timedelta(days=5), today + timedelta(days=7)),
+            ('next month', today + timedelta(days=30), today + timedelta(days=60)),
+            ('one year', today, today + timedelta(days=365)),
+            ('past quarter', today - timedelta(days=90), today),
+        ]
+
+        for label, check_in, check_out in windows:
+            queryset = available_between(Property.objects.all(), check_in, check_out)
+            page = queryset.order_by('-created_at', '-id')[:options['page_size'] + 1]
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(page.all())  # fresh queryset: no result cache
+                timings.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            free = queryset.count()
+            count_ms = (time.perf_counter() - started) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}: {check_in} → {check_out} =='))
+            self.stdout.write(
+                f'first page: p50 {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms | '
+                f'count: {free} free in {count_ms:.2f} ms'
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING('== plan =='))
+        self.stdout.write(page.explain())
@@ -0,0 +1,99 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentalapp.benchmark import ROLES, ClientDriver, HTTPDriver, compare_runs, load_run, run_benchmark
+
+
+def _queries(value):
+    return '-' if value is None else f'{value:g}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks every named rentalapp route as anonymous/tenant/landlord and writes '
+        'p50/p95/p99 latency, throughput and queries per request as JSON; --compare diffs two runs'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per route and role (default: 50)')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests first (default: 2)')
+        parser.add_argument('--base-url', help='Benchmark a running server (e.g. gunicorn) instead of the test client')
+        parser.add_argument('--concurrency', type=int, default=1, help='Parallel requests, with --base-url only (default: 1)')
+        parser.add_argument('--role', action='append', choices=ROLES, help='Limit to these roles (repeatable)')
+        parser.add_argument('--route', action='append', help='Limit to these route names (repeatable)')
+        parser.add_argument('--tenant', help='Tenant email (default: the tenant with most bookings)')
+        parser.add_argument('--landlord', help='Landlord email (default: the landlord with most properties)')
+        parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout')
+        parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help='Diff two JSON reports')
+        parser.add_argument('--metric', default='p95_ms', choices=['p50_ms', 'p95_ms', 'p99_ms', 'mean_ms'])
+        parser.add_argument('--threshold', type=float, default=20.0, help='Regression threshold in percent (default: 20)')
+        parser.add_argument('--min-delta', type=float, default=1.0, help='Ignore slowdowns smaller than this many ms (default: 1)')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(
+                *options['compare'], metric=options['metric'],
+                threshold=options['threshold'], min_delta=options['min_delta'],
+            )
+
+        if options['base_url']:
+            driver = HTTPDriver(options['base_url'])
+        else:
+            if options['concurrency'] > 1:
+                raise CommandError('--concurrency needs --base-url (the test client runs in-process)')
+            driver = ClientDriver()
+
+        def progress(result):
+            self.stderr.write(
+                f"{result['route']:<28} {result['role']:<10} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} ms {result['throughput_rps']:>8.1f} req/s  {_queries(result['queries']):>3} queries  "
+                f"{','.join(str(code) for code in result['status'])}"
+            )
+
+        self.stderr.write(f"{'route':<28} {'role':<10} {'p50':>8} {'p95':>8} {'p99':>8}")
+        report = run_benchmark(
+            driver,
+            requests=options['requests'],
+            warmup=options['warmup'],
+            concurrency=options['concurrency'],
+            roles=tuple(options['role'] or ROLES),
+            only=set(options['route'] or []),
+            tenant_email=options['tenant'],
+            landlord_email=options['landlord'],
+            progress=progress,
+        )
+        for skip in report['skipped']:
+            self.stderr.write(f"⏭️ {skip['route']} ({skip['role']}): {skip['reason']}")
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"✅ {len(report['results'])} results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def compare(self, base_path, head_path, metric, threshold, min_delta):
+        rows = compare_runs(
+            load_run(base_path), load_run(head_path),
+            threshold_pct=threshold, metric=metric, min_delta_ms=min_delta,
+        )
+
+        self.stdout.write(f"{'route':<28} {'role':<10} {'before':>9} {'after':>9} {'change':>8}  queries")
+        for row in rows:
+            if 'change' in row:
+                self.stdout.write(f"{row['route']:<28} {row['role']:<10} {row['change']}")
+                continue
+            line = (
+                f"{row['route']:<28} {row['role']:<10} {row['before_ms']:>9.2f} {row['after_ms']:>9.2f} "
+                f"{row['change_pct']:>+7.1f}%  {_queries(row['queries_before'])} → {_queries(row['queries_after'])}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['regression'] else line)
+
+        regressions = [row for row in rows if row['regression']]
+        if regressions:
+            raise CommandError(
+                f'❌ {len(regressions)} regressions ({metric} over +{threshold:g}% or more queries)'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✅ No regressions ({metric}, threshold +{threshold:g}%)'))
@@ -0,0 +1,82 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentalapp.benchmark import HTTPDriver, compare_runs, run_benchmark, running_server
+
+
+DASHBOARD_ROUTES = ["landlord_dashboard", "tenant_dashboard_overview"]
+
+
+class Command(BaseCommand):
+    help = (
+        'Serves the project under gunicorn (WSGI) and uvicorn (ASGI) in turn and compares '
+        'wall-clock latency of the async dashboards (or any --route) under concurrent load'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per route and role (default: 200)')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests first (default: 10)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Parallel requests (default: 8)')
+        parser.add_argument('--workers', type=int, default=1, help='Server worker processes (default: 1)')
+        parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker (default: 8)')
+        parser.add_argument('--route', action='append', help=f'Routes to compare (default: {", ".join(DASHBOARD_ROUTES)})')
+        parser.add_argument('--wsgi-url', help='Use this running WSGI server instead of starting gunicorn')
+        parser.add_argument('--asgi-url', help='Use this running ASGI server instead of starting uvicorn')
+        parser.add_argument('--tenant', help='Tenant email (default: the tenant with most bookings)')
+        parser.add_argument('--landlord', help='Landlord email (default: the landlord with most properties)')
+        parser.add_argument('--output', '-o', help='Write both JSON reports here')
+
+    def handle(self, *args, **options):
+        reports = {}
+        for kind in ('wsgi', 'asgi'):
+            url = options[f'{kind}_url']
+            try:
+                if url:
+                    reports[kind] = self.run(kind, url, options)
+                else:
+                    with running_server(kind, workers=options['workers'], threads=options['threads']) as url:
+                        reports[kind] = self.run(kind, url, options)
+            except RuntimeError as exc:
+                raise CommandError(f'❌ Could not start the {kind.upper()} server: {exc}')
+
+        self.stdout.write(f"\n{'route':<28} {'role':<10} {'wsgi p50':>9} {'asgi p50':>9} {'wsgi p95':>9} {'asgi p95':>9} {'change':>8}")
+        p50 = {(row['route'], row['role']): row for row in compare_runs(reports['wsgi'], reports['asgi'], metric='p50_ms')}
+        for row in compare_runs(reports['wsgi'], reports['asgi'], metric='p95_ms'):
+            if 'change' in row:
+                continue
+            median = p50[(row['route'], row['role'])]
+            self.stdout.write(
+                f"{row['route']:<28} {row['role']:<10} {median['before_ms']:>9.2f} {median['after_ms']:>9.2f} "
+                f"{row['before_ms']:>9.2f} {row['after_ms']:>9.2f} {row['change_pct']:>+7.1f}%"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                json.dump(reports, handle, indent=2)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"✅ Reports written to {options['output']}"))
+
+    def run(self, kind, url, options):
+        self.stderr.write(f'⏱️ {kind.upper()} at {url}')
+
+        def progress(result):
+            self.stderr.write(
+                f"  {result['route']:<28} {result['role']:<10} p50 {result['p50_ms']:>8.2f} ms  "
+                f"p95 {result['p95_ms']:>8.2f} ms  {result['throughput_rps']:>7.1f} req/s  "
+                f"{','.join(str(code) for code in result['status'])}"
+            )
+
+        report = run_benchmark(
+            HTTPDriver(url),
+            requests=options['requests'],
+            warmup=options['warmup'],
+            concurrency=options['concurrency'],
+            roles=('tenant', 'landlord'),
+            only=set(options['route'] or DASHBOARD_ROUTES),
+            tenant_email=options['tenant'],
+            landlord_email=options['landlord'],
+            progress=progress,
+        )
+        report['meta']['server'] = kind
+        return report
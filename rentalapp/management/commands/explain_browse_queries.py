@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from rentalapp.filters import apply_property_filters, browse_ordering
+from rentalapp.models import Property
+
+
+# Canonical filter combinations sent by the property_list / home search forms
+BROWSE_QUERIES = [
+    ("first page", {}),
+    ("available only", {"available": True}),
+    ("district", {"district": "ernakulam"}),
+    ("district + type + max rent", {"district": "ernakulam", "property_type": "apartment", "max_rent": 15000}),
+    ("district + bedrooms + max rent", {"district": "kozhikode", "bedrooms": 2, "max_rent": 20000}),
+    ("type + max rent", {"property_type": "villa", "max_rent": 50000}),
+    ("search + district", {"q": "sea view", "district": "ernakulam"}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Prints EXPLAIN plans for the canonical property browse queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only; executes the queries)',
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=12,
+            help='LIMIT used for the browse page (default: 12)',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_options = {}
+        if options['analyze']:
+            if vendor == 'postgresql':
+                explain_options = {'analyze': True, 'buffers': True}
+            else:
+                self.stdout.write(self.style.WARNING(f'⚠️ --analyze is ignored on {vendor}'))
+
+        self.stdout.write(f'Database backend: {vendor}\n')
+        for label, filters in BROWSE_QUERIES:
+            queryset = apply_property_filters(Property.objects.all(), filters)
+            ordering = [f'-{key}' for key in browse_ordering(filters)]
+            queryset = queryset.order_by(*ordering)[:options['page_size'] + 1]
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {label} =='))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
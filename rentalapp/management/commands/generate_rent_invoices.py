@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rentalapp.invoices import DUE_AFTER_DAYS, generate_invoices, month_start, parse_month
+
+
+class Command(BaseCommand):
+    help = 'Creates pending rent Payments for every approved booking active in a month (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month to bill as YYYY-MM (default: current month)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create (default: 5000)')
+        parser.add_argument(
+            '--due-days', type=int, default=DUE_AFTER_DAYS,
+            help=f'Days after the 1st the rent is due (default: {DUE_AFTER_DAYS})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only count the invoices that would be created')
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                first_day = parse_month(options['month'])
+            except ValueError:
+                raise CommandError('--month must look like YYYY-MM')
+        else:
+            first_day = month_start(timezone.localdate())
+
+        started = time.perf_counter()
+        created, skipped = generate_invoices(
+            first_day,
+            batch_size=options['batch_size'],
+            due_after_days=options['due_days'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+
+        verb = 'Would create' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {verb} {created} invoices for {first_day:%B %Y} in {elapsed:.2f}s'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'⚠️ Skipped {skipped} invoices created concurrently'))
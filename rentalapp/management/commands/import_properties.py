@@ -0,0 +1,104 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rentalapp.importers import (
+    Checkpoint, OwnerResolver, build_property, can_copy, detect_format, insert_batch, read_rows,
+)
+from rentalapp.market import bump_market_version
+from rentalapp.page_cache import bump_catalogue_generation
+from rentalapp.similar import refresh_after_bulk_insert
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams properties from a CSV or JSONL file, validates them with PropertyForm and inserts them in batches. '
+        'Similar-home lists are refreshed at the end; after an interrupted run, run rebuild_similar_properties'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSONL file')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--owner', help='Landlord email for rows without an owner_email column')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction (default: 1000)')
+        parser.add_argument('--checkpoint', help="Checkpoint name (default: the file's absolute path)")
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and start from row 1')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL')
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row without writing anything')
+        parser.add_argument('--max-errors', type=int, default=20, help='Invalid rows to print (default: 20)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        dry_run = options['dry_run']
+        use_copy = can_copy() and not options['no_copy']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if not os.path.isfile(path):
+            raise CommandError(f'No such file: {path}')
+
+        checkpoint = Checkpoint(None if dry_run else options['checkpoint'] or os.path.abspath(path))
+        if options['restart']:
+            checkpoint.clear()
+        if checkpoint.row:
+            self.stdout.write(f'↪️ Resuming after row {checkpoint.row} ({checkpoint.inserted} already imported)')
+
+        resolve_owner = OwnerResolver(options['owner'])
+        inserted, valid, invalid, seen = checkpoint.inserted, 0, 0, 0
+        batch, last_row = [], checkpoint.row
+        # (pk, district, property_type) of this run's rows, for the similar-home lists
+        imported = []
+        started = time.perf_counter()
+
+        for number, row in read_rows(path, fmt):
+            if number <= checkpoint.row:
+                continue
+            seen += 1
+            last_row = number
+            prop, errors = build_property(row, resolve_owner)
+            if errors:
+                invalid += 1
+                if invalid <= options['max_errors']:
+                    self.stderr.write(f'❌ row {number}: {errors}')
+                continue
+
+            valid += 1
+            if dry_run:
+                continue
+            batch.append(prop)
+            if len(batch) >= batch_size:
+                # The checkpoint commits with the batch: a crash in between
+                # cannot make a re-run import the batch again
+                inserted += insert_batch(batch, use_copy, checkpoint, last_row)
+                imported += [(prop.pk, prop.district, prop.property_type) for prop in batch]
+                batch = []
+                self.report(seen, started, inserted)
+
+        if batch:
+            inserted += insert_batch(batch, use_copy, checkpoint, last_row)
+            imported += [(prop.pk, prop.district, prop.property_type) for prop in batch]
+        elif not dry_run:
+            # Invalid trailing rows are done with too
+            checkpoint.save(last_row, inserted)
+        if valid and not dry_run:
+            bump_catalogue_generation()
+            bump_market_version()
+        if imported:
+            # bulk_create/COPY skipped the signal that refreshes these
+            self.stdout.write(f'🏘️ Refreshed {refresh_after_bulk_insert(imported)} similar-home lists')
+
+        elapsed = time.perf_counter() - started
+        rate = seen / elapsed if elapsed else 0
+        method = 'validated' if dry_run else ('COPY' if use_copy else 'bulk_create')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {seen} rows read in {elapsed:.1f}s ({rate:,.0f} rows/s, {method}): '
+            f'{valid} valid, {invalid} invalid' + ('' if dry_run else f', {inserted} imported in total')
+        ))
+        if invalid > options['max_errors']:
+            self.stdout.write(self.style.WARNING(f'⚠️ {invalid - options["max_errors"]} more invalid rows not shown'))
+
+    def report(self, seen, started, inserted):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'… {seen} rows read, {inserted} imported ({seen / elapsed:,.0f} rows/s)')
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rentalapp.models import CustomUser, LandlordStats
+from rentalapp.stats import COUNTER_FIELDS, compute_all_counters
+
+
+class Command(BaseCommand):
+    help = 'Recomputes every LandlordStats row from scratch and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report drift, do not write anything',
+        )
+
+    def handle(self, *args, **options):
+        counters = compute_all_counters()
+        # Landlords without any property still get an all-zero row
+        for landlord_id in CustomUser.objects.filter(role='landlord').values_list('pk', flat=True):
+            counters.setdefault(landlord_id, {field: 0 for field in COUNTER_FIELDS})
+
+        existing = LandlordStats.objects.in_bulk(list(counters))
+        to_create, to_update, drifted = [], [], 0
+
+        for landlord_id, values in counters.items():
+            stats = existing.get(landlord_id)
+            if stats is None:
+                to_create.append(LandlordStats(landlord_id=landlord_id, **values))
+                continue
+
+            diffs = [
+                f'{field}: {getattr(stats, field)} -> {values[field]}'
+                for field in COUNTER_FIELDS
+                if getattr(stats, field) != values[field]
+            ]
+            if diffs:
+                drifted += 1
+                self.stdout.write(self.style.WARNING(f'⚠️ landlord {landlord_id}: ' + ', '.join(diffs)))
+                for field in COUNTER_FIELDS:
+                    setattr(stats, field, values[field])
+                to_update.append(stats)
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                LandlordStats.objects.bulk_create(to_create, batch_size=1000)
+                LandlordStats.objects.bulk_update(to_update, COUNTER_FIELDS, batch_size=1000)
+
+        verb = 'Would fix' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(counters)} landlords checked: {len(to_create)} missing rows, '
+            f'{drifted} drifted. {verb} {len(to_create) + len(to_update)} rows.'
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentalapp.occupancy import rebuild_all_timelines
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds every property occupancy timeline from the approved bookings'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_all_timelines()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Rebuilt {written} occupancy timelines in {time.perf_counter() - started:.1f}s'
+        ))
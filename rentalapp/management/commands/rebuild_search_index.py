@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from rentalapp.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the property full-text search index from the Property table'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {type(backend).__name__}: reindexed {count} properties'
+        ))
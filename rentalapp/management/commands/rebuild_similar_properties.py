@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentalapp import similar
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the precomputed "similar homes" list of every property, block by block'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--district', action='append', default=[],
+            help='Only rebuild these districts (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total_properties = total_links = 0
+        for district, property_type in similar.blocks():
+            if options['district'] and district not in options['district']:
+                continue
+            block_started = time.perf_counter()
+            properties, links = similar.rebuild_block(district, property_type)
+            total_properties += properties
+            total_links += links
+            self.stdout.write(
+                f'  {district}/{property_type}: {properties} properties, {links} links '
+                f'in {time.perf_counter() - block_started:.1f}s'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Rebuilt similar homes for {total_properties} properties '
+            f'({total_links} links) in {time.perf_counter() - started:.1f}s'
+        ))
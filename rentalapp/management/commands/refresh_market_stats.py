@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentalapp.market import refresh_market_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the cached market rent stats (run after deploys or cache flushes)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rows = refresh_market_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Cached market stats for {len(rows)} buckets in {time.perf_counter() - started:.1f}s'
+        ))
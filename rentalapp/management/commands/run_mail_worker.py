@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rentalapp.mail import MailWorkerPool, claim_batch
+
+
+class Command(BaseCommand):
+    help = 'Drains the OutboundEmail outbox with a pool of SMTP sender threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Sender threads (default: 4)')
+        parser.add_argument('--batch-size', type=int, default=100, help='Messages claimed per poll (default: 100)')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Attempts before a message is dead-lettered (default: 5)')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty (default: 5)')
+        parser.add_argument('--once', action='store_true', help='Exit once no message is due instead of polling forever')
+
+    def handle(self, *args, **options):
+        pool = MailWorkerPool(threads=options['threads'], max_attempts=options['max_attempts'])
+        pool.start()
+        self.stdout.write(f"📬 Mail worker started with {options['threads']} threads")
+
+        try:
+            while True:
+                batch = claim_batch(options['batch_size'], max_attempts=options['max_attempts'])
+                for message in batch:
+                    pool.submit(message)
+                if batch:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('⚠️ Stopping, waiting for in-flight messages...'))
+        finally:
+            pool.stop()
+
+        stats = pool.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Sent {stats['sent']}, retried {stats['retried']}, dead-lettered {stats['dead']}"
+        ))
@@ -0,0 +1,96 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from rentalapp.market import bump_market_version
+from rentalapp.occupancy import rebuild_all_timelines
+from rentalapp.page_cache import bump_catalogue_generation
+from rentalapp.search import get_search_backend
+from rentalapp.seeding import Seeder
+from rentalapp.similar import blocks, rebuild_block
+
+
+class Command(BaseCommand):
+    help = 'Generates a deterministic synthetic dataset (users, properties, bookings, payments, maintenance) with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--landlords', type=int, default=200, help='Landlords to create (default: 200)')
+        parser.add_argument('--tenants', type=int, default=2000, help='Tenants to create (default: 2000)')
+        parser.add_argument('--properties', type=int, default=5000, help='Properties to create (default: 5000)')
+        parser.add_argument('--bookings-per-property', type=float, default=4, help='Average stays per property (default: 4)')
+        parser.add_argument('--months', type=int, default=24, help='Months of booking/payment history (default: 24)')
+        parser.add_argument('--maintenance-rate', type=float, default=0.3,
+                            help='Chance of each further maintenance row per stay (default: 0.3)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; same seed, same data (default: 1)')
+        parser.add_argument('--prefix', default='seed', help='Email prefix of generated users (default: seed)')
+        parser.add_argument('--password', default='password123', help='Password of every generated user')
+        parser.add_argument('--today', help='Date the history ends at, as YYYY-MM-DD (default: today); same date, same data')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Properties per transaction (default: 2000)')
+        parser.add_argument('--flush', action='store_true', help='Delete users with this prefix (and their data) first; a fresh database is faster for big seeds')
+
+    def handle(self, *args, **options):
+        if min(options['landlords'], options['tenants'], options['properties']) < 1:
+            raise CommandError('--landlords, --tenants and --properties must be at least 1')
+
+        today = None
+        if options['today']:
+            try:
+                today = date.fromisoformat(options['today'])
+            except ValueError:
+                raise CommandError('--today must look like YYYY-MM-DD')
+
+        seeder = Seeder(
+            seed=options['seed'],
+            prefix=options['prefix'],
+            password=options['password'],
+            months=options['months'],
+            bookings_per_property=options['bookings_per_property'],
+            maintenance_rate=options['maintenance_rate'],
+            batch_size=options['batch_size'],
+            today=today,
+        )
+
+        existing = seeder.existing_users()
+        if existing.exists():
+            if not options['flush']:
+                raise CommandError(f"Users with the '{options['prefix']}-' prefix already exist; use --flush or another --prefix")
+            deleted, _ = existing.delete()
+            self.stdout.write(f'🗑️ Deleted {deleted} rows from a previous seed')
+
+        started = time.perf_counter()
+        landlord_ids = seeder.create_users('landlord', options['landlords'])
+        tenant_ids = seeder.create_users('tenant', options['tenants'])
+
+        def progress(counts):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"… {counts['properties']} properties, {counts['bookings']} bookings, "
+                f"{counts['payments']} payments ({elapsed:.1f}s)"
+            )
+
+        seeder.create_properties(options['properties'], landlord_ids, tenant_ids, progress=progress)
+
+        # bulk_create skipped the signals that keep these in sync
+        seeder.refresh_landlord_stats(landlord_ids)
+        rebuild_all_timelines()
+        # Every block is new: rebuilding them beats refreshing row by row
+        for district, property_type in blocks():
+            rebuild_block(district, property_type)
+        get_search_backend().rebuild()
+        bump_catalogue_generation()
+        bump_market_version()
+        # Fresh planner statistics: without them SQLite prefers the
+        # type/bedroom indexes over the lat/lng box on "near" searches
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        elapsed = time.perf_counter() - started
+        counts = seeder.counts
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Seeded {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s): "
+            + ", ".join(f"{value} {name}" for name, value in counts.items())
+        ))
+        self.stdout.write(f"🔑 Log in as {seeder.email('landlord', 0)} / {seeder.email('tenant', 0)} with the seed password")
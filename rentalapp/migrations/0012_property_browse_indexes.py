@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0011_property_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['district', '-created_at', '-id'], name='property_district_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['district', 'property_type', 'rent'], name='property_dist_type_rent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['district', 'bedrooms', 'rent'], name='property_dist_beds_rent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['property_type', 'rent'], name='property_type_rent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('available', True)), fields=['-created_at', '-id'], name='property_available_recent_idx'),
+        ),
+    ]
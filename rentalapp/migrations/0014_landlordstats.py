@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0013_property_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LandlordStats',
+            fields=[
+                ('landlord', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_properties', models.IntegerField(default=0)),
+                ('total_bookings', models.IntegerField(default=0)),
+                ('pending_applications', models.IntegerField(default=0)),
+                ('approved_bookings', models.IntegerField(default=0)),
+                ('total_income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0016_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['property', 'start_date', 'end_date'], name='booking_approved_range_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def clear_duplicate_months(apps, schema_editor):
+    # make_payment used to add a new row on every click, so a booking may
+    # already have several payments for one month. The earliest keeps the
+    # month; the others keep their date and amount but lose the month, which
+    # the unique constraint does not cover.
+    Payment = apps.get_model("rentalapp", "Payment")
+    duplicates = (
+        Payment.objects.exclude(month__isnull=True)
+        .values("booking_id", "month")
+        .annotate(rows=Count("id"), first_id=Min("id"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        Payment.objects.filter(booking_id=group["booking_id"], month=group["month"]).exclude(
+            pk=group["first_id"]
+        ).update(month=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0017_booking_approved_range_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_months, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('month__isnull', False)), fields=('booking', 'month'), name='payment_booking_month_uniq'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:49
+
+import re
+
+from django.db import migrations, models
+
+# A frozen copy of rentalapp.geo.geocode() and rentalapp/data/kerala_centroids.csv
+# as they were when this migration was written, so later changes to either
+# do not change what the migration does
+PINCODE_RE = re.compile(r"\b(6[7-9]\d)\s?(\d{3})\b")
+CENTROIDS = {
+    ("district", "alappuzha"): (9.4981, 76.3388),
+    ("district", "ernakulam"): (9.9816, 76.2999),
+    ("district", "idukki"): (9.8497, 76.9720),
+    ("district", "kannur"): (11.8745, 75.3704),
+    ("district", "kasaragod"): (12.4996, 74.9869),
+    ("district", "kollam"): (8.8932, 76.6141),
+    ("district", "kottayam"): (9.5916, 76.5222),
+    ("district", "kozhikode"): (11.2588, 75.7804),
+    ("district", "malappuram"): (11.0510, 76.0711),
+    ("district", "palakkad"): (10.7867, 76.6548),
+    ("district", "pathanamthitta"): (9.2648, 76.7870),
+    ("district", "thiruvananthapuram"): (8.5241, 76.9366),
+    ("district", "thrissur"): (10.5276, 76.2144),
+    ("district", "wayanad"): (11.6085, 76.0830),
+    ("prefix", "670"): (11.8745, 75.3704),
+    ("prefix", "671"): (12.4996, 74.9869),
+    ("prefix", "673"): (11.2588, 75.7804),
+    ("prefix", "676"): (10.9143, 75.9215),
+    ("prefix", "678"): (10.7867, 76.6548),
+    ("prefix", "679"): (10.9760, 76.2254),
+    ("prefix", "680"): (10.5276, 76.2144),
+    ("prefix", "682"): (9.9816, 76.2999),
+    ("prefix", "683"): (10.1076, 76.3516),
+    ("prefix", "685"): (9.8959, 76.7184),
+    ("prefix", "686"): (9.5916, 76.5222),
+    ("prefix", "688"): (9.4981, 76.3388),
+    ("prefix", "689"): (9.3835, 76.5741),
+    ("prefix", "690"): (9.0588, 76.5356),
+    ("prefix", "691"): (8.8932, 76.6141),
+    ("prefix", "695"): (8.5241, 76.9366),
+    ("pincode", "670001"): (11.8745, 75.3704),
+    ("pincode", "671121"): (12.4996, 74.9869),
+    ("pincode", "673001"): (11.2588, 75.7804),
+    ("pincode", "673121"): (11.6085, 76.0830),
+    ("pincode", "676505"): (11.0510, 76.0711),
+    ("pincode", "678001"): (10.7867, 76.6548),
+    ("pincode", "680001"): (10.5276, 76.2144),
+    ("pincode", "682011"): (9.9816, 76.2999),
+    ("pincode", "683101"): (10.1076, 76.3516),
+    ("pincode", "685584"): (9.8959, 76.7184),
+    ("pincode", "685603"): (9.8497, 76.9720),
+    ("pincode", "686001"): (9.5916, 76.5222),
+    ("pincode", "688001"): (9.4981, 76.3388),
+    ("pincode", "689101"): (9.3835, 76.5741),
+    ("pincode", "689645"): (9.2648, 76.7870),
+    ("pincode", "691001"): (8.8932, 76.6141),
+    ("pincode", "695001"): (8.5241, 76.9366),
+}
+
+
+def geocode(address="", district=""):
+    match = PINCODE_RE.search(address or "")
+    if match:
+        prefix, rest = match.groups()
+        point = CENTROIDS.get(("pincode", prefix + rest)) or CENTROIDS.get(("prefix", prefix))
+        if point:
+            return point
+    return CENTROIDS.get(("district", (district or "").strip().lower()))
+
+
+def geocode_existing(apps, schema_editor):
+    # Same offline lookup the pre_save signal did for new listings
+    Property = apps.get_model("rentalapp", "Property")
+    batch = []
+    for prop in Property.objects.only("id", "address", "district").iterator(chunk_size=2000):
+        point = geocode(prop.address, prop.district)
+        if point:
+            prop.latitude, prop.longitude = point
+            batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ["latitude", "longitude"])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ["latitude", "longitude"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0019_property_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['latitude', 'longitude'], name='property_lat_lng_idx'),
+        ),
+        migrations.RunPython(geocode_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copies of rentalapp.occupancy helpers, so the data this migration
+# writes does not follow later changes to that module
+def timeline_from_ranges(ranges):
+    ranges = [(begin, end) for begin, end in ranges if begin < end]
+    if not ranges:
+        return None, 0
+    start = min(begin for begin, _ in ranges)
+    bits = 0
+    for begin, end in ranges:
+        bits |= ((1 << (end - begin).days) - 1) << (begin - start).days
+    return start, bits
+
+
+def encode_bits(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def build_timelines(apps, schema_editor):
+    # Same bitmaps rebuild_occupancy writes, from the approved bookings
+    Booking = apps.get_model("rentalapp", "Booking")
+    OccupancyTimeline = apps.get_model("rentalapp", "OccupancyTimeline")
+    ranges = {}
+    rows = Booking.objects.filter(status="approved").values_list("property_id", "start_date", "end_date")
+    for property_id, begin, end in rows.iterator(chunk_size=2000):
+        ranges.setdefault(property_id, []).append((begin, end))
+    timelines = []
+    for property_id, stays in ranges.items():
+        start, bits = timeline_from_ranges(stays)
+        if start is not None:
+            timelines.append(OccupancyTimeline(property_id=property_id, start=start, bits=encode_bits(bits)))
+    OccupancyTimeline.objects.bulk_create(timelines, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentalapp', '0022_similar_property'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyTimeline',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='occupancy', serialize=False, to='rentalapp.property')),
+                ('start', models.DateField()),
+                ('bits', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_timelines, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.conf import settings
+from django.utils import timezone
 
 
 # choices
@@ -69,6 +70,17 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.email
 
+    def get_session_auth_hash(self):
+        # Users built from a cached snapshot (rentalapp.auth) carry the hash
+        # instead of the password it is derived from
+        cached = self.__dict__.get("_session_auth_hash")
+        return cached or super().get_session_auth_hash()
+
+    def set_password(self, raw_password):
+        # The cached hash belongs to the old password
+        self.__dict__.pop("_session_auth_hash", None)
+        super().set_password(raw_password)
+
 
 # ======================
 # Profile Model
@@ -103,8 +115,39 @@ class Property(models.Model):
         choices=PROPERTY_TYPE_CHOICES
     )
     image = models.ImageField(upload_to="properties/", blank=True, null=True)
+    # Resized WebP/JPEG copies of image, filled in by rentalapp/images.py
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     available = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every save; the JSON API derives its ETags from it
+    updated_at = models.DateTimeField(auto_now=True)
+    # Filled in from the address pincode or district (rentalapp.geo) on save
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination on the browse pages walks (created_at, id)
+            models.Index(fields=["-created_at", "-id"], name="property_created_id_idx"),
+            # District-only browse walks this in page order (no sort step)
+            models.Index(fields=["district", "-created_at", "-id"], name="property_district_recent_idx"),
+            # Browse filters: district is always the leading equality column,
+            # then type/bedrooms, with rent last for the rent__lte range
+            models.Index(fields=["district", "property_type", "rent"], name="property_dist_type_rent_idx"),
+            models.Index(fields=["district", "bedrooms", "rent"], name="property_dist_beds_rent_idx"),
+            models.Index(fields=["property_type", "rent"], name="property_type_rent_idx"),
+            # Most browse traffic only wants listings that can still be booked
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="property_available_recent_idx",
+                condition=models.Q(available=True),
+            ),
+            # Bounding-box prefilter of the "near" radius search
+            models.Index(fields=["latitude", "longitude"], name="property_lat_lng_idx"),
+            # Workers pull the listings saved since their last sync
+            # (rentalapp/comparables.py)
+            models.Index(fields=["updated_at"], name="property_updated_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -131,6 +174,18 @@ class Booking(models.Model):
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Availability anti-join (rentalapp/availability.py): approved
+            # stays of one property, range-scanned by start date
+            models.Index(
+                fields=["property", "start_date", "end_date"],
+                condition=models.Q(status="approved"),
+                name="booking_approved_range_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.property} ({self.status})"
 
@@ -152,11 +207,153 @@ class Payment(models.Model):
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
 
+    class Meta:
+        constraints = [
+            # One rent payment per booking and month, so generate_rent_invoices
+            # can be re-run safely (payments without a month are not covered)
+            models.UniqueConstraint(
+                fields=["booking", "month"],
+                condition=models.Q(month__isnull=False),
+                name="payment_booking_month_uniq",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.booking} - {self.amount} ({self.status})"
 
 
 
+# ======================
+# Landlord Stats Model
+# ======================
+class LandlordStats(models.Model):
+    """
+    Denormalized dashboard counters, one row per landlord. Kept current by
+    the Booking/Payment/Property signals in rentalapp/signals.py; run
+    ``manage.py rebuild_landlord_stats`` after bulk writes that skip signals.
+    """
+    landlord = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        primary_key=True, related_name="stats"
+    )
+    total_properties = models.IntegerField(default=0)
+    total_bookings = models.IntegerField(default=0)
+    pending_applications = models.IntegerField(default=0)
+    approved_bookings = models.IntegerField(default=0)
+    total_income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.landlord}"
+
+
+# ======================
+# Similar Properties (precomputed)
+# ======================
+class SimilarProperty(models.Model):
+    """
+    The nearest listings to ``property`` in rank order, rebuilt by
+    ``manage.py rebuild_similar_properties`` and refreshed per listing on
+    save (rentalapp/similar.py), so the detail page just reads them.
+    """
+    # No index of its own: the (property, rank) constraint leads with it
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="similar_links", db_index=False
+    )
+    # Indexed (as every ForeignKey): the lists that mention a listing are
+    # refreshed when it changes
+    similar = models.ForeignKey(Property, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    distance = models.FloatField()
+
+    class Meta:
+        constraints = [
+            # Also the index the detail page reads a property's list through
+            models.UniqueConstraint(fields=["property", "rank"], name="similar_property_rank_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} ~ {self.similar_id} (#{self.rank})"
+
+
+# ======================
+# Occupancy Timeline
+# ======================
+class OccupancyTimeline(models.Model):
+    """
+    One bit per day, set on the days an approved booking covers, starting at
+    ``start``: bit i of ``bits`` (little-endian) is ``start + i days``.
+    Rebuilt from the property's approved bookings whenever one of them
+    changes (rentalapp/occupancy.py); ``manage.py rebuild_occupancy`` after
+    bulk writes that skip signals.
+    """
+    property = models.OneToOneField(
+        Property, on_delete=models.CASCADE, primary_key=True, related_name="occupancy"
+    )
+    start = models.DateField()
+    bits = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Occupancy of {self.property_id} from {self.start}"
+
+
+# ======================
+# Import Checkpoint
+# ======================
+class ImportCheckpoint(models.Model):
+    """
+    The last row of a source file ``manage.py import_properties`` has
+    imported. Written in the same transaction as each batch, so a crash can
+    never leave it behind (or ahead of) the rows actually committed.
+    """
+    source = models.CharField(max_length=500, unique=True)
+    row = models.PositiveIntegerField(default=0)
+    inserted = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} up to row {self.row}"
+
+
+# ======================
+# Outbound Email (outbox)
+# ======================
+class OutboundEmail(models.Model):
+    """
+    Outgoing mail written by views instead of talking to SMTP in the request.
+    ``manage.py run_mail_worker`` drains it (see rentalapp/mail.py).
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("dead", "Dead"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker polls "pending and due", oldest first
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_status_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.status})"
+
+
 # ======================
 # Application Model
 # ======================
@@ -0,0 +1,151 @@
+# rentalapp/occupancy.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, OccupancyTimeline, Property
+
+
+# =========================
+# Occupancy timelines
+# =========================
+# Each property keeps a bitmap of the days an approved booking covers
+# (OccupancyTimeline). Stays are half-open like in rentalapp/availability.py:
+# the check-out day is not occupied. With the bitmap in hand, "how many
+# days of [a, b) was this property let" is a shift, a mask and a popcount
+# on a Python int, so a portfolio's occupancy over any window is one query
+# for the bitmaps plus arithmetic, however many bookings are behind them.
+#
+# Bookings only write the timeline of their own property, rebuilt from its
+# approved bookings (a handful of rows) whenever one of them changes status
+# or dates (rentalapp/signals.py).
+
+BATCH_SIZE = 2000
+
+
+def timeline_from_ranges(ranges):
+    """(start, bits) for [(start_date, end_date)] stays; (None, 0) if none is non-empty."""
+    ranges = [(begin, end) for begin, end in ranges if begin < end]
+    if not ranges:
+        return None, 0
+    start = min(begin for begin, _ in ranges)
+    bits = 0
+    for begin, end in ranges:
+        bits |= ((1 << (end - begin).days) - 1) << (begin - start).days
+    return start, bits
+
+
+def encode_bits(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def decode_bits(data):
+    return int.from_bytes(bytes(data or b""), "little")
+
+
+def occupied_days(start, bits, window_start, window_end):
+    """Days of [window_start, window_end) set in a timeline starting at ``start``."""
+    if start is None or not bits or window_start >= window_end:
+        return 0
+    # Align the window to the timeline; days before ``start`` are all free
+    low = max((window_start - start).days, 0)
+    high = (window_end - start).days
+    if high <= low:
+        return 0
+    return ((bits >> low) & ((1 << (high - low)) - 1)).bit_count()
+
+
+@transaction.atomic
+def rebuild_timeline(property_id):
+    """Recompute one property's timeline from its approved bookings."""
+    # Lock the property first: two rebuilds racing on it would otherwise both
+    # read the bookings, and the one that read them earlier could write last
+    if not Property.objects.select_for_update().filter(pk=property_id).exists():
+        return
+    ranges = Booking.objects.filter(property_id=property_id, status="approved").values_list(
+        "start_date", "end_date"
+    )
+    start, bits = timeline_from_ranges(ranges)
+    if start is None:
+        OccupancyTimeline.objects.filter(property_id=property_id).delete()
+    else:
+        OccupancyTimeline.objects.update_or_create(
+            property_id=property_id, defaults={"start": start, "bits": encode_bits(bits)}
+        )
+
+
+@transaction.atomic
+def rebuild_all_timelines(properties=None):
+    """
+    Rebuild every timeline (or those of ``properties``, a Property queryset)
+    from one pass over the approved bookings in property order. Returns how
+    many timelines were written.
+    """
+    bookings = Booking.objects.filter(status="approved")
+    timelines = OccupancyTimeline.objects.all()
+    if properties is not None:
+        bookings = bookings.filter(property__in=properties)
+        timelines = timelines.filter(property__in=properties)
+    timelines.delete()
+
+    written, batch = 0, []
+    current, ranges = None, []
+
+    def flush():
+        start, bits = timeline_from_ranges(ranges)
+        if start is not None:
+            batch.append(OccupancyTimeline(property_id=current, start=start, bits=encode_bits(bits)))
+
+    rows = bookings.order_by("property_id").values_list("property_id", "start_date", "end_date")
+    for property_id, begin, end in rows.iterator(chunk_size=BATCH_SIZE):
+        if property_id != current:
+            if current is not None:
+                flush()
+            current, ranges = property_id, []
+        ranges.append((begin, end))
+        if len(batch) >= BATCH_SIZE:
+            OccupancyTimeline.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if current is not None:
+        flush()
+    OccupancyTimeline.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+    return written + len(batch)
+
+
+def portfolio_occupancy(landlord, *windows):
+    """
+    For each (window_start, window_end) window, the percentage of the
+    landlord's property-days in it that were let. A property counts from
+    the day it was listed or first let, whichever is earlier, so new
+    listings do not drag the rate down for days they did not exist. One
+    query for any number of windows.
+    """
+    occupied = [0] * len(windows)
+    available = [0] * len(windows)
+    rows = Property.objects.filter(owner=landlord).values_list(
+        "created_at", "occupancy__start", "occupancy__bits"
+    )
+    for created_at, start, data in rows:
+        since = timezone.localtime(created_at).date()
+        if start is not None:
+            since = min(since, start)
+        bits = decode_bits(data)
+        for i, (window_start, window_end) in enumerate(windows):
+            listed_from = max(window_start, since)
+            if listed_from < window_end:
+                available[i] += (window_end - listed_from).days
+                occupied[i] += occupied_days(start, bits, listed_from, window_end)
+    return [
+        round(days / total * 100, 1) if total else 0.0
+        for days, total in zip(occupied, available)
+    ]
+
+
+def recent_occupancy(landlord, *days, today=None):
+    """portfolio_occupancy() over the last ``days`` days (today included), per count."""
+    today = today or timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+    return portfolio_occupancy(landlord, *[(tomorrow - timedelta(days=n), tomorrow) for n in days])
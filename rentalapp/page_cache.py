@@ -0,0 +1,137 @@
+# rentalapp/page_cache.py
+
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .routing import primary_reads
+
+
+# =========================
+# Anonymous full-page cache
+# =========================
+# Public pages are cached per normalized URL for anonymous visitors only.
+# Every key embeds the catalogue generation, a counter bumped on any
+# Property save/delete (rentalapp/signals.py), so a listing change makes all
+# cached pages unreachable at once instead of waiting for their timeout.
+# That needs the counter in a cache every worker shares (Redis), so the
+# page cache stays off unless settings.PAGE_CACHE_ENABLED.
+
+GENERATION_KEY = "catalogue:generation"
+HITS_KEY = "page_cache:hits"
+MISSES_KEY = "page_cache:misses"
+
+PAGE_CACHE_TIMEOUT = getattr(settings, "PAGE_CACHE_TIMEOUT", 300)
+
+
+def catalogue_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def bump_catalogue_generation():
+    try:
+        return cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key missing (first bump, or evicted): start a fresh generation
+        cache.add(GENERATION_KEY, 2, timeout=None)
+        return cache.get(GENERATION_KEY, 2)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def page_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "generation": catalogue_generation(),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 1) if total else 0.0,
+    }
+
+
+def reset_page_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def normalized_query(params):
+    """Sorted query string without empty values, so ?b=1&a= and ?b=1 share a key."""
+    items = sorted((key, value) for key in params for value in params.getlist(key) if value != "")
+    return urlencode(items)
+
+
+def page_cache_key(request):
+    url = f"{request.path}?{normalized_query(request.GET)}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+    return f"page:{catalogue_generation()}:{digest}"
+
+
+def _is_cacheable_request(request):
+    if not getattr(settings, "PAGE_CACHE_ENABLED", False):
+        return False
+    if request.method not in ("GET", "HEAD"):
+        return False
+    # Anyone with a session or pending flash messages may see personalised
+    # output (navbar, messages), so only truly cookie-less visitors qualify
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or "messages" in request.COOKIES:
+        return False
+    return not request.user.is_authenticated
+
+
+def _is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies or request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        # Rendered a CSRF token or set a cookie: never share it
+        return False
+    cache_control = response.get("Cache-Control", "")
+    return "private" not in cache_control and "no-store" not in cache_control
+
+
+def cache_public_page(view_func):
+    """Serve the view from the page cache for anonymous, cookie-less visitors."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _count(HITS_KEY)
+            content, content_type, headers = cached
+            response = HttpResponse(content, content_type=content_type)
+            for name, value in headers:
+                response[name] = value
+            response["X-Page-Cache"] = "HIT"
+            return response
+
+        _count(MISSES_KEY)
+        # What gets cached must be what the primary holds (rentalapp.routing)
+        with primary_reads():
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+        if _is_cacheable_response(request, response):
+            headers = [
+                (name, value) for name, value in response.items()
+                if name.lower() not in ("content-type", "content-length", "set-cookie")
+            ]
+            cache.set(key, (response.content, response["Content-Type"], headers), PAGE_CACHE_TIMEOUT)
+        response["X-Page-Cache"] = "MISS"
+        return response
+    return _wrapped_view
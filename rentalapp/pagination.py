@@ -0,0 +1,128 @@
+# rentalapp/pagination.py
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# =========================
+# Keyset (cursor) pagination
+# =========================
+# Pages are ordered descending on a tuple of keys, (created_at, id) by
+# default. The cursor holds the key values of the last row of the previous
+# page, so every page is a single indexed range scan and page 500 costs the
+# same as page 1 (no OFFSET).
+
+DEFAULT_PAGE_SIZE = getattr(settings, "PROPERTY_PAGE_SIZE", 12)
+MAX_PAGE_SIZE = getattr(settings, "PROPERTY_MAX_PAGE_SIZE", 60)
+DEFAULT_KEYS = ("created_at", "id")
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    has_more: bool = False
+    next_cursor: str = ""
+    page_size: int = DEFAULT_PAGE_SIZE
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _cursor_value(value):
+    # Full isoformat(): DjangoJSONEncoder cuts datetimes to milliseconds, and
+    # a truncated created_at would skip the rows between it and the real one
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot put {type(value).__name__} in a cursor")
+
+
+def _key_value(value):
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is not None:
+            return parsed
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), default=_cursor_value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, length):
+    """Return the list of key values in a cursor token, or None if it is invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    try:
+        return [_key_value(value) for value in values]
+    except ValueError:
+        # Looks like a datetime but is not a valid one
+        return None
+
+
+def parse_page_size(value, default=None):
+    default = default or DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _after_filter(keys, values):
+    # (k1, k2, k3) < (v1, v2, v3) spelled out for the ORM:
+    # k1 < v1 OR (k1 = v1 AND k2 < v2) OR (k1 = v1 AND k2 = v2 AND k3 < v3)
+    condition = Q()
+    for i, key in enumerate(keys):
+        step = Q(**{f"{key}__lt": values[i]})
+        for prev_key, prev_value in zip(keys[:i], values[:i]):
+            step &= Q(**{prev_key: prev_value})
+        condition |= step
+    return condition
+
+
+def keyset_paginate(queryset, after=None, page_size=None, keys=DEFAULT_KEYS):
+    """
+    Slice ``queryset`` into one page ordered descending on ``keys``.
+
+    ``after`` is the ``next_cursor`` of the previous page. An invalid or
+    missing cursor starts from the first page. The last key must be unique
+    (normally ``id``) so the order is total.
+    """
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    queryset = queryset.order_by(*[f"-{key}" for key in keys])
+
+    values = decode_cursor(after, len(keys))
+    if values:
+        queryset = queryset.filter(_after_filter(keys, values))
+
+    # Fetch one extra row to know whether another page exists
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+
+    next_cursor = ""
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, key) for key in keys)
+
+    return KeysetPage(items=items, has_more=has_more, next_cursor=next_cursor, page_size=page_size)
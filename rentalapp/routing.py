@@ -0,0 +1,128 @@
+# rentalapp/routing.py
+
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# =========================
+# Read replica routing
+# =========================
+# With DATABASE_REPLICA_URL set, settings add a "replica" alias next to
+# "default". Reads go to it only while a GET/HEAD request is handled by a
+# view marked @replica_reads (the browse pages and dashboards); everything
+# else reads and writes the primary, as before.
+#
+# A replica lags the primary, so reads fall back to the primary:
+#   - once the request has written anything (read-after-write),
+#   - inside a transaction, whose own rows only the primary connection sees,
+#   - for REPLICA_STICKY_SECONDS after a request that wrote, through the
+#     STICKY_COOKIE set on its response: the page a form redirects to must
+#     show what the form just saved.
+# Without a replica alias the router leaves every query on "default".
+#
+# Anything that fills a shared cache (the page cache, facet counts, market
+# stats, user snapshots) or writes what it read (LandlordStats) reads inside
+# primary_reads(): a lagging replica would otherwise store the old catalogue
+# under the new catalogue generation, for every visitor, until it expires.
+
+REPLICA_DB_ALIAS = "replica"
+STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD")
+
+
+@dataclass
+class RoutingState:
+    """How the request being handled may read."""
+    sticky: bool = False
+    replica_view: bool = False
+    wrote: bool = False
+
+    def reads_replica(self):
+        return self.replica_view and not (self.sticky or self.wrote)
+
+
+_current_state = contextvars.ContextVar("rentalapp_db_routing", default=None)
+_primary_only = contextvars.ContextVar("rentalapp_db_primary_only", default=False)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, whatever the request allows."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in connections.settings
+
+
+def _sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current_state.get()
+        if state is None or not state.reads_replica() or _primary_only.get() or not replica_configured():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _current_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db != REPLICA_DB_ALIAS
+
+
+class ReadReplicaMiddleware:
+    """Decides per request whether ReadReplicaRouter may use the replica."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(sticky=self._is_sticky(request))
+        token = _current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_state.reset(token)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            seconds = _sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time()) + seconds), max_age=seconds, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _current_state.get()
+        if state is not None:
+            state.replica_view = request.method in SAFE_METHODS and getattr(view_func, "replica_reads", False)
+
+    def _is_sticky(self, request):
+        try:
+            return int(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,128 @@
+# rentalapp/search.py
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+
+# =========================
+# Property full-text search
+# =========================
+# Every backend filters a Property queryset down to the rows matching ``q``
+# and annotates ``search_rank`` (higher is better), so the result can still be
+# combined with the district/rent/bedroom filters and keyset-paginated on
+# (search_rank, created_at, id) in a single query.
+#
+# The backend is picked from settings.PROPERTY_SEARCH_BACKEND (dotted path)
+# or, by default, from the database vendor.
+
+FTS_TABLE = "rentalapp_property_fts"
+SEARCH_CONFIG = "english"
+
+
+class SimpleSearchBackend:
+    """Fallback: unranked icontains over title, address and description."""
+
+    def search(self, queryset, q):
+        return queryset.filter(
+            Q(title__icontains=q) | Q(address__icontains=q) | Q(description__icontains=q)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def index(self, prop):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class PostgresSearchBackend(SimpleSearchBackend):
+    """
+    Uses the ``search_vector`` tsvector column (a stored generated column
+    with a GIN index, see migration 0013), so there is nothing to keep in
+    sync from Python.
+    """
+
+    def search(self, queryset, q):
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.annotate(
+            search_rank=RawSQL(
+                # ts_rank_cd() is a float4; as a double it compares equal to
+                # the rank a keyset cursor carries back as a JSON number
+                f"ts_rank_cd(rentalapp_property.search_vector, {tsquery})::double precision",
+                [q], output_field=FloatField(),
+            )
+        ).extra(where=[f"rentalapp_property.search_vector @@ {tsquery}"], params=[q])
+
+
+class SQLiteFTSSearchBackend(SimpleSearchBackend):
+    """
+    FTS5 shadow table keyed by the property id. It is kept in sync by the
+    Property post_save/post_delete signals (see rentalapp/signals.py).
+    """
+
+    def _match_expression(self, q):
+        # Quote every word so user input can never be parsed as FTS5 syntax;
+        # the trailing * makes each word a prefix match ("apart" -> apartment)
+        words = re.findall(r"\w+", q)
+        return " ".join(f'"{word}"*' for word in words)
+
+    def search(self, queryset, q):
+        match = self._match_expression(q)
+        if not match:
+            return queryset.none()
+        # bm25() is lower for better matches, so negate it for search_rank
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 1.0) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = rentalapp_property.id",
+                [match], output_field=FloatField(),
+            )
+        )
+
+    def index(self, prop):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [prop.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, address, description) VALUES (%s, %s, %s, %s)",
+                [prop.pk, prop.title, prop.address, prop.description or ""],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, address, description) "
+                f"SELECT id, title, address, COALESCE(description, '') FROM rentalapp_property"
+            )
+            return cursor.rowcount
+
+
+_backend = None
+
+
+def get_search_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "PROPERTY_SEARCH_BACKEND", None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == "postgresql":
+            _backend = PostgresSearchBackend()
+        elif connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names():
+            _backend = SQLiteFTSSearchBackend()
+        else:
+            _backend = SimpleSearchBackend()
+    return _backend
@@ -0,0 +1,240 @@
+# rentalapp/seeding.py
+
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    DISTRICT_CHOICES, PROPERTY_TYPE_CHOICES, Booking, CustomUser, LandlordStats, Maintenance, Payment, Property,
+)
+from .geo import centroids
+from .stats import COUNTER_FIELDS, compute_all_counters
+
+
+# =========================
+# Synthetic data
+# =========================
+# Everything is drawn from one random.Random(seed), so the same options give
+# the same rows. Properties are generated in chunks and each chunk's
+# bookings, payments and maintenance rows are built from the pks bulk_create
+# hands back, one transaction per chunk. All users share one password hash
+# computed up front: hashing per user would dominate the run.
+
+# Rough share of listings per district: the cities get most of them
+DISTRICT_WEIGHTS = {
+    "ernakulam": 22, "thiruvananthapuram": 18, "kozhikode": 12, "thrissur": 10,
+    "kollam": 6, "kottayam": 6, "kannur": 6, "malappuram": 5, "palakkad": 4,
+    "alappuzha": 4, "pathanamthitta": 2, "kasaragod": 2, "idukki": 2, "wayanad": 1,
+}
+CITY_DISTRICTS = {"ernakulam", "thiruvananthapuram", "kozhikode"}
+
+TYPE_WEIGHTS = {"apartment": 45, "house": 30, "studio": 15, "villa": 10}
+BEDROOMS = {"studio": (1, 1), "apartment": (1, 3), "house": (2, 4), "villa": (3, 5)}
+TYPE_RENT_FACTOR = {"studio": 0.8, "apartment": 1.0, "house": 1.15, "villa": 1.9}
+
+FIRST_NAMES = [
+    "Arjun", "Anjali", "Rahul", "Meera", "Vishnu", "Lakshmi", "Akhil", "Divya", "Nikhil", "Sneha",
+    "Arun", "Kavya", "Jithin", "Aparna", "Sreejith", "Reshma", "Fahad", "Ameena", "Joseph", "Mariya",
+]
+LAST_NAMES = [
+    "Nair", "Menon", "Pillai", "Kurup", "Varghese", "Thomas", "Kumar", "Das", "Rahman", "Joseph",
+    "Mathew", "Krishnan", "Panicker", "Iyer", "Haneef", "George",
+]
+TITLE_WORDS = ["Spacious", "Cosy", "Modern", "Sunny", "Quiet", "Furnished", "Family", "Lakeside", "Garden", "Premium"]
+ISSUES = {
+    "plumbing": ["Kitchen tap is leaking", "Bathroom drain is blocked", "Low water pressure upstairs"],
+    "electrical": ["Bedroom fan not working", "Frequent power trips", "Socket in hall sparks"],
+    "other": ["Front door lock is stiff", "Termites near the window", "Wall paint peeling in hall"],
+}
+
+DISTRICT_NAMES = dict(DISTRICT_CHOICES)
+TYPE_NAMES = dict(PROPERTY_TYPE_CHOICES)
+
+
+def _weighted(weights):
+    return list(weights), list(weights.values())
+
+
+def _month_starts(first, last):
+    """First days of every month from ``first``'s month to ``last``'s month."""
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+class Seeder:
+    def __init__(self, seed=1, prefix="seed", password="password123", months=24,
+                 bookings_per_property=4, maintenance_rate=0.3, batch_size=2000, today=None):
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.password_hash = make_password(password)
+        self.months = months
+        self.bookings_per_property = bookings_per_property
+        self.maintenance_rate = maintenance_rate
+        self.batch_size = batch_size
+        self.today = today or timezone.localdate()
+        self.counts = {"landlords": 0, "tenants": 0, "properties": 0, "bookings": 0, "payments": 0, "maintenance": 0}
+        self.districts, self.district_weights = _weighted(DISTRICT_WEIGHTS)
+        self.types, self.type_weights = _weighted(TYPE_WEIGHTS)
+
+    def email(self, role, i):
+        return f"{self.prefix}-{role}-{i}@example.com"
+
+    def existing_users(self):
+        return CustomUser.objects.filter(email__startswith=f"{self.prefix}-")
+
+    # -------------------------
+    # Users
+    # -------------------------
+    def create_users(self, role, count):
+        users = []
+        for i in range(count):
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            users.append(CustomUser(
+                email=self.email(role, i),
+                password=self.password_hash,
+                first_name=first,
+                last_name=last,
+                full_name=f"{first} {last}",
+                role=role,
+                phone_number=f"+91{self.rng.randint(7000000000, 9999999999)}",
+                district=self.rng.choices(self.districts, self.district_weights)[0],
+            ))
+        created = CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+        self.counts[f"{role}s"] += len(created)
+        return [user.pk for user in created]
+
+    # -------------------------
+    # Listings
+    # -------------------------
+    def build_property(self, owner_id):
+        rng = self.rng
+        district = rng.choices(self.districts, self.district_weights)[0]
+        property_type = rng.choices(self.types, self.type_weights)[0]
+        bedrooms = rng.randint(*BEDROOMS[property_type])
+        base = 9000 if district in CITY_DISTRICTS else 6000
+        rent = base * TYPE_RENT_FACTOR[property_type] * (0.6 + 0.45 * bedrooms) * rng.uniform(0.8, 1.3)
+        size = int((350 + 400 * bedrooms) * rng.uniform(0.85, 1.25))
+        # Spread listings around the district centre (about 8 km either way)
+        # rather than stacking them on the geocoder's centroid
+        lat, lng = centroids()[("district", district)]
+        return Property(
+            owner_id=owner_id,
+            title=f"{rng.choice(TITLE_WORDS)} {bedrooms}BHK {TYPE_NAMES[property_type]} in {DISTRICT_NAMES[district]}",
+            district=district,
+            address=f"{rng.randint(1, 250)}, Ward {rng.randint(1, 40)}, {DISTRICT_NAMES[district]}",
+            description=(
+                f"{TYPE_NAMES[property_type]} with {bedrooms} bedroom(s), {size} sq ft, "
+                f"close to schools and bus stops in {DISTRICT_NAMES[district]}."
+            ),
+            rent=Decimal(round(rent / 500) * 500),
+            bedrooms=bedrooms,
+            bathrooms=max(1, bedrooms - rng.randint(0, 1)),
+            size=size,
+            property_type=property_type,
+            available=rng.random() < 0.85,
+            latitude=round(lat + rng.gauss(0, 0.07), 6),
+            longitude=round(lng + rng.gauss(0, 0.07), 6),
+        )
+
+    def build_bookings(self, prop, tenant_ids):
+        """Back-to-back, never overlapping stays over the history window."""
+        rng = self.rng
+        cursor = self.today - timedelta(days=30 * self.months) + timedelta(days=rng.randint(0, 60))
+        count = max(0, int(rng.gauss(self.bookings_per_property, 1.5)))
+        bookings = []
+        for _ in range(count):
+            if cursor > self.today + timedelta(days=60):
+                break
+            length = rng.choice([90, 180, 180, 330, 365, 365])
+            start, end = cursor, cursor + timedelta(days=length)
+            if start > self.today:
+                status = rng.choice(["pending", "pending", "approved", "rejected"])
+            else:
+                status = rng.choices(["approved", "rejected", "cancelled"], [85, 10, 5])[0]
+            bookings.append(Booking(
+                property_id=prop.pk, user_id=rng.choice(tenant_ids),
+                start_date=start, end_date=end, status=status,
+            ))
+            # Turnover gap before the next tenant moves in
+            cursor = end + timedelta(days=rng.randint(0, 45))
+        return bookings
+
+    def build_payments(self, booking, rent):
+        """One rent payment per month of an approved stay, up to this month."""
+        if booking.status != "approved":
+            return []
+        payments = []
+        current_month = self.today.replace(day=1)
+        for month in _month_starts(booking.start_date, min(booking.end_date, self.today)):
+            if month == current_month:
+                status = self.rng.choices(["received", "pending"], [60, 40])[0]
+            else:
+                status = self.rng.choices(["received", "failed"], [97, 3])[0]
+            payments.append(Payment(
+                booking_id=booking.pk, amount=rent, status=status,
+                month=month, due_date=month + timedelta(days=7),
+            ))
+        return payments
+
+    def build_maintenance(self, booking):
+        if booking.status != "approved" or booking.start_date > self.today:
+            return []
+        rows = []
+        while self.rng.random() < self.maintenance_rate and len(rows) < 4:
+            category = self.rng.choice(list(ISSUES))
+            status = self.rng.choices(["completed", "in_progress", "pending"], [70, 15, 15])[0]
+            rows.append(Maintenance(
+                property_id=booking.property_id, tenant_id=booking.user_id,
+                issue=self.rng.choice(ISSUES[category]), category=category, status=status,
+                completed_at=self.completed_at(booking) if status == "completed" else None,
+            ))
+        return rows
+
+    def completed_at(self, booking):
+        """A moment during the stay, on or before ``today``."""
+        last = min(booking.end_date, self.today)
+        day = booking.start_date + timedelta(days=self.rng.randint(0, max((last - booking.start_date).days, 0)))
+        return timezone.make_aware(datetime.combine(day, time(self.rng.randint(9, 18), self.rng.randint(0, 59))))
+
+    def create_properties(self, count, landlord_ids, tenant_ids, progress=None):
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            with transaction.atomic():
+                properties = Property.objects.bulk_create(
+                    [self.build_property(self.rng.choice(landlord_ids)) for _ in range(size)]
+                )
+                bookings = []
+                for prop in properties:
+                    bookings.extend(self.build_bookings(prop, tenant_ids))
+                bookings = Booking.objects.bulk_create(bookings, batch_size=self.batch_size)
+
+                rents = {prop.pk: prop.rent for prop in properties}
+                payments, maintenance = [], []
+                for booking in bookings:
+                    payments.extend(self.build_payments(booking, rents[booking.property_id]))
+                    maintenance.extend(self.build_maintenance(booking))
+                Payment.objects.bulk_create(payments, batch_size=self.batch_size)
+                Maintenance.objects.bulk_create(maintenance, batch_size=self.batch_size)
+
+            self.counts["properties"] += len(properties)
+            self.counts["bookings"] += len(bookings)
+            self.counts["payments"] += len(payments)
+            self.counts["maintenance"] += len(maintenance)
+            if progress:
+                progress(self.counts)
+
+    def refresh_landlord_stats(self, landlord_ids):
+        """bulk_create skipped the LandlordStats signals: rebuild the rows once."""
+        counters = compute_all_counters()
+        empty = {field: 0 for field in COUNTER_FIELDS}
+        LandlordStats.objects.filter(landlord_id__in=landlord_ids).delete()
+        LandlordStats.objects.bulk_create(
+            [LandlordStats(landlord_id=pk, **counters.get(pk, empty)) for pk in landlord_ids],
+            batch_size=self.batch_size,
+        )
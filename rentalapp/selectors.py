@@ -0,0 +1,138 @@
+# rentalapp/selectors.py
+
+from .filters import apply_property_filters
+from .models import Booking, Maintenance, MaintenanceRequest, Payment, Property, SimilarProperty
+
+
+# =========================
+# Read-side querysets
+# =========================
+# Every list a view renders comes from here. Each selector declares the joins
+# its template walks (select_related) and the columns it never shows
+# (defer/only), so a page costs the same number of queries whatever the row
+# count. rentalapp/tests.py pins those counts.
+
+# Property columns a listing card never shows
+CARD_DEFERRED = ("description", "address")
+
+
+# -------------------------
+# Properties
+# -------------------------
+def property_cards(filters=None):
+    """Browse/search cards (property_list, home search)."""
+    return apply_property_filters(Property.objects.defer(*CARD_DEFERRED), filters or {})
+
+
+def featured_properties(limit=3):
+    return Property.objects.defer(*CARD_DEFERRED).order_by("-created_at", "-id")[:limit]
+
+
+def property_detail(pk=None):
+    """Detail page: the property plus its owner (shown on the page)."""
+    queryset = Property.objects.select_related("owner")
+    return queryset if pk is None else queryset.filter(pk=pk)
+
+
+def similar_properties(property_id, limit=6):
+    """
+    The detail page's "similar homes": the precomputed neighbour list
+    (rentalapp/similar.py), still-available listings only, in rank order.
+    One query on the (property, rank) index.
+    """
+    links = (
+        SimilarProperty.objects.filter(property_id=property_id, similar__available=True)
+        .select_related("similar")
+        .defer(*[f"similar__{name}" for name in CARD_DEFERRED])
+        .order_by("rank")[:limit]
+    )
+    return [link.similar for link in links]
+
+
+def landlord_properties(landlord):
+    """The landlord's "My Properties" table."""
+    return Property.objects.filter(owner=landlord).only(
+        "id", "owner_id", "title", "property_type", "district", "rent", "bedrooms", "created_at",
+    ).order_by("-created_at", "-id")
+
+
+# -------------------------
+# Tenant side
+# -------------------------
+def tenant_bookings(tenant, status=None):
+    """Booking cards with the property they are for."""
+    queryset = Booking.objects.filter(user=tenant).select_related("property").defer(
+        "property__description", "property__address",
+    )
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by("-id")
+
+
+def tenant_applications(tenant):
+    return tenant_bookings(tenant).exclude(status="cancelled")
+
+
+def tenant_current_booking(tenant, status=None):
+    """
+    Approved booking, else pending one, with property and landlord. With
+    ``status``, only a booking in that status (the async overview looks up
+    both at once).
+    """
+    queryset = Booking.objects.filter(user=tenant).select_related("property__owner")
+    if status:
+        return queryset.filter(status=status).first()
+    return (
+        queryset.filter(status="approved").first()
+        or queryset.filter(status="pending").first()
+    )
+
+
+def tenant_payments(tenant, status=None):
+    """Payment history rows show the property title and its landlord."""
+    queryset = Payment.objects.filter(booking__user=tenant).select_related(
+        "booking__property__owner"
+    ).defer("booking__property__description")
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset.order_by("-date")
+
+
+def tenant_maintenance(tenant):
+    return Maintenance.objects.filter(tenant=tenant).order_by("-created_at")
+
+
+# -------------------------
+# Landlord side
+# -------------------------
+def landlord_bookings(landlord, status=None):
+    """Booking/application rows show the tenant name and property title."""
+    queryset = Booking.objects.filter(property__owner=landlord).select_related(
+        "user", "property"
+    ).defer("property__description")
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def landlord_applications(landlord, status=None):
+    return landlord_bookings(landlord, status=status).order_by("-created_at")
+
+
+def landlord_payments(landlord):
+    """Payment rows show the tenant name and property title."""
+    return Payment.objects.filter(booking__property__owner=landlord).select_related(
+        "booking__user", "booking__property"
+    ).defer("booking__property__description").order_by("-date")
+
+
+def landlord_maintenance(landlord):
+    return Maintenance.objects.filter(property__owner=landlord).select_related(
+        "tenant", "property"
+    ).defer("property__description").order_by("-created_at")
+
+
+def landlord_maintenance_requests(landlord):
+    return MaintenanceRequest.objects.filter(property__owner=landlord).select_related(
+        "tenant", "property"
+    ).defer("property__description").order_by("-created_at")
@@ -0,0 +1,320 @@
+# rentalapp/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import comparables
+from .auth import invalidate_user
+from .geo import fill_coordinates
+from .models import Booking, CustomUser, Payment, Property
+from .images import needs_variants, schedule_variants
+from .market import bump_market_version
+from .occupancy import rebuild_timeline
+from .page_cache import bump_catalogue_generation
+from .search import get_search_backend
+from .similar import pointing_at, schedule_refresh
+from .stats import apply_deltas, booking_contribution, payment_contribution, property_contribution
+
+
+# =========================
+# Search index sync
+# =========================
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Property)
+def unindex_property(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# =========================
+# Comparable-listing feature matrix
+# =========================
+# The matrix lives in process memory, so it only follows committed changes
+@receiver(post_save, sender=Property)
+def update_feature_row(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: comparables.property_saved(instance))
+
+
+@receiver(post_delete, sender=Property)
+def drop_feature_row(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: comparables.property_deleted(pk))
+
+
+# =========================
+# Similar properties
+# =========================
+# Connected before property_stats_on_save, so the post_init snapshot still
+# holds the old features: saves that leave them alone refresh nothing
+SIMILARITY_FIELDS = ("district", "property_type", "bedrooms", "bathrooms", "size")
+
+
+@receiver(post_save, sender=Property)
+def refresh_similar_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old, new = instance._stats_snapshot, _snapshot(instance)
+    if created or any(old[name] != new[name] for name in SIMILARITY_FIELDS):
+        schedule_refresh(changed=[instance.pk])
+
+
+@receiver(pre_delete, sender=Property)
+def refresh_similar_on_delete(sender, instance, **kwargs):
+    # The cascade drops the links to this listing; the lists that had them
+    # are recomputed once it is gone
+    stale = pointing_at(instance.pk)
+    if stale:
+        schedule_refresh(stale=stale)
+
+
+# =========================
+# Market rent stats
+# =========================
+# Also connected before property_stats_on_save. Only the fields the stats
+# are computed from move the market version; bookings never do
+MARKET_FIELDS = ("rent", "size", "bedrooms", "district", "property_type")
+
+
+@receiver(post_save, sender=Property)
+def bump_market_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old, new = instance._stats_snapshot, _snapshot(instance)
+    if created or any(old[name] != new[name] for name in MARKET_FIELDS):
+        transaction.on_commit(bump_market_version)
+
+
+@receiver(post_delete, sender=Property)
+def bump_market_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(bump_market_version)
+
+
+# =========================
+# Geocoding
+# =========================
+@receiver(pre_save, sender=Property)
+def geocode_property(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    fill_coordinates(instance)
+
+
+# =========================
+# Image variants
+# =========================
+@receiver(post_save, sender=Property)
+def queue_image_variants(sender, instance, raw=False, **kwargs):
+    if raw or "image" in instance.get_deferred_fields():
+        return
+    if needs_variants(instance):
+        schedule_variants(instance.pk)
+
+
+# =========================
+# Page cache invalidation
+# =========================
+# Bumped once the change commits: bumped earlier, a concurrent request could
+# still read the old rows and cache them under the new generation
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def bump_page_cache_generation(sender, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(bump_catalogue_generation)
+
+
+# Approved bookings decide check_in/check_out browse results. Connected before
+# booking_stats_on_save, so the post_init snapshot still holds the old status.
+@receiver(post_save, sender=Booking)
+def bump_page_cache_on_booking_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_status = None if created else instance._stats_snapshot["status"]
+    if "approved" in (old_status, instance.status) and (created or old_status != instance.status):
+        transaction.on_commit(bump_catalogue_generation)
+
+
+@receiver(post_delete, sender=Booking)
+def bump_page_cache_on_booking_delete(sender, instance, **kwargs):
+    if instance.status == "approved":
+        transaction.on_commit(bump_catalogue_generation)
+
+
+# =========================
+# Occupancy timelines
+# =========================
+# Connected before booking_stats_on_save, so the post_init snapshot still
+# holds the old status, dates and property. The rebuild waits for the
+# commit: inside a Property delete cascade the timeline row may already be
+# gone, and rebuilding it there would point it at a deleted property.
+def _property_of_booking(booking_id):
+    return Booking.objects.filter(pk=booking_id).values_list("property_id", flat=True).first()
+
+
+def _schedule_timeline(property_id):
+    if property_id:
+        transaction.on_commit(lambda: rebuild_timeline(property_id))
+
+
+@receiver(post_save, sender=Booking)
+def update_occupancy_on_booking_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Only what is loaded counts: a field deferred before and after the save
+    # is None on both sides, so it is unchanged and never fetched
+    new = _snapshot(instance)
+    old = new if created else instance._stats_snapshot
+    statuses = {old["status"], new["status"]}
+    if "approved" not in statuses and None not in statuses:
+        return
+    if created or old != new:
+        property_id = new["property_id"] or old["property_id"] or _property_of_booking(instance.pk)
+        _schedule_timeline(property_id)
+        if old["property_id"] and old["property_id"] != property_id:
+            _schedule_timeline(old["property_id"])
+
+
+@receiver(post_delete, sender=Booking)
+def update_occupancy_on_booking_delete(sender, instance, **kwargs):
+    if instance.status == "approved":
+        _schedule_timeline(instance.property_id)
+
+
+# =========================
+# Landlord stats
+# =========================
+# post_init snapshots the fields each model contributes to LandlordStats
+# (plus the similarity features of a Property, see above), so post_save can
+# apply the difference without re-reading the old row. Values
+# are read from __dict__ so deferred fields are never fetched.
+TRACKED_FIELDS = {
+    Property: ("owner_id", "rent") + SIMILARITY_FIELDS,
+    Booking: ("property_id", "status", "start_date", "end_date"),
+    Payment: ("booking_id", "status", "amount"),
+}
+
+
+def _snapshot(instance):
+    return {name: instance.__dict__.get(name) for name in TRACKED_FIELDS[type(instance)]}
+
+
+def _owner_of_property(property_id):
+    if not property_id:
+        return None
+    return Property.objects.filter(pk=property_id).values_list("owner_id", flat=True).first()
+
+
+def _owner_of_booking(booking_id):
+    if not booking_id:
+        return None
+    return Booking.objects.filter(pk=booking_id).values_list("property__owner_id", flat=True).first()
+
+
+def _negate(deltas):
+    return {field: -delta for field, delta in deltas.items()}
+
+
+def _apply_change(old_owner, old_deltas, new_owner, new_deltas):
+    if old_owner == new_owner:
+        merged = dict(new_deltas)
+        for field, delta in old_deltas.items():
+            merged[field] = merged.get(field, 0) - delta
+        apply_deltas(new_owner, merged)
+    else:
+        apply_deltas(old_owner, _negate(old_deltas))
+        apply_deltas(new_owner, new_deltas)
+
+
+@receiver(post_init, sender=Property)
+@receiver(post_init, sender=Booking)
+@receiver(post_init, sender=Payment)
+def remember_tracked_fields(sender, instance, **kwargs):
+    instance._stats_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=Property)
+def property_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = instance._stats_snapshot
+    if created:
+        apply_deltas(instance.owner_id, {"total_properties": 1})
+    elif old["owner_id"] != instance.owner_id:
+        # The listing's bookings and income move to the new owner with it
+        contribution = property_contribution(instance.pk)
+        _apply_change(old["owner_id"], contribution, instance.owner_id, contribution)
+    instance._stats_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=Booking)
+def booking_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = instance._stats_snapshot
+    new_owner = _owner_of_property(instance.property_id)
+    new_deltas = booking_contribution(instance.status)
+    if created:
+        apply_deltas(new_owner, new_deltas)
+    elif (old["property_id"], old["status"]) != (instance.property_id, instance.status):
+        old_owner = new_owner if old["property_id"] == instance.property_id else _owner_of_property(old["property_id"])
+        _apply_change(old_owner, booking_contribution(old["status"]), new_owner, new_deltas)
+    instance._stats_snapshot = _snapshot(instance)
+
+
+@receiver(post_save, sender=Payment)
+def payment_stats_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = instance._stats_snapshot
+    new_deltas = payment_contribution(instance.status, instance.amount)
+    if created:
+        if new_deltas["total_income"]:
+            apply_deltas(_owner_of_booking(instance.booking_id), new_deltas)
+    elif (old["booking_id"], old["status"], old["amount"]) != (instance.booking_id, instance.status, instance.amount):
+        new_owner = _owner_of_booking(instance.booking_id)
+        old_owner = new_owner if old["booking_id"] == instance.booking_id else _owner_of_booking(old["booking_id"])
+        _apply_change(old_owner, payment_contribution(old["status"], old["amount"]), new_owner, new_deltas)
+    instance._stats_snapshot = _snapshot(instance)
+
+
+# On cascades (deleting a property) Django deletes payments, then bookings,
+# then the property, so the parent rows still exist when these run.
+@receiver(post_delete, sender=Property)
+def property_stats_on_delete(sender, instance, **kwargs):
+    apply_deltas(instance.owner_id, {"total_properties": -1})
+
+
+@receiver(post_delete, sender=Booking)
+def booking_stats_on_delete(sender, instance, **kwargs):
+    apply_deltas(_owner_of_property(instance.property_id), _negate(booking_contribution(instance.status)))
+
+
+@receiver(post_delete, sender=Payment)
+def payment_stats_on_delete(sender, instance, **kwargs):
+    deltas = payment_contribution(instance.status, instance.amount)
+    if deltas["total_income"]:
+        apply_deltas(_owner_of_booking(instance.booking_id), _negate(deltas))
+
+
+# =========================
+# Cached user snapshots
+# =========================
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_snapshot(sender, instance, update_fields=None, **kwargs):
+    # Logging in only stamps last_login, which the snapshot does not hold
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=CustomUser)
+def drop_user_snapshot(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
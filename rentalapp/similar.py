@@ -0,0 +1,302 @@
+# rentalapp/similar.py
+
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .comparables import _fetch_table, encode, fit_scale
+from .models import Property, SimilarProperty
+
+
+# =========================
+# Similar properties (precomputed neighbour lists)
+# =========================
+# property_detail shows the SIMILAR_COUNT listings nearest each property,
+# read from SimilarProperty in one indexed query. The lists are computed
+# here per block, the listings sharing a district and property type: a
+# block is read into NumPy once, standardized on its own bedrooms,
+# bathrooms and size (the feature encoding of rentalapp/comparables.py),
+# and its rows are ranked chunk by chunk with one matrix product each, so
+# memory stays at MAX_SCORES floats however large the block.
+#
+# rebuild_similar_properties walks every block and records its scale. A
+# saved or deleted listing refreshes only its own list, the lists that
+# mention it, and those it is now nearer to than their last neighbour
+# (reverse_neighbours(); nearest neighbours are not symmetric), ranked on
+# the recorded scale: both paths give the same lists until the next
+# rebuild refits the scale. That reads and ranks the whole block (0.5 s
+# for the largest seeded one), so it runs on one background thread after
+# commit, like the image variants.
+#
+# bulk_create/COPY imports and the seeder skip the signals and call
+# refresh_after_bulk_insert(): a few thousand new listings are refreshed
+# like saves, more than that rebuild the blocks they landed in (on 500k
+# listings a 1,000-row refresh took 35 s, rebuilding every block 296 s).
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_COUNT = 6
+# Properties written per transaction, and the most distances held at once
+CHUNK_SIZE = 1000
+MAX_SCORES = 8_000_000
+# Above this many bulk-inserted listings, rebuilding their blocks is faster
+BULK_REFRESH_LIMIT = 2000
+
+
+def _block_table(district, property_type):
+    return _fetch_table(Property.objects.filter(district=district, property_type=property_type))
+
+
+def _scale_key(district, property_type):
+    return f"similar:scale:{district}:{property_type}"
+
+
+def block_scale(district, property_type, table):
+    """
+    The standardization of the block's last full rebuild, so incremental
+    refreshes rank on the same scale as the lists they sit next to. Refit
+    from ``table`` when the cache lost it.
+    """
+    scale = cache.get(_scale_key(district, property_type))
+    if scale is None:
+        return fit_scale(table)
+    mean, std = scale
+    return np.array(mean), np.array(std)
+
+
+def _encode_block(table, scale):
+    return encode(
+        table["district"], table["property_type"], table["bedrooms"], table["bathrooms"], table["size"], scale,
+    )
+
+
+def _distinct_vectors(table, vectors):
+    """(distinct feature vectors, index of each row's vector among them)."""
+    # Within a block the features are bedrooms, bathrooms and size: pack
+    # them into one int64 (np.unique(vectors, axis=0) is 50x slower)
+    keys = (
+        table["bedrooms"].clip(0, 0x7FFF) << 48
+        | table["bathrooms"].clip(0, 0xFFFF) << 32
+        | table["size"].clip(0, 0xFFFFFFFF)
+    )
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return vectors[first], inverse
+
+
+def _ranked_candidates(ids, distinct, inverse, wanted, k):
+    """
+    {distinct vector: [(squared distance, id)]} for the ``wanted`` vectors:
+    the k + 1 nearest listings, the vector's own members included.
+    """
+    # The k + 1 lowest ids per distinct vector are all a list can need
+    by_vector = np.lexsort((ids, inverse))
+    starts = np.searchsorted(inverse[by_vector], np.arange(len(distinct)))
+    ends = np.append(starts[1:], len(by_vector))
+    members = [ids[by_vector[start:min(end, start + k + 1)]].tolist() for start, end in zip(starts, ends)]
+
+    norms = np.einsum("ij,ij->i", distinct, distinct)
+    take = min(k + 1, len(distinct))
+    step = max(1, min(CHUNK_SIZE, MAX_SCORES // len(distinct)))
+    candidates = {}
+    for start in range(0, len(wanted), step):
+        chunk = wanted[start:start + step]
+        # |x - y|^2 for every distinct vector x in the chunk against all y
+        scores = norms[chunk][:, None] + norms[None, :] - 2 * (distinct[chunk] @ distinct.T)
+        nearest = np.argpartition(scores, take - 1, axis=1)[:, :take]
+        for row, vector in enumerate(chunk.tolist()):
+            # k + 1 nearest vectors hold at least k listings besides any one
+            ranked = sorted(
+                (max(float(scores[row, other]), 0.0), pk)
+                for other in nearest[row].tolist()
+                for pk in members[other]
+            )
+            candidates[vector] = ranked[:k + 1]
+    return candidates
+
+
+def rank_neighbours(table, vectors, positions, k=SIMILAR_COUNT):
+    """
+    {id: [(similar_id, distance)]} for the block rows at ``positions``,
+    nearest first, ties broken by id so reruns write identical lists.
+
+    Listings with identical features have identical neighbours, so only the
+    distinct feature vectors are ranked against each other and the lists
+    are expanded to listings afterwards. Catalogues are full of repeated
+    bedroom/bathroom/size combinations; on 500k seeded listings this cut
+    the largest block (50k rows, 2.5k distinct vectors) from 26 s to 0.5 s.
+    """
+    ids = table["id"]
+    distinct, inverse = _distinct_vectors(table, vectors)
+    wanted = np.unique(inverse[np.asarray(positions, dtype=np.intp)])
+    candidates = _ranked_candidates(ids, distinct, inverse, wanted, k)
+
+    result = {}
+    for position in positions:
+        pk = int(ids[position])
+        result[pk] = [
+            (similar_id, float(np.sqrt(distance)))
+            for distance, similar_id in candidates[inverse[position]]
+            if similar_id != pk
+        ][:k]
+    return result
+
+
+def reverse_neighbours(table, vectors, positions, k=SIMILAR_COUNT):
+    """
+    Positions of the block rows whose list the rows at ``positions`` may
+    belong in: rows nearer to one of them than to their own k-th neighbour.
+    Nearest neighbours are not symmetric, so a listing alone in a sparse
+    corner can gain a new listing that has k nearer ones of its own.
+
+    Conservative: a row's (k + 1)-th candidate bounds its k-th neighbour,
+    so a few lists more than needed may be recomputed, never fewer.
+    """
+    positions = np.asarray(positions, dtype=np.intp)
+    if not len(positions):
+        return np.empty(0, dtype=np.intp)
+    distinct, inverse = _distinct_vectors(table, vectors)
+    candidates = _ranked_candidates(table["id"], distinct, inverse, np.arange(len(distinct)), k)
+    bound = np.array([
+        candidates[vector][k][0] if len(candidates[vector]) > k else np.inf
+        for vector in range(len(distinct))
+    ])
+
+    # One product: distance from each moved vector to every distinct vector
+    targets = distinct[np.unique(inverse[positions])]
+    norms = np.einsum("ij,ij->i", distinct, distinct)
+    scores = np.einsum("ij,ij->i", targets, targets)[:, None] + norms[None, :] - 2 * (targets @ distinct.T)
+    # float32 rounding differs between the two products: err towards more
+    near = (np.maximum(scores, 0) <= bound[None, :] + 1e-4).any(axis=0)
+    return np.flatnonzero(near[inverse])
+
+
+def write_lists(lists):
+    """Replace the SimilarProperty rows of every property in ``lists``."""
+    rows = [
+        SimilarProperty(property_id=pk, similar_id=similar_id, rank=rank, distance=round(distance, 4))
+        for pk, neighbours in lists.items()
+        for rank, (similar_id, distance) in enumerate(neighbours, start=1)
+    ]
+    with transaction.atomic():
+        SimilarProperty.objects.filter(property_id__in=list(lists)).delete()
+        SimilarProperty.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_block(district, property_type):
+    """Recompute every list in one block. Returns (properties, links written)."""
+    table = _block_table(district, property_type)
+    if not len(table):
+        return 0, 0
+    scale = fit_scale(table)
+    cache.set(_scale_key(district, property_type), tuple(part.tolist() for part in scale), None)
+    lists = rank_neighbours(table, _encode_block(table, scale), np.arange(len(table)))
+    written = 0
+    # One transaction per chunk keeps the write lock short on SQLite
+    pks = list(lists)
+    for start in range(0, len(pks), CHUNK_SIZE):
+        written += write_lists({pk: lists[pk] for pk in pks[start:start + CHUNK_SIZE]})
+    return len(table), written
+
+
+def blocks():
+    """Every (district, property_type) pair that has listings."""
+    return list(
+        Property.objects.order_by("district", "property_type")
+        .values_list("district", "property_type").distinct()
+    )
+
+
+def refresh_similar(changed=(), stale=()):
+    """
+    Recompute the lists of the ``changed`` listings, of every listing whose
+    list mentions one of them or may now (reverse_neighbours()), and of the
+    ``stale`` ones (the lists that pointed at a deleted listing). Returns
+    how many were written.
+    """
+    changed = set(changed)
+    affected = changed | set(stale) | set(
+        SimilarProperty.objects.filter(similar_id__in=changed).values_list("property_id", flat=True)
+    )
+    by_block = defaultdict(set)
+    for pk, district, property_type in Property.objects.filter(pk__in=affected).values_list(
+        "pk", "district", "property_type"
+    ):
+        by_block[(district, property_type)].add(pk)
+
+    lists = {}
+    for (district, property_type), pks in by_block.items():
+        table = _block_table(district, property_type)
+        vectors = _encode_block(table, block_scale(district, property_type, table))
+        position_of = {pk: i for i, pk in enumerate(table["id"].tolist())}
+        positions = {position_of[pk] for pk in pks if pk in position_of}
+
+        # A changed listing may now belong in other lists too, not only in
+        # those of its own neighbours
+        moved = [position_of[pk] for pk in pks & changed if pk in position_of]
+        positions.update(reverse_neighbours(table, vectors, moved).tolist())
+        lists.update(rank_neighbours(table, vectors, sorted(positions)))
+
+    if lists:
+        write_lists(lists)
+    return len(lists)
+
+
+def refresh_after_bulk_insert(rows):
+    """
+    Lists for listings inserted without the Property signals, given as
+    (pk, district, property_type); pk is None where COPY returned none.
+    Returns how many lists were written.
+    """
+    rows = list(rows)
+    ids = [pk for pk, _, _ in rows if pk is not None]
+    if len(ids) == len(rows) and len(ids) <= BULK_REFRESH_LIMIT:
+        return refresh_similar(changed=ids)
+    # Lists only ever hold listings of their own block
+    return sum(rebuild_block(district, property_type)[0] for district, property_type in {
+        (district, property_type) for _, district, property_type in rows
+    })
+
+
+def pointing_at(property_id):
+    """Ids of the listings whose lists mention ``property_id``."""
+    return list(SimilarProperty.objects.filter(similar_id=property_id).values_list("property_id", flat=True))
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One worker: refreshes of the same block never race each other
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="similar-homes")
+    return _executor
+
+
+def _refresh_in_worker(changed, stale):
+    close_old_connections()
+    try:
+        return refresh_similar(changed=changed, stale=stale)
+    except Exception:
+        logger.exception("Could not refresh similar homes for %s / %s", changed, stale)
+    finally:
+        close_old_connections()
+
+
+def schedule_refresh(changed=(), stale=()):
+    """Queue refresh_similar() once the current transaction commits."""
+    changed, stale = list(changed), list(stale)
+    if getattr(settings, "SIMILAR_REFRESH_ASYNC", True):
+        transaction.on_commit(lambda: get_executor().submit(_refresh_in_worker, changed, stale))
+    else:
+        transaction.on_commit(lambda: refresh_similar(changed=changed, stale=stale))
+
@@ -0,0 +1,152 @@
+# rentalapp/stats.py
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Booking, LandlordStats, Payment, Property
+from .routing import primary_reads
+
+
+# =========================
+# Landlord dashboard stats
+# =========================
+# LandlordStats rows are maintained with F() deltas from signals, so the
+# dashboard reads its counters with one primary-key lookup. The functions
+# below recompute rows from the source tables for the first read and for
+# the rebuild_landlord_stats command.
+
+COUNTER_FIELDS = [
+    "total_properties",
+    "total_bookings",
+    "pending_applications",
+    "approved_bookings",
+    "total_income",
+]
+
+
+def booking_contribution(status):
+    return {
+        "total_bookings": 1,
+        "pending_applications": 1 if status == "pending" else 0,
+        "approved_bookings": 1 if status == "approved" else 0,
+    }
+
+
+def payment_contribution(status, amount):
+    return {"total_income": Decimal(amount or 0) if status == "received" else Decimal(0)}
+
+
+def property_contribution(property_id):
+    """Everything one listing adds to its owner's counters, from the source tables."""
+    bookings = Booking.objects.filter(property_id=property_id).aggregate(
+        total=Count("id"),
+        pending=Count("id", filter=Q(status="pending")),
+        approved=Count("id", filter=Q(status="approved")),
+    )
+    income = Payment.objects.filter(booking__property_id=property_id, status="received").aggregate(
+        total=Sum("amount")
+    )["total"]
+    return {
+        "total_properties": 1,
+        "total_bookings": bookings["total"],
+        "pending_applications": bookings["pending"],
+        "approved_bookings": bookings["approved"],
+        "total_income": income or Decimal(0),
+    }
+
+
+def apply_deltas(landlord_id, deltas):
+    """Add ``deltas`` ({field: delta}) to a landlord's stats row atomically."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not landlord_id or not deltas:
+        return
+    with transaction.atomic():
+        updated = LandlordStats.objects.filter(landlord_id=landlord_id).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + delta for field, delta in deltas.items()},
+        )
+        if not updated:
+            # No row yet: build it from the source tables, which already
+            # include the change that triggered this call
+            recompute_landlord_stats(landlord_id)
+
+
+def compute_landlord_counters(landlord_id):
+    """Counter values for one landlord straight from the source tables."""
+    bookings = Booking.objects.filter(property__owner_id=landlord_id).aggregate(
+        total=Count("id"),
+        pending=Count("id", filter=Q(status="pending")),
+        approved=Count("id", filter=Q(status="approved")),
+    )
+    income = Payment.objects.filter(
+        booking__property__owner_id=landlord_id, status="received"
+    ).aggregate(total=Sum("amount"))["total"]
+
+    return {
+        "total_properties": Property.objects.filter(owner_id=landlord_id).count(),
+        "total_bookings": bookings["total"],
+        "pending_applications": bookings["pending"],
+        "approved_bookings": bookings["approved"],
+        "total_income": income or Decimal(0),
+    }
+
+
+def recompute_landlord_stats(landlord_id):
+    # Counted on the primary: a replica's counts would overwrite newer ones
+    with primary_reads():
+        stats, _ = LandlordStats.objects.update_or_create(
+            landlord_id=landlord_id, defaults=compute_landlord_counters(landlord_id)
+        )
+    return stats
+
+
+def get_landlord_stats(landlord):
+    """One query on the hot path; the row is built on the first visit."""
+    # From the primary, so a row the replica lacks is not rebuilt from it
+    with primary_reads():
+        stats = LandlordStats.objects.filter(landlord=landlord).first()
+    if stats is None:
+        stats = recompute_landlord_stats(landlord.pk)
+    return stats
+
+
+def compute_all_counters():
+    """
+    Counter values for every landlord with at least one property, using one
+    grouped query per source table instead of a query per landlord.
+    """
+    counters = {}
+
+    def row(landlord_id):
+        return counters.setdefault(landlord_id, {
+            "total_properties": 0,
+            "total_bookings": 0,
+            "pending_applications": 0,
+            "approved_bookings": 0,
+            "total_income": Decimal(0),
+        })
+
+    for item in Property.objects.values("owner_id").annotate(n=Count("id")).order_by():
+        row(item["owner_id"])["total_properties"] = item["n"]
+
+    bookings = Booking.objects.values("property__owner_id").annotate(
+        total=Count("id"),
+        pending=Count("id", filter=Q(status="pending")),
+        approved=Count("id", filter=Q(status="approved")),
+    ).order_by()
+    for item in bookings:
+        values = row(item["property__owner_id"])
+        values["total_bookings"] = item["total"]
+        values["pending_applications"] = item["pending"]
+        values["approved_bookings"] = item["approved"]
+
+    income = Payment.objects.filter(status="received").values(
+        "booking__property__owner_id"
+    ).annotate(total=Sum("amount")).order_by()
+    for item in income:
+        row(item["booking__property__owner_id"])["total_income"] = item["total"] or Decimal(0)
+
+    return counters
@@ -0,0 +1,54 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+# srcset candidates and the sizes hint for each place a property image is shown
+LAYOUTS = {
+    "card": (("card", "detail"), "(max-width: 768px) 100vw, 33vw"),
+    "detail": (("detail", "full"), "(max-width: 768px) 100vw, 50vw"),
+}
+
+
+def _srcset(variants, names, fmt):
+    candidates = []
+    for name in names:
+        variant = variants.get(name)
+        if variant and variant.get(fmt):
+            candidates.append(f"{default_storage.url(variant[fmt])} {variant['width']}w")
+    return ", ".join(candidates)
+
+
+@register.simple_tag
+def property_image(prop, layout="card", css_class="", style=""):
+    """
+    Responsive, lazily loaded <picture> for a property. Uses the WebP/JPEG
+    variants when they exist, otherwise the original upload.
+    Usage:
+        {% property_image property "card" "card-img-top" %}
+    """
+    if not prop.image:
+        return ""
+    names, sizes = LAYOUTS[layout]
+    alt = prop.title
+    loading = "eager" if layout == "detail" else "lazy"
+
+    variants = prop.image_variants or {}
+    if variants.get("source") != prop.image.name:
+        return format_html(
+            '<img src="{}" class="{}" style="{}" alt="{}" loading="{}" decoding="async">',
+            prop.image.url, css_class, style, alt, loading,
+        )
+
+    fallback = variants[names[0]]["jpeg"]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" style="{}" alt="{}" loading="{}" decoding="async">'
+        '</picture>',
+        _srcset(variants, names, "webp"), sizes,
+        default_storage.url(fallback), _srcset(variants, names, "jpeg"), sizes,
+        css_class, style, alt, loading,
+    )
@@ -1,3 +1,1357 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image as PILImage
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import auth, comparables, facets, geo, images, invoices, market, occupancy, routing, selectors, signals, similar
+from .benchmark import compare_runs
+from .decorators import query_budget
+from .filters import browse_ordering, clean_property_filters
+from .instrumentation import QueryBudgetExceeded, QueryInstrumentationMiddleware
+from .mail import MailWorkerPool, _claim, claim_batch, queue_email
+from .management.commands.benchmark_routes import Command as BenchmarkRoutesCommand
+from .page_cache import bump_catalogue_generation, cache_public_page, catalogue_generation
+from .pagination import decode_cursor, encode_cursor, keyset_paginate
+from .search import SQLiteFTSSearchBackend, get_search_backend
+from .templatetags.property_images import property_image
+from .stats import COUNTER_FIELDS, compute_landlord_counters, get_landlord_stats
+from .models import Booking, CustomUser, ImportCheckpoint, Maintenance, MaintenanceRequest, OccupancyTimeline, OutboundEmail, Payment, Property, SimilarProperty
+
+
+def make_rows(landlord, tenant, count):
+    """Create ``count`` properties, each with a booking, a payment and maintenance rows."""
+    for i in range(count):
+        prop = Property.objects.create(
+            owner=landlord, title=f"Home {i}", address="MG Road", description="x" * 200,
+            rent=10000 + i, property_type="apartment", district="ernakulam",
+        )
+        booking = Booking.objects.create(
+            property=prop, user=tenant, status="approved" if i % 2 else "pending",
+            start_date=date.today(), end_date=date.today() + timedelta(days=30),
+        )
+        Payment.objects.create(booking=booking, amount=prop.rent, status="received")
+        Maintenance.objects.create(property=prop, tenant=tenant, issue="Leaking tap")
+        MaintenanceRequest.objects.create(property=prop, tenant=tenant, title="Tap", description="Leaking")
+
+
+# =========================
+# Selectors: one query however many rows
+# =========================
+class SelectorQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(cls.landlord, cls.tenant, 6)
+
+    def assert_single_query(self, queryset, touch):
+        with self.assertNumQueries(1):
+            rows = list(queryset)
+            for row in rows:
+                touch(row)
+        self.assertEqual(len(rows), 6)
+
+    def test_property_cards(self):
+        self.assert_single_query(
+            selectors.property_cards({"district": "ernakulam"}),
+            lambda p: (p.title, p.get_district_display(), p.rent, p.image, p.available),
+        )
+
+    def test_property_cards_defer_description(self):
+        prop = selectors.property_cards().first()
+        self.assertIn("description", prop.get_deferred_fields())
+
+    def test_tenant_bookings(self):
+        self.assert_single_query(
+            selectors.tenant_bookings(self.tenant),
+            lambda b: (b.property.title, b.property.get_district_display(), b.property.rent, b.property.image),
+        )
+
+    def test_tenant_payments(self):
+        self.assert_single_query(
+            selectors.tenant_payments(self.tenant),
+            lambda p: (p.booking.property.title, p.booking.property.owner.first_name),
+        )
+
+    def test_landlord_bookings(self):
+        self.assert_single_query(
+            selectors.landlord_bookings(self.landlord),
+            lambda b: (b.user.full_name, b.property.title),
+        )
+
+    def test_landlord_applications(self):
+        self.assert_single_query(
+            selectors.landlord_applications(self.landlord),
+            lambda b: (b.user.full_name, b.property.title),
+        )
+
+    def test_landlord_payments(self):
+        self.assert_single_query(
+            selectors.landlord_payments(self.landlord),
+            lambda p: (p.booking.user.full_name, p.booking.property.title),
+        )
+
+    def test_landlord_maintenance(self):
+        self.assert_single_query(
+            selectors.landlord_maintenance(self.landlord),
+            lambda m: (m.tenant.first_name, m.property.title, m.get_category_display()),
+        )
+        self.assert_single_query(
+            selectors.landlord_maintenance_requests(self.landlord),
+            lambda m: (m.tenant.first_name, m.property.title),
+        )
+
+    def test_landlord_properties(self):
+        self.assert_single_query(
+            selectors.landlord_properties(self.landlord),
+            lambda p: (p.title, p.property_type, p.district, p.rent, p.bedrooms),
+        )
+
+
+# =========================
+# Views: query count does not grow with rows
+# =========================
+class ViewQueryCountTests(TestCase):
+    landlord_urls = [
+        reverse("landlord_dashboard"),
+        reverse("landlord_dashboard") + "?section=applications",
+        reverse("landlord_dashboard") + "?section=bookings",
+        reverse("landlord_dashboard") + "?section=payments",
+        reverse("landlord_dashboard") + "?section=maintenance",
+        reverse("landlord_dashboard") + "?section=my_properties",
+        reverse("payments"),
+        reverse("applications"),
+        reverse("bookings"),
+        reverse("maintenance"),
+    ]
+    tenant_urls = [
+        reverse("tenant_dashboard_overview"),
+        reverse("tenant_dashboard"),
+        reverse("tenant_bookings"),
+        reverse("tenant_applications"),
+        reverse("tenant_payments"),
+        reverse("tenant_maintenance"),
+    ]
+    public_urls = [
+        reverse("home"),
+        reverse("property_list"),
+    ]
+
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        self.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+
+    def query_counts(self, user, urls):
+        if user:
+            self.client.force_login(user)
+            # Warm the cached session and user snapshot
+            self.client.get(urls[0])
+        counts = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = len(ctx.captured_queries)
+        self.client.logout()
+        return counts
+
+    def assert_constant(self, user, urls):
+        # The page cache generation moves when the rows commit
+        with self.captureOnCommitCallbacks(execute=True):
+            make_rows(self.landlord, self.tenant, 2)
+        few = self.query_counts(user, urls)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_rows(self.landlord, self.tenant, 8)
+        many = self.query_counts(user, urls)
+        self.assertEqual(few, many)
+
+    def test_landlord_views(self):
+        self.assert_constant(self.landlord, self.landlord_urls)
+
+    def test_tenant_views(self):
+        self.assert_constant(self.tenant, self.tenant_urls)
+
+    def test_public_views(self):
+        self.assert_constant(None, self.public_urls)
+
+
+# =========================
+# Request instrumentation
+# =========================
+class InstrumentationTests(TestCase):
+
+    def test_server_timing_reports_queries_db_and_template_time(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("property_list"))
+        match = re.fullmatch(
+            r'db;dur=(\d+\.\d);desc="(\d+) queries", tpl;dur=(\d+\.\d), total;dur=(\d+\.\d)',
+            response["Server-Timing"],
+        )
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertEqual(int(match[2]), len(queries))
+        self.assertGreater(float(match[3]), 0)
+        self.assertGreaterEqual(float(match[4]), float(match[3]))
+
+    def test_slow_requests_log_one_json_warning(self):
+        url = reverse("about")
+        with override_settings(SLOW_REQUEST_MS=0), self.assertLogs("rentalapp.instrumentation", "WARNING") as logs:
+            self.client.get(url)
+        [line] = logs.records
+        record = json.loads(line.getMessage())
+        self.assertEqual((record["event"], record["path"], record["view"], record["status"]),
+                         ("slow_request", url, "about", 200))
+        self.assertEqual(set(record), {
+            "event", "method", "path", "view", "status", "queries", "db_ms", "template_ms", "total_ms",
+        })
+        with override_settings(SLOW_REQUEST_MS=60000), self.assertNoLogs("rentalapp.instrumentation", "WARNING"):
+            self.client.get(url)
+
+    def budget_request(self):
+        @query_budget(1)
+        def view(request):
+            list(CustomUser.objects.all())
+            list(Property.objects.all())
+            return HttpResponse("ok")
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = QueryInstrumentationMiddleware(get_response)
+        return middleware(RequestFactory().get("/budget/"))
+
+    def test_query_budget_raises_when_strict_and_warns_otherwise(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.budget_request()
+        with override_settings(QUERY_BUDGET_STRICT=False), \
+                self.assertLogs("rentalapp.instrumentation", "WARNING") as logs:
+            self.assertEqual(self.budget_request().status_code, 200)
+        self.assertIn("ran 2 queries (budget 1)", logs.output[-1])
+
+
+# =========================
+# Route benchmark comparison
+# =========================
+class BenchmarkCompareTests(TestCase):
+
+    def run_dicts(self):
+        def result(route, p95_ms, queries=3):
+            return {"route": route, "role": "anonymous", "p95_ms": p95_ms, "queries": queries}
+
+        base = {"results": [result("property_list", 10.0), result("about", 5.0)]}
+        head = {"results": [result("property_list", 15.0), result("about", 5.5)]}
+        return base, head
+
+    def write_run(self, run):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        with handle:
+            json.dump(run, handle)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_slowdown_over_threshold_is_flagged(self):
+        rows = compare_runs(*self.run_dicts(), threshold_pct=20.0)
+        self.assertEqual({row["route"]: row["regression"] for row in rows}, {"property_list": True, "about": False})
+        self.assertEqual(rows[0]["change_pct"], 50.0)
+
+    def test_compare_fails_the_command_on_regressions(self):
+        base, head = map(self.write_run, self.run_dicts())
+        with self.assertRaisesMessage(CommandError, "1 regressions"):
+            call_command("benchmark_routes", compare=[base, head], stdout=io.StringIO())
+        # From the shell (as CI runs it) the CommandError exits non-zero
+        command = BenchmarkRoutesCommand(stdout=io.StringIO(), stderr=io.StringIO())
+        with self.assertRaises(SystemExit) as exit:
+            command.run_from_argv(["manage.py", "benchmark_routes", "--compare", base, head])
+        self.assertEqual(exit.exception.code, 1)
+
+
+# =========================
+# Keyset pagination
+# =========================
+class KeysetPaginationTests(TestCase):
+
+    def test_pages_across_equal_and_sub_millisecond_timestamps(self):
+        landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        base = datetime(2026, 1, 1, 10, 0, 0, tzinfo=dt_timezone.utc)
+        # Bulk imports put many rows in the same millisecond, or the same microsecond
+        stamps = [base.replace(microsecond=us) for us in (123456, 123456, 123456, 123400, 123999, 123000, 0)]
+        for i, stamp in enumerate(stamps):
+            prop = Property.objects.create(
+                owner=landlord, title=f"Home {i}", address="MG Road", rent=10000,
+                property_type="apartment", district="ernakulam",
+            )
+            Property.objects.filter(pk=prop.pk).update(created_at=stamp)
+        expected = list(Property.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+        seen, after = [], None
+        for _ in range(len(stamps)):
+            page = keyset_paginate(Property.objects.all(), after=after, page_size=2)
+            seen += [prop.pk for prop in page]
+            if not page.has_more:
+                break
+            after = page.next_cursor
+        self.assertEqual(seen, expected)
+
+    def test_cursor_keeps_microseconds(self):
+        stamp = datetime(2026, 1, 1, 10, 0, 0, 123456, tzinfo=dt_timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor([stamp, 5]), 2), [stamp, 5])
+        self.assertIsNone(decode_cursor(encode_cursor(["2026-13-45T10:00:00", 5]), 2))
+
+
+# =========================
+# Full-text search
+# =========================
+class PropertySearchTests(TestCase):
+
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+
+    def add(self, title, description="", district="ernakulam"):
+        return Property.objects.create(
+            owner=self.landlord, title=title, address="MG Road", description=description, rent=10000,
+            property_type="apartment", district=district,
+        )
+
+    def search(self, **params):
+        filters = clean_property_filters(params)
+        return list(selectors.property_cards(filters).order_by("-search_rank", "-id").values_list("title", flat=True))
+
+    def test_sqlite_uses_the_fts_index(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+
+    def test_saves_and_deletes_update_the_index(self):
+        home = self.add("Lakeview penthouse")
+        self.assertEqual(self.search(q="penthouse"), ["Lakeview penthouse"])
+        home.title = "Lakeview cottage"
+        home.save()
+        self.assertEqual(self.search(q="penthouse"), [])
+        self.assertEqual(self.search(q="cottage"), ["Lakeview cottage"])
+        home.delete()
+        self.assertEqual(self.search(q="cottage"), [])
+
+    def test_title_matches_rank_first_and_filters_combine(self):
+        self.add("Metro view flat")
+        self.add("Metro side flat", district="thrissur")
+        # Newest, but only its description matches
+        self.add("Quiet flat", description="Walk to the metro station")
+        self.assertEqual(self.search(q="metro"), ["Metro side flat", "Metro view flat", "Quiet flat"])
+        self.assertEqual(self.search(q="metro", district="thrissur"), ["Metro side flat"])
+
+    def test_keyset_pages_through_tied_ranks(self):
+        for n in range(5):
+            self.add(f"Garden flat {n}")
+        filters = clean_property_filters({"q": "garden"})
+        keys = browse_ordering(filters)
+        expected = list(
+            selectors.property_cards(filters).order_by(*[f"-{key}" for key in keys]).values_list("pk", flat=True)
+        )
+        seen, after = [], None
+        for _ in range(5):
+            page = keyset_paginate(selectors.property_cards(filters), after=after, page_size=2, keys=keys)
+            seen += [prop.pk for prop in page]
+            if not page.has_more:
+                break
+            after = page.next_cursor
+        self.assertEqual(seen, expected)
+
+
+# =========================
+# Availability
+# =========================
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(cls.landlord, cls.tenant, 2)
+        # make_rows approves the second property's booking: today → +30 days
+        cls.booked = Property.objects.get(title="Home 1")
+        cls.free = Property.objects.get(title="Home 0")
+
+    def browse(self, check_in, check_out):
+        filters = clean_property_filters({"check_in": check_in.isoformat(), "check_out": check_out.isoformat()})
+        return set(selectors.property_cards(filters).values_list("title", flat=True))
+
+    def test_browse_excludes_overlapping_approved_bookings(self):
+        today = date.today()
+        self.assertEqual(self.browse(today + timedelta(days=10), today + timedelta(days=40)), {"Home 0"})
+        # Check-out day is free for the next stay
+        self.assertEqual(self.browse(today + timedelta(days=30), today + timedelta(days=40)), {"Home 0", "Home 1"})
+
+    def test_book_property_rejects_overlap(self):
+        self.client.force_login(self.tenant)
+        today = date.today()
+        for prop, expected in ((self.booked, 1), (self.free, 2)):
+            self.client.post(reverse("book_property", args=[prop.pk]), {
+                "start_date": today + timedelta(days=5), "end_date": today + timedelta(days=50),
+            })
+            self.assertEqual(Booking.objects.filter(property=prop).count(), expected)
+
+
+# =========================
+# Landlord exports
+# =========================
+class LandlordExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.other = CustomUser.objects.create_user(email="other@example.com", password="x", role="landlord")
+        cls.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(cls.landlord, cls.tenant, 3)
+        make_rows(cls.other, cls.tenant, 2)
+
+    def export(self, dataset, **params):
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse("landlord_export", args=[dataset]), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_is_scoped_to_landlord(self):
+        for dataset in ("payments", "bookings", "maintenance"):
+            lines = self.export(dataset).decode().splitlines()
+            self.assertEqual(len(lines), 1 + 3, dataset)
+
+    def test_gzip_jsonl_with_date_range(self):
+        body = gzip.decompress(self.export("bookings", format="jsonl", gzip="1"))
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual({row["tenant_email"] for row in rows}, {"tenant@example.com"})
+        self.assertEqual(len(rows), 3)
+
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        self.assertEqual(self.export("payments", **{"from": tomorrow}).decode().count("\n"), 1)
+
+
+# =========================
+# Property import
+# =========================
+class PropertyImportTests(TestCase):
+
+    def setUp(self):
+        CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        handle = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        with handle:
+            handle.write("title,address,district,property_type,rent,bedrooms,bathrooms,size\n")
+            for n in range(3):
+                handle.write(f"Flat {n},MG Road,ernakulam,apartment,{10000 + n},2,1,900\n")
+        self.path = handle.name
+        self.addCleanup(os.remove, self.path)
+        self.errors = io.StringIO()
+
+    def run_import(self):
+        call_command(
+            "import_properties", self.path, owner="landlord@example.com", batch_size=2,
+            stdout=io.StringIO(), stderr=self.errors,
+        )
+
+    def test_checkpoint_commits_with_each_batch(self):
+        self.run_import()
+        state = ImportCheckpoint.objects.get(source=os.path.abspath(self.path))
+        self.assertEqual((state.row, state.inserted), (4, 3), self.errors.getvalue())
+
+        # A re-run starts after the last committed row
+        self.run_import()
+        self.assertEqual(Property.objects.count(), 3)
+
+    def test_imported_listings_get_similar_lists(self):
+        self.run_import()
+        for prop in Property.objects.all():
+            self.assertEqual(SimilarProperty.objects.filter(property=prop).count(), 2)
+
+    def test_large_imports_rebuild_their_blocks(self):
+        with mock.patch("rentalapp.similar.BULK_REFRESH_LIMIT", 1):
+            self.run_import()
+        self.assertEqual(SimilarProperty.objects.count(), 6)
+
+
+# =========================
+# Rent invoices
+# =========================
+class RentInvoiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(cls.landlord, cls.tenant, 4)  # two approved bookings active this month
+
+    def test_generate_is_idempotent_and_pay_now_settles(self):
+        month = date.today().replace(day=1)
+        self.assertEqual(invoices.generate_invoices(month), (2, 0))
+        self.assertEqual(invoices.generate_invoices(month), (0, 0))
+
+        invoice = Payment.objects.filter(month=month, status="pending").first()
+        self.client.force_login(self.tenant)
+        self.assertContains(self.client.get(reverse("tenant_payments")), reverse("pay_now", args=[invoice.pk]))
+        self.client.post(reverse("make_payment", args=[invoice.booking_id]))
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, "received")
+        self.assertEqual(Payment.objects.filter(booking=invoice.booking_id, month=month).count(), 1)
+
+    def test_invoices_created_concurrently_count_as_skipped(self):
+        month = date.today().replace(day=1)
+        candidates = list(invoices.bookings_to_invoice(month))
+        # A tenant pays this month's rent before the run inserts its batch
+        Payment.objects.create(booking_id=candidates[0][0], amount=candidates[0][1], status="received", month=month)
+        batch = [
+            Payment(booking_id=booking_id, amount=rent, status="pending", month=month, due_date=month)
+            for booking_id, rent in candidates
+        ]
+        self.assertEqual(invoices._flush(batch, month, dry_run=False), 1)
+
+
+# =========================
+# Synthetic data
+# =========================
+class SeedDataTests(TestCase):
+
+    def test_every_date_follows_today(self):
+        today = date(2024, 3, 15)
+        call_command(
+            "seed_rental_data", landlords=2, tenants=5, properties=20, today="2024-03-15", stdout=io.StringIO(),
+        )
+        self.assertLessEqual(Payment.objects.latest("month").month, today)
+        self.assertGreater(Booking.objects.filter(start_date__lte=today, end_date__gt=today).count(), 0)
+        completed = Maintenance.objects.exclude(completed_at=None)
+        self.assertTrue(completed.exists())
+        self.assertLessEqual(timezone.localdate(completed.latest("completed_at").completed_at), today)
+
+
+# =========================
+# JSON property API
+# =========================
+class PropertyApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(cls.landlord, cls.tenant, 5)
+
+    def test_cursor_pages_and_filters(self):
+        url = reverse("api_property_list")
+        first = self.client.get(url, {"page_size": 3}).json()
+        self.assertEqual([card["title"] for card in first["results"]], ["Home 4", "Home 3", "Home 2"])
+        second = self.client.get(url, {"page_size": 3, "after": first["next_cursor"]}).json()
+        self.assertEqual([card["title"] for card in second["results"]], ["Home 1", "Home 0"])
+        self.assertIsNone(second["next_cursor"])
+
+        filtered = self.client.get(url, {"max_rent": "10001"}).json()
+        self.assertEqual({card["title"] for card in filtered["results"]}, {"Home 0", "Home 1"})
+
+    def test_if_none_match_gets_304_until_a_listing_changes(self):
+        url = reverse("api_property_list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f"W/{etag}").status_code, 304)
+
+        prop = Property.objects.get(title="Home 2")
+        prop.rent = 9000
+        prop.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+# =========================
+# Async dashboards
+# =========================
+class ConcurrentDashboardTests(TransactionTestCase):
+    databases = {"default", "replica"}
+    # Outside a test transaction the dashboard queries run on the pool threads
+
+    def test_dashboards_render_from_pool_threads(self):
+        landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(landlord, tenant, 3)
+
+        self.client.force_login(landlord)
+        response = self.client.get(reverse("landlord_dashboard"))
+        self.assertContains(response, "Home 2")  # a pending application
+        self.assertEqual(response.context["total_properties"], 3)
+        self.assertIn('desc="', response["Server-Timing"])
+
+        self.client.force_login(tenant)
+        response = self.client.get(reverse("tenant_dashboard_overview"))
+        self.assertEqual(response.context["applications_count"], 2)
+        self.assertEqual(response.context["active_booking"].status, "approved")
+
+
+# =========================
+# Landlord stats
+# =========================
+class LandlordStatsTests(TestCase):
+
+    def test_changing_owner_moves_bookings_and_income(self):
+        first = CustomUser.objects.create_user(email="first@example.com", password="x", role="landlord")
+        second = CustomUser.objects.create_user(email="second@example.com", password="x", role="landlord")
+        tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        make_rows(first, tenant, 3)
+        get_landlord_stats(second)
+
+        home = Property.objects.filter(owner=first).first()
+        home.owner = second
+        home.save()
+        for landlord in (first, second):
+            stats = get_landlord_stats(landlord)
+            self.assertEqual(
+                {field: getattr(stats, field) for field in COUNTER_FIELDS},
+                compute_landlord_counters(landlord.pk),
+            )
+        self.assertEqual(get_landlord_stats(second).total_bookings, 1)
+
+
+# =========================
+# Session and user caching
+# =========================
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        self.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        self.client.login(email="tenant@example.com", password="x")
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            q["sql"] for q in ctx.captured_queries
+            if 'FROM "django_session"' in q["sql"] or 'FROM "rentalapp_customuser"' in q["sql"]
+        ], response
+
+    def test_warm_requests_skip_session_and_user_lookups(self):
+        url = reverse("tenant_dashboard_overview")
+        self.auth_queries(url)
+        queries, response = self.auth_queries(url)
+        self.assertEqual(queries, [])
+        self.assertContains(response, "tenant@example.com")
+
+    def test_save_and_password_change_invalidate_snapshot(self):
+        url = reverse("tenant_dashboard_overview")
+        self.auth_queries(url)
+        self.tenant.first_name = "Meera"
+        self.tenant.save()
+        _, response = self.auth_queries(url)
+        self.assertEqual(response.wsgi_request.user.first_name, "Meera")
+
+        self.tenant.set_password("new")
+        self.tenant.save()
+        response = self.client.get(url)
+        self.assertRedirects(response, f"{reverse('login')}?next={url}", fetch_redirect_response=False)
+
+    def test_password_change_on_a_cached_user_moves_its_session_hash(self):
+        user = auth.user_from_snapshot(auth.user_snapshot(self.tenant))
+        old_hash = user.get_session_auth_hash()
+        user.set_password("new")
+        # update_session_auth_hash() stores this, so the session survives
+        self.assertNotEqual(user.get_session_auth_hash(), old_hash)
+
+
+# =========================
+# "Near" radius search
+# =========================
+class NearSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        for title, address, district in (
+            ("Kochi flat", "MG Road, Kochi 682011", "ernakulam"),
+            ("Aluva house", "Bank Road, Aluva 683 101", "ernakulam"),
+            ("Thrissur villa", "Round North", "thrissur"),
+        ):
+            Property.objects.create(
+                owner=landlord, title=title, address=address, district=district,
+                rent=10000, property_type="house",
+            )
+
+    def test_geocoded_on_save_from_pincode_then_district(self):
+        self.assertEqual(
+            Property.objects.get(title="Kochi flat").latitude,
+            geo.centroids()[("pincode", "682011")][0],
+        )
+        self.assertEqual(
+            Property.objects.get(title="Thrissur villa").latitude,
+            geo.centroids()[("district", "thrissur")][0],
+        )
+
+    def test_radius_search_sorted_by_distance(self):
+        response = self.client.get(reverse("api_property_list"), {"near": "682011", "radius": "25"})
+        results = response.json()["results"]
+        self.assertEqual([card["title"] for card in results], ["Kochi flat", "Aluva house"])
+        self.assertEqual(results[0]["distance_km"], 0)
+        self.assertLess(results[1]["distance_km"], 25)
+
+        # Cursor pages carry on from the last distance; Thrissur is beyond the 50 km cap
+        first = self.client.get(reverse("api_property_list"), {"near": "682011", "radius": "100", "page_size": 1}).json()
+        rest = self.client.get(reverse("api_property_list"), {
+            "near": "682011", "radius": "100", "page_size": 2, "after": first["next_cursor"],
+        }).json()
+        self.assertEqual([card["title"] for card in rest["results"]], ["Aluva house"])
+        self.assertIsNone(rest["next_cursor"])
+
+    def test_pages_through_listings_at_the_same_point(self):
+        landlord = CustomUser.objects.get(email="landlord@example.com")
+        for n in range(5):
+            Property.objects.create(
+                owner=landlord, title=f"Tower {n}", address="Marine Drive, Kochi 682011", district="ernakulam",
+                rent=10000, property_type="apartment",
+            )
+        seen, cursor = [], None
+        while True:
+            params = {"near": "682011", "radius": "25", "page_size": 2}
+            if cursor:
+                params["after"] = cursor
+            page = self.client.get(reverse("api_property_list"), params).json()
+            seen += [card["title"] for card in page["results"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(sorted(seen), sorted(["Kochi flat", "Aluva house"] + [f"Tower {n}" for n in range(5)]))
+        self.assertEqual(seen[-1], "Aluva house")
+
+
+# =========================
+# Browse facets
+# =========================
+class FacetCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        for district, property_type, bedrooms, rent in (
+            ("ernakulam", "apartment", 2, 9000),
+            ("ernakulam", "villa", 4, 45000),
+            ("thrissur", "apartment", 2, 7000),
+            ("thrissur", "house", 3, 15000),
+        ):
+            Property.objects.create(
+                owner=landlord, title="Home", address="Main Road", district=district,
+                property_type=property_type, bedrooms=bedrooms, rent=rent,
+            )
+
+    def setUp(self):
+        # Rolled-back test data never moves the generation: start cold
+        cache.clear()
+
+    def test_counts_follow_filters_and_are_cached(self):
+        counts = facets.facet_counts(clean_property_filters({"bedrooms": "2"}))
+        self.assertEqual(counts["district"], {"ernakulam": 1, "thrissur": 1})
+        self.assertEqual(counts["property_type"], {"apartment": 2})
+        self.assertEqual(counts["rent_band"], {"10000": 2})
+
+        counts = facets.facet_counts(clean_property_filters({}))
+        self.assertEqual(counts["bedrooms"], {2: 2, 3: 1, 4: 1})
+        self.assertEqual(counts["rent_band"], {"10000": 2, "20000": 1, "more": 1})
+        with self.assertNumQueries(0):
+            facets.facet_counts(clean_property_filters({"district": "all"}))
+
+    def test_each_facet_ignores_its_own_filter(self):
+        counts = facets.facet_counts(clean_property_filters({"district": "ernakulam"}))
+        # Picking Thrissur instead still shows both of its listings
+        self.assertEqual(counts["district"], {"ernakulam": 2, "thrissur": 2})
+        self.assertEqual(counts["property_type"], {"apartment": 1, "villa": 1})
+
+        filters = clean_property_filters({"max_rent": "10000"})
+        counts = facets.facet_counts(filters)
+        self.assertEqual(counts["bedrooms"], {2: 2})
+        rent = dict((param, rows) for param, _, rows in facets.facet_options(filters, counts))["max_rent"]
+        self.assertEqual([count for _, _, count, _ in rent], [0, 2, 3, 3])
+
+    def test_browse_page_links_facets(self):
+        response = self.client.get(reverse("property_list"), {"district": "thrissur"})
+        self.assertContains(response, "Thrissur (2)")
+        self.assertContains(response, "Up to ₹20,000 (2)")
+
+
+# =========================
+# Market rent stats: every bucket in one NumPy pass
+# =========================
+class MarketStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        for rent, size, bedrooms in ((8000, 800, 2), (10000, 1000, 2), (12000, 0, 2), (30000, 2000, 5)):
+            Property.objects.create(
+                owner=cls.landlord, title="Home", address="Main Road", district="ernakulam",
+                property_type="apartment", bedrooms=bedrooms, rent=rent, size=size,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_quartiles_per_bucket_match_numpy(self):
+        rows = {row["bedrooms"]: row for row in market.compute_market_stats(market.load_snapshot())}
+        two = rows[2]
+        self.assertEqual((two["listings"], two["p25"], two["median"], two["p75"]), (3, 9000, 10000, 11000))
+        # The unsized 12000 listing is left out of rent per sq ft
+        self.assertEqual(two["rent_per_sqft"], 10.0)
+        # 5 bedrooms goes into the open "4+" bucket
+        self.assertEqual((rows[4]["bedrooms_label"], rows[4]["median"]), ("4+ BHK", 30000))
+
+    def test_cached_until_the_market_changes(self):
+        market.market_stats()
+        home = Property.objects.filter(bedrooms=2).first()
+        tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        with self.captureOnCommitCallbacks(execute=True):
+            # Bookings and unrelated edits leave the stats alone
+            Booking.objects.create(
+                property=home, user=tenant, status="approved",
+                start_date=date.today(), end_date=date.today() + timedelta(days=30),
+            )
+            home.title = "Renamed"
+            home.save()
+        with self.assertNumQueries(0):
+            market.market_stats()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                owner=self.landlord, title="New", address="Main Road", district="ernakulam",
+                property_type="apartment", bedrooms=2, rent=20000,
+            )
+        row = next(row for row in market.market_stats() if row["bedrooms"] == 2)
+        self.assertEqual((row["listings"], row["median"]), (4, 11000))
+
+    @override_settings(CACHE_POLL_SECONDS=0)
+    def test_without_a_shared_cache_stats_expire_on_their_own(self):
+        market.market_stats()
+        # Another worker's save bumps a version this process never sees
+        Property.objects.bulk_create([Property(
+            owner=self.landlord, title="New", address="Main Road", district="ernakulam",
+            property_type="apartment", bedrooms=2, rent=20000,
+        )])
+        row = next(row for row in market.market_stats() if row["bedrooms"] == 2)
+        self.assertEqual(row["listings"], 4)
+
+    @override_settings(MARKET_REFRESH_ASYNC=True)
+    def test_stale_stats_are_served_while_a_rebuild_runs(self):
+        market.market_stats()
+        market.bump_market_version()
+        # Another request holds the rebuild lock
+        cache.add(market.LOCK_KEY, 1)
+        with self.assertNumQueries(0):
+            rows = market.market_stats()
+        self.assertEqual(sum(row["listings"] for row in rows), 4)
+
+    def test_pages_show_stats(self):
+        response = self.client.get(reverse("market_stats"), {"district": "ernakulam"})
+        self.assertContains(response, "4+ BHK")
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse("landlord_dashboard"))
+        self.assertEqual(
+            [(row["bedrooms"], row["own_listings"]) for row in response.context["market"]], [(2, 3), (4, 1)]
+        )
+
+
+# =========================
+# Rent suggestions: k nearest listings on a kept-current feature matrix
+# =========================
+class RentSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        for district, property_type, bedrooms, size, rent in (
+            ("ernakulam", "apartment", 2, 1000, 15000),
+            ("ernakulam", "apartment", 2, 1100, 16000),
+            ("ernakulam", "apartment", 3, 1500, 22000),
+            ("thrissur", "apartment", 2, 1000, 9000),
+            ("ernakulam", "villa", 4, 3000, 60000),
+        ):
+            Property.objects.create(
+                owner=cls.landlord, title="Home", address="Main Road", district=district,
+                property_type=property_type, bedrooms=bedrooms, bathrooms=2, size=size, rent=rent,
+            )
+
+    def setUp(self):
+        comparables.reset_feature_matrix()
+        self.features = comparables.clean_features(
+            {"district": "ernakulam", "property_type": "apartment", "bedrooms": "2", "bathrooms": "2", "size": "1050"}
+        )
+
+    def test_nearest_listings_set_the_suggestion(self):
+        suggestion = comparables.suggest_rent(self.features, k=2)
+        self.assertEqual(suggestion["suggested_rent"], 15500)
+        self.assertEqual({c["rent"] for c in suggestion["comparables"]}, {15000, 16000})
+
+        own = Property.objects.get(rent=15000)
+        suggestion = comparables.suggest_rent(self.features, k=2, exclude=[own.pk])
+        self.assertNotIn(own.pk, [c["id"] for c in suggestion["comparables"]])
+
+    def test_saves_and_deletes_patch_the_matrix(self):
+        matrix = comparables.get_feature_matrix()
+        with self.captureOnCommitCallbacks(execute=True):
+            new = Property.objects.create(
+                owner=self.landlord, title="New", address="Main Road", district="ernakulam",
+                property_type="apartment", bedrooms=2, bathrooms=2, size=1050, rent=18000,
+            )
+        self.assertIs(comparables.get_feature_matrix(), matrix)
+        self.assertEqual(comparables.suggest_rent(self.features, k=1)["comparables"][0]["id"], new.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new.delete()
+        self.assertNotIn(new.pk, [c["id"] for c in comparables.suggest_rent(self.features)["comparables"]])
+
+    def test_late_commits_within_the_overlap_are_synced(self):
+        matrix = comparables.get_feature_matrix()
+        # Committed by another worker, stamped before this matrix's watermark
+        late = Property.objects.create(
+            owner=self.landlord, title="Late", address="Main Road", district="ernakulam",
+            property_type="apartment", bedrooms=2, bathrooms=2, size=1050, rent=18000,
+        )
+        Property.objects.filter(pk=late.pk).update(updated_at=matrix.synced_until - timedelta(seconds=10))
+        self.assertNotIn(late.pk, matrix.rows)
+        bump_catalogue_generation()
+        self.assertIn(late.pk, comparables.get_feature_matrix().rows)
+
+    def test_old_matrix_is_served_while_it_is_rebuilt(self):
+        matrix = comparables.get_feature_matrix()
+        matrix.built_at -= comparables.REBUILD_SECONDS + 1
+        # A rebuild is already running: no second one, no waiting for it
+        comparables._build_lock.acquire()
+        try:
+            with self.assertNumQueries(0):
+                self.assertIs(comparables.get_feature_matrix(), matrix)
+        finally:
+            comparables._build_lock.release()
+        self.assertIsNot(comparables.get_feature_matrix(), matrix)
+
+    def test_endpoint(self):
+        url = reverse("api_rent_suggestion")
+        self.client.force_login(self.landlord)
+        self.assertEqual(self.client.get(url, {"district": "ernakulam"}).status_code, 400)
+        data = self.client.get(url, {"district": "ernakulam", "property_type": "apartment", "k": "3"}).json()
+        self.assertEqual(len(data["comparables"]), 3)
+
+        tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        self.client.force_login(tenant)
+        self.assertEqual(self.client.get(url, {"district": "ernakulam", "property_type": "villa"}).status_code, 403)
+
+
+# =========================
+# Similar homes: precomputed lists, refreshed per listing
+# =========================
+class SimilarPropertyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.homes = [
+            Property.objects.create(
+                owner=cls.landlord, title=f"Flat {size}", address="Main Road", district="ernakulam",
+                property_type="apartment", bedrooms=2, bathrooms=1, size=size, rent=size * 15,
+            )
+            for size in (800, 900, 1000, 2000, 2100, 2200, 2300, 2400)
+        ]
+        # Another block: never similar to the flats
+        Property.objects.create(
+            owner=cls.landlord, title="Villa", address="Main Road", district="ernakulam",
+            property_type="villa", bedrooms=2, bathrooms=1, size=1000, rent=30000,
+        )
+        call_command("rebuild_similar_properties", stdout=io.StringIO())
+
+    def similar_ids(self, home):
+        return list(
+            SimilarProperty.objects.filter(property=home).order_by("rank").values_list("similar_id", flat=True)
+        )
+
+    def test_rebuild_ranks_within_the_block(self):
+        small = self.homes[0]
+        self.assertEqual(self.similar_ids(small)[:2], [self.homes[1].pk, self.homes[2].pk])
+        self.assertEqual(len(self.similar_ids(small)), similar.SIMILAR_COUNT)
+        self.assertEqual(SimilarProperty.objects.filter(similar__property_type="villa").count(), 0)
+
+    def test_save_refreshes_incrementally(self):
+        moved = self.homes[3]
+        moved.size = 820
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+        self.assertEqual(self.similar_ids(moved)[:2], [self.homes[0].pk, self.homes[1].pk])
+        # ...and it is now the nearest neighbour of the small flats
+        self.assertEqual(self.similar_ids(self.homes[0])[0], moved.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.delete()
+        self.assertEqual(len(self.similar_ids(self.homes[0])), similar.SIMILAR_COUNT)
+
+    def test_outlier_gains_a_new_listing_it_is_not_listed_by(self):
+        outlier = Property.objects.create(
+            owner=self.landlord, title="Flat 20000", address="Main Road", district="ernakulam",
+            property_type="apartment", bedrooms=2, bathrooms=1, size=20000, rent=300000,
+        )
+        call_command("rebuild_similar_properties", stdout=io.StringIO())
+        self.assertEqual(self.similar_ids(outlier)[0], self.homes[-1].pk)
+
+        # The new flat has six nearer flats of its own, so the outlier is
+        # not in its list, yet it is now the outlier's nearest neighbour
+        with self.captureOnCommitCallbacks(execute=True):
+            added = Property.objects.create(
+                owner=self.landlord, title="Flat 2500", address="Main Road", district="ernakulam",
+                property_type="apartment", bedrooms=2, bathrooms=1, size=2500, rent=37500,
+            )
+        self.assertNotIn(outlier.pk, self.similar_ids(added))
+        self.assertEqual(self.similar_ids(outlier)[0], added.pk)
+
+    def test_detail_page_reads_the_list(self):
+        self.client.force_login(self.landlord)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("property_detail", args=[self.homes[0].pk]))
+        self.assertEqual([home.pk for home in response.context["similar_homes"]][:2], [self.homes[1].pk, self.homes[2].pk])
+        self.assertEqual(sum("rentalapp_similarproperty" in q["sql"] for q in queries), 1)
+
+
+# =========================
+# Occupancy timelines
+# =========================
+class OccupancyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        cls.tenant = CustomUser.objects.create_user(email="tenant@example.com", password="x", role="tenant")
+        cls.home = Property.objects.create(
+            owner=cls.landlord, title="Flat", address="MG Road", rent=20000,
+            property_type="apartment", district="ernakulam",
+        )
+
+    def book(self, start, end, status="pending"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                property=self.home, user=self.tenant, status=status, start_date=start, end_date=end,
+            )
+
+    def test_bitmap_counts_days_in_window(self):
+        start, bits = occupancy.timeline_from_ranges([
+            (date(2024, 1, 1), date(2024, 1, 11)),
+            (date(2024, 2, 1), date(2024, 2, 6)),
+        ])
+        self.assertEqual(occupancy.decode_bits(occupancy.encode_bits(bits)), bits)
+        self.assertEqual(occupancy.occupied_days(start, bits, date(2024, 1, 1), date(2024, 3, 1)), 15)
+        # Check-out days are free; windows before the timeline count nothing
+        self.assertEqual(occupancy.occupied_days(start, bits, date(2024, 1, 11), date(2024, 2, 1)), 0)
+        self.assertEqual(occupancy.occupied_days(start, bits, date(2023, 12, 1), date(2024, 1, 3)), 2)
+
+    def test_booking_status_changes_update_the_timeline(self):
+        today = date.today()
+        booking = self.book(today - timedelta(days=10), today)
+        self.assertFalse(OccupancyTimeline.objects.filter(property=self.home).exists())
+
+        booking.status = "approved"
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        timeline = OccupancyTimeline.objects.get(property=self.home)
+        self.assertEqual(occupancy.decode_bits(timeline.bits).bit_count(), 10)
+
+        booking.status = "rejected"
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertFalse(OccupancyTimeline.objects.filter(property=self.home).exists())
+
+    def test_moving_a_deferred_booking_never_loads_its_status(self):
+        today = date.today()
+        booking = self.book(today - timedelta(days=10), today, status="approved")
+        moved = Booking.objects.only("id", "property_id", "start_date", "end_date").get(pk=booking.pk)
+        moved.start_date = today - timedelta(days=4)
+        # The status is deferred and unchanged: the receiver must not fetch it
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(0):
+            signals.update_occupancy_on_booking_save(Booking, moved, created=False)
+        self.assertNotIn("status", moved.__dict__)
+        self.assertEqual(len(callbacks), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+        timeline = OccupancyTimeline.objects.get(property=self.home)
+        self.assertEqual(occupancy.decode_bits(timeline.bits).bit_count(), 4)
+
+    def test_dashboard_rate_counts_days_not_bookings(self):
+        today = date.today()
+        # Long-past stays used to count towards the rate as if current
+        for year in range(1, 4):
+            start = today - timedelta(days=365 * year)
+            self.book(start, start + timedelta(days=30), status="approved")
+        # 15 days of the last 30 (today included) are let
+        self.book(today - timedelta(days=14), today + timedelta(days=15), status="approved")
+        self.assertEqual(occupancy.recent_occupancy(self.landlord, 30, 90), [50.0, 16.7])
+
+        self.client.force_login(self.landlord)
+        response = self.client.get(reverse("landlord_dashboard"))
+        self.assertEqual(response.context["occupancy_rate"], 50.0)
+        self.assertContains(response, "Last 90 days: 17%")
+
+
+# =========================
+# Read replica routing
+# =========================
+class ReadReplicaTests(TransactionTestCase):
+    # The replica alias is a second connection to the test database
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        self.home = Property.objects.create(
+            owner=self.landlord, title="Flat", address="MG Road", rent=20000,
+            property_type="apartment", district="ernakulam",
+        )
+
+    def property_queries(self, alias, url):
+        with CaptureQueriesContext(connections[alias]) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sum("rentalapp_property" in q["sql"] for q in queries)
+
+    def test_browse_and_detail_read_the_replica(self):
+        # Anonymous pages end up in the shared page cache: rendered from the primary
+        self.assertEqual(self.property_queries("replica", reverse("property_list") + "?q=replica"), 0)
+        self.client.force_login(self.landlord)
+        self.assertGreater(self.property_queries("replica", reverse("property_list") + "?q=replica"), 0)
+        self.assertEqual(self.property_queries("default", reverse("property_detail", args=[self.home.pk])), 0)
+        # Unmarked views stay on the primary
+        self.assertEqual(self.property_queries("replica", reverse("landlord_properties")), 0)
+
+    def test_write_makes_the_visitor_sticky(self):
+        self.client.force_login(self.landlord)
+        response = self.client.post(reverse("edit_property", args=[self.home.pk]), {})
+        self.assertIn(routing.STICKY_COOKIE, response.cookies)
+        detail = reverse("property_detail", args=[self.home.pk])
+        self.assertEqual(self.property_queries("replica", detail), 0)
+
+        # ...until the window is over
+        self.client.cookies[routing.STICKY_COOKIE] = "0"
+        self.assertEqual(self.property_queries("default", detail), 0)
+
+    def test_reads_after_a_write_use_the_primary(self):
+        router = routing.ReadReplicaRouter()
+        token = routing._current_state.set(routing.RoutingState(replica_view=True))
+        try:
+            self.assertEqual(router.db_for_read(Property), "replica")
+            self.assertEqual(router.db_for_write(Property), "default")
+            self.assertEqual(router.db_for_read(Property), "default")
+        finally:
+            routing._current_state.reset(token)
+        self.assertEqual(router.db_for_read(Property), "default")
+
+    def test_cached_and_rewritten_results_read_the_primary(self):
+        token = routing._current_state.set(routing.RoutingState(replica_view=True))
+        try:
+            with CaptureQueriesContext(connections["replica"]) as queries:
+                get_landlord_stats(self.landlord)
+                facets.facet_counts({})
+                market.market_stats()
+        finally:
+            routing._current_state.reset(token)
+        self.assertEqual(len(queries), 0)
+
+
+# =========================
+# Anonymous page cache
+# =========================
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+
+    def test_anonymous_get_misses_then_hits(self):
+        url = reverse("property_list")
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "HIT")
+
+    def test_logged_in_and_session_requests_are_never_cached(self):
+        url = reverse("about")
+        self.client.force_login(self.landlord)
+        self.client.get(url)
+        self.assertNotIn("X-Page-Cache", self.client.get(url))
+
+        self.client.logout()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "anything"
+        self.client.get(url)
+        self.assertNotIn("X-Page-Cache", self.client.get(url))
+
+    def test_pages_with_a_csrf_token_are_never_cached(self):
+        def form_view(request):
+            return HttpResponse(get_token(request))
+
+        view = cache_public_page(form_view)
+        request = RequestFactory().get("/form/")
+        request.user = AnonymousUser()
+        self.assertEqual(view(request)["X-Page-Cache"], "MISS")
+        request = RequestFactory().get("/form/")
+        request.user = AnonymousUser()
+        self.assertEqual(view(request)["X-Page-Cache"], "MISS")
+
+    def test_saving_a_property_invalidates_the_list(self):
+        url = reverse("property_list")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                owner=self.landlord, title="Fresh flat", address="MG Road", rent=20000,
+                property_type="apartment", district="ernakulam",
+            )
+        response = self.client.get(url)
+        self.assertEqual(response["X-Page-Cache"], "MISS")
+        self.assertContains(response, "Fresh flat")
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_off_without_a_shared_cache(self):
+        url = reverse("about")
+        self.client.get(url)
+        self.assertNotIn("X-Page-Cache", self.client.get(url))
+
+
+class PageCacheGenerationTests(TestCase):
+
+    def test_generation_moves_when_the_change_commits(self):
+        landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+        before = catalogue_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                owner=landlord, title="Flat", address="MG Road", rent=20000,
+                property_type="apartment", district="ernakulam",
+            )
+            # Concurrent requests still see the old rows: keep the old pages
+            self.assertEqual(catalogue_generation(), before)
+        self.assertGreater(catalogue_generation(), before)
+
+
+# =========================
+# Mail outbox
+# =========================
+class MailOutboxTests(TestCase):
+
+    def setUp(self):
+        self.message = queue_email("Hello", "Body", ["tenant@example.com"])
+
+    def test_claims_each_due_message_once(self):
+        later = queue_email("Later", "Body", ["tenant@example.com"])
+        OutboundEmail.objects.filter(pk=later.pk).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual([m.pk for m in claim_batch(10)], [self.message.pk])
+        self.assertEqual(claim_batch(10), [])
+
+    def test_claim_skips_messages_another_worker_took_meanwhile(self):
+        other = queue_email("Other", "Body", ["tenant@example.com"])
+        # Both were selected, then another worker claimed this one first
+        OutboundEmail.objects.filter(pk=self.message.pk).update(status="sending", locked_at=timezone.now())
+        claimed = _claim([self.message.pk, other.pk], timezone.now() + timedelta(seconds=1))
+        self.assertEqual([m.pk for m in claimed], [other.pk])
+
+    def test_reclaimed_message_counts_an_attempt_and_dies_at_the_limit(self):
+        for attempts in (1, 2):
+            claim_batch(10)
+            OutboundEmail.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+            self.assertEqual(claim_batch(10, max_attempts=3)[0].attempts, attempts)
+        OutboundEmail.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(claim_batch(10, max_attempts=3), [])
+        self.message.refresh_from_db()
+        self.assertEqual((self.message.status, self.message.attempts), ("dead", 3))
+
+    def test_worker_never_sends_a_message_reclaimed_from_it(self):
+        [claimed] = claim_batch(10)
+        # Another worker reclaimed the stale claim and holds it now
+        OutboundEmail.objects.update(locked_at=timezone.now() + timedelta(seconds=1))
+        pool = MailWorkerPool()
+        pool._send(get_connection(), claimed)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboundEmail.objects.get().status, "sending")
+
+        [claimed] = OutboundEmail.objects.all()
+        pool._send(get_connection(), claimed)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboundEmail.objects.get().status, "sent")
+
+
+# =========================
+# Image variants
+# =========================
+def upload(width=1200, height=800, name="front.jpg"):
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (width, height), (30, 120, 200)).save(buffer, "JPEG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+
+    def add(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Property.objects.create(
+                owner=self.landlord, title="Sea view flat", address="MG Road", rent=20000,
+                property_type="apartment", district="ernakulam", image=upload(),
+            )
+
+    def test_upload_gets_every_width_without_upscaling(self):
+        home = self.add()
+        home.refresh_from_db()
+        variants = home.image_variants
+        self.assertEqual(variants["source"], home.image.name)
+        self.assertEqual({name: variants[name]["width"] for name in images.VARIANT_WIDTHS},
+                         {"card": 400, "detail": 1000, "full": 1200})
+        for name in images.VARIANT_WIDTHS:
+            for fmt in ("webp", "jpeg"):
+                self.assertTrue(default_storage.exists(variants[name][fmt]))
+        with default_storage.open(variants["card"]["jpeg"]) as handle:
+            self.assertEqual(PILImage.open(handle).size, (400, 267))
+
+    def test_tag_uses_variants_then_falls_back_to_the_upload(self):
+        home = self.add()
+        home.refresh_from_db()
+        html = property_image(home, "card")
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(f'{default_storage.url(home.image_variants["card"]["webp"])} 400w', html)
+        self.assertIn(f'{default_storage.url(home.image_variants["detail"]["jpeg"])} 1000w', html)
+
+        home.image_variants = {}
+        html = property_image(home, "card")
+        self.assertNotIn("<picture>", html)
+        self.assertIn(f'src="{home.image.url}"', html)
+
+
+class ImageBackfillTests(TransactionTestCase):
+    # The backfill builds on executor threads, which need committed rows
+
+    def test_backfill_builds_missing_variants(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        with override_settings(MEDIA_ROOT=media.name):
+            landlord = CustomUser.objects.create_user(email="landlord@example.com", password="x", role="landlord")
+            homes = [
+                Property.objects.create(
+                    owner=landlord, title=f"Flat {n}", address="MG Road", rent=20000,
+                    property_type="apartment", district="ernakulam", image=upload(name=f"flat{n}.jpg"),
+                )
+                for n in range(3)
+            ]
+            Property.objects.update(image_variants={})
+
+            out = io.StringIO()
+            call_command("backfill_image_variants", chunk_size=1, stdout=out)
+            self.assertIn("Built variants for 3 properties", out.getvalue())
+            for home in homes:
+                home.refresh_from_db()
+                self.assertEqual(home.image_variants["card"]["width"], 400)
@@ -18,6 +18,11 @@ urlpatterns = [
     path("properties/<int:pk>/", views.property_detail, name="property_detail"),
     path("properties/<int:property_id>/book/", views.book_property, name="book_property"),
     path("properties/<int:property_id>/contact/", views.contact_landlord, name="contact_landlord"),
+    path("market/", views.market_stats, name="market_stats"),
+
+    # JSON API
+    path("api/properties/", views.api_property_list, name="api_property_list"),
+    path("api/rent-suggestion/", views.api_rent_suggestion, name="api_rent_suggestion"),
 
     # Auth
     path("signup/", views.signup, name="signup"),
@@ -49,6 +54,7 @@ urlpatterns = [
     path("landlord/applications/", views.landlord_applications, name="applications"),
     path("landlord/payments/", views.landlord_payments, name="payments"),
     path("landlord/maintenance/", views.landlord_maintenance, name="maintenance"),
+    path("landlord/export/<str:dataset>/", views.landlord_export, name="landlord_export"),
     path("landlord/maintenance/update/<int:pk>/", views.update_maintenance, name="update_maintenance"),
     # Landlord – My Properties (only owned by landlord)
     path("landlord/my-properties/", views.landlord_properties, name="landlord_properties"),
@@ -59,6 +65,7 @@ urlpatterns = [
     # Actions
     path("booking/cancel/<int:booking_id>/", views.cancel_booking, name="cancel_booking"),
     path("payment/<int:booking_id>/", views.make_payment, name="make_payment"),
+    path("payment/invoice/<int:payment_id>/", views.pay_now, name="pay_now"),
 
     # Static pages
     path("privacy/", views.privacy, name="privacy"),
@@ -1,10 +1,11 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
-from django.db import models  # For Sum
+from django.db import models, transaction  # For Sum
 from django.urls import reverse
 from .forms import CustomUserCreationForm, EmailAuthenticationForm, PropertyForm, BookingForm
-from django.core.mail import send_mail
 from django.contrib import messages
 from django.views import View
 from .models import Property, Booking, Payment, Maintenance,Application,MaintenanceRequest
@@ -13,58 +14,24 @@ from datetime import date, timedelta
 from django.contrib.auth import get_user_model
 from django.db.models import Q
 from .models import DISTRICT_CHOICES, PROPERTY_TYPE_CHOICES
+from .filters import _to_date, clean_property_filters, browse_ordering
+from .pagination import keyset_paginate, parse_page_size
+from .geo import DEFAULT_RADIUS_KM, nearest_page
+from .stats import get_landlord_stats
+from .decorators import query_budget, replica_reads
+from . import selectors
+from .page_cache import cache_public_page
+from .mail import queue_email
+from .availability import is_available
+from . import exports
+from . import api
+from . import dashboards
+from . import comparables
+from . import facets
+from . import market
+from . import occupancy
 User = get_user_model()
 
-# =========================
-# Landlord Dashboard
-# =========================
-@login_required
-def landlord_dashboard(request):
-    landlord = request.user
-    if landlord.role != "landlord":
-        return render(request, "rentalapp/forbidden.html")
-
-    if request.method == "POST":
-        booking_id = request.POST.get("booking_id")
-        action = request.POST.get("action")
-        booking = get_object_or_404(Booking, id=booking_id, property__owner=landlord)
-
-        if action == "approve":
-            booking.status = "approved"
-            booking.save()
-            messages.success(request, f"✅ Booking #{booking.id} approved successfully.")
-        elif action == "reject":
-            booking.status = "rejected"
-            booking.save()
-            messages.warning(request, f"⚠ Booking #{booking.id} rejected.")
-
-        return redirect("landlord_dashboard")
-
-    total_properties = Property.objects.filter(owner=landlord).count()
-    total_income = Payment.objects.filter(
-        booking__property__owner=landlord, status="received"
-    ).aggregate(total=models.Sum("amount"))["total"] or 0
-
-    total_units = total_properties
-    occupied_units = Booking.objects.filter(property__owner=landlord, status="approved").count()
-    occupancy_rate = round((occupied_units / total_units) * 100, 1) if total_units > 0 else 0
-
-    applications = Booking.objects.filter(property__owner=landlord, status="pending").count()
-    recent_applications = Booking.objects.filter(property__owner=landlord).order_by("-id")[:5]
-    payments = Payment.objects.filter(booking__property__owner=landlord).order_by("-date")[:5]
-
-    context = {
-        "landlord": landlord,
-        "total_properties": total_properties,
-        "monthly_income": total_income,
-        "occupancy_rate": f"{occupancy_rate}%",
-        "applications": applications,
-        "recent_applications": recent_applications,
-        "payments": payments,
-    }
-    return render(request, "rentalapp/landlord_dashboard.html", context)
-
-
 # =========================
 # Tenant Dashboard
 # =========================
@@ -74,11 +41,11 @@ def tenant_dashboard(request):
     if tenant.role != "tenant":
         return render(request, "rentalapp/forbidden.html")
 
-    active_bookings = Booking.objects.filter(user=tenant, status="approved")
-    pending_bookings = Booking.objects.filter(user=tenant, status="pending")
-    all_payments = Payment.objects.filter(booking__user=tenant, status="received")
+    active_bookings = selectors.tenant_bookings(tenant, status="approved")
+    pending_bookings = selectors.tenant_bookings(tenant, status="pending")
+    all_payments = selectors.tenant_payments(tenant, status="received")
     total_spent = all_payments.aggregate(total=models.Sum("amount"))["total"] or 0
-    payments = all_payments.order_by("-date")[:5]
+    payments = all_payments[:5]
 
     context = {
         "tenant": tenant,
@@ -203,6 +170,9 @@ def logout_view(request):
 
 
 
+@replica_reads
+@query_budget(6)
+@cache_public_page
 def home(request):
     DISTRICTS = [
         ('trivandrum', 'Thiruvananthapuram'),
@@ -224,34 +194,23 @@ def home(request):
 
    
 # Fetch featured properties (limit 3) 
-    featured_properties = Property.objects.all()[:3]
- # Start with all properties
-    properties = Property.objects.all()
-    district = request.GET.get('district')
-    max_rent = request.GET.get('max_rent')
-    bedrooms = request.GET.get('bedrooms')
-    property_type = request.GET.get('property_type')
-
-    if district:
-        properties = properties.filter(district=district)
-    if max_rent:
-        try:
-            properties = properties.filter(rent__lte=int(max_rent))
-        except ValueError:
-            pass
-    if bedrooms:
-        try:
-            properties = properties.filter(bedrooms=int(bedrooms))
-        except ValueError:
-            pass
-    if property_type:
-        properties = properties.filter(property_type__iexact=property_type)
+    featured_properties = selectors.featured_properties(3)
+ # Filtered properties, one keyset page at a time
+    filters = clean_property_filters(request.GET)
+    properties = selectors.property_cards(filters)
+    page = keyset_paginate(
+        properties,
+        after=request.GET.get("after"),
+        page_size=parse_page_size(request.GET.get("page_size")),
+        keys=browse_ordering(filters),
+    )
 
     context = {
         "DISTRICTS": DISTRICTS,
         "PROPERTY_TYPES": PROPERTY_TYPE_CHOICES,
-          "filtered_properties": properties,
+          "filtered_properties": page.items,
         "featured_properties": featured_properties,
+        "page": page,
         
     }
     return render(request, "rentalapp/home.html", context)
@@ -293,24 +252,39 @@ def book_property(request, property_id):
     if request.method == "POST":
         form = BookingForm(request.POST)
         if form.is_valid():
-            booking = form.save(commit=False)
-            booking.property = property_obj
-            booking.user = request.user
-            booking.status = "pending"
-            booking.save()
-            messages.success(request, f"✅ Booking request for '{property_obj.title}' submitted!")
-            return redirect("property_detail", pk=property_id)
-        messages.error(request, "❌ Failed to submit booking. Check the form.")
+            start_date = form.cleaned_data["start_date"]
+            end_date = form.cleaned_data["end_date"]
+            with transaction.atomic():
+                # Lock the property row so two requests can't both pass the check
+                Property.objects.select_for_update().filter(pk=property_obj.pk).exists()
+                if is_available(property_obj.pk, start_date, end_date):
+                    booking = form.save(commit=False)
+                    booking.property = property_obj
+                    booking.user = request.user
+                    booking.status = "pending"
+                    booking.save()
+                    messages.success(request, f"✅ Booking request for '{property_obj.title}' submitted!")
+                    return redirect("property_detail", pk=property_id)
+            messages.error(request, "❌ This property is already booked for those dates.")
+        else:
+            messages.error(request, "❌ Failed to submit booking. Check the form.")
     else:
         form = BookingForm()
 
     return render(request, "rentalapp/book_property.html", {"property": property_obj, "form": form})
 
 
+@replica_reads
+@query_budget(6)
 @login_required
 def property_detail(request, pk):
-    property_obj = get_object_or_404(Property, pk=pk)
-    return render(request, "rentalapp/property_detail.html", {"property": property_obj})
+    property_obj = get_object_or_404(selectors.property_detail(), pk=pk)
+    context = {
+        "property": property_obj,
+        # Precomputed by rebuild_similar_properties / on save: one query here
+        "similar_homes": selectors.similar_properties(pk),
+    }
+    return render(request, "rentalapp/property_detail.html", context)
 
 
 # =========================
@@ -318,7 +292,7 @@ def property_detail(request, pk):
 # =========================
 @login_required
 def contact_landlord(request, property_id):
-    property_obj = get_object_or_404(Property, id=property_id)
+    property_obj = get_object_or_404(selectors.property_detail(), id=property_id)
     if request.user.role != "tenant":
         messages.error(request, "❌ Only tenants are allowed to contact landlords.")
         return render(request, "rentalapp/forbidden.html")
@@ -329,17 +303,14 @@ def contact_landlord(request, property_id):
             messages.error(request, "❌ Message cannot be empty.")
             return redirect("property_detail", pk=property_id)
 
-        try:
-            send_mail(
-                subject=f"Inquiry about {property_obj.title}",
-                message=f"From: {request.user.username} ({request.user.email})\n\n{message_text}",
-                from_email=request.user.email,
-                recipient_list=[property_obj.owner.email],
-                fail_silently=False,
-            )
-            messages.success(request, "✅ Message sent to landlord successfully!")
-        except Exception:
-            messages.error(request, "❌ Failed to send message. Please try again later.")
+        # Delivered by the run_mail_worker command; the request only stores it
+        queue_email(
+            subject=f"Inquiry about {property_obj.title}",
+            body=f"From: {request.user.username} ({request.user.email})\n\n{message_text}",
+            to=[property_obj.owner.email],
+            from_email=request.user.email,
+        )
+        messages.success(request, "✅ Message sent to landlord successfully!")
         return redirect("property_detail", pk=property_id)
 
     return render(request, "rentalapp/contact_landlord.html", {"property": property_obj})
@@ -352,10 +323,7 @@ def contact_landlord(request, property_id):
 # =========================
 # Extra Pages
 # =========================
-def property_list(request):
-    properties = Property.objects.all()
-    return render(request, "rentalapp/property_list.html", {"properties": properties})
-
+@cache_public_page
 def about(request):
     return render(request, "rentalapp/about.html")
 
@@ -369,58 +337,89 @@ def get_started(request):
 def contact(request):
     return render(request, "rentalapp/contact.html")
 
+@cache_public_page
 def terms(request):
     return render(request, "rentalapp/terms.html")
 
+@cache_public_page
 def privacy(request):
     return render(request, "rentalapp/privacy.html")
 
+@cache_public_page
 def help_center(request):
     return render(request, "rentalapp/help.html")
 
 
+# =========================
+# Market rent stats
+# =========================
+@replica_reads
+@query_budget(3)
+@cache_public_page
+def market_stats(request):
+    # Every bucket comes from one cached computation (rentalapp/market.py);
+    # the district dropdown only narrows the rows shown
+    district = request.GET.get("district", "")
+    if district not in dict(DISTRICT_CHOICES):
+        district = ""
+    rows = market.market_stats()
+    if district:
+        rows = [row for row in rows if row["district"] == district]
+
+    context = {
+        "rows": rows,
+        "district": district,
+        "DISTRICTS": DISTRICT_CHOICES,
+    }
+    return render(request, "rentalapp/market_stats.html", context)
+
+
 from .forms import MaintenanceForm, ProfileForm
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 # -------------------------
 # Tenant: Overview 
+@replica_reads
+@query_budget(8)
 @login_required
-def tenant_dashboard_overview(request):
-    # reuse your existing tenant logic but ensure we pass the keys used in template
-    tenant = request.user
-    # current approved booking (if any)
-    active_booking = Booking.objects.filter(user=tenant, status="approved").first()
-    # fallback to pending booking if no active booking
-    if not active_booking:
-        active_booking = Booking.objects.filter(user=tenant, status="pending").first()
+async def tenant_dashboard_overview(request):
+    tenant = await request.auser()
+
+    # The four lookups are independent: run them concurrently
+    data = await dashboards.gather({
+        "approved": lambda: selectors.tenant_current_booking(tenant, status="approved"),
+        "pending": lambda: selectors.tenant_current_booking(tenant, status="pending"),
+        "applications_count": lambda: selectors.tenant_bookings(tenant, status="pending").count(),
+        "maintenance_requests": lambda: selectors.tenant_maintenance(tenant).count(),
+    })
 
+    # current approved booking, falling back to the pending one
+    active_booking = data["approved"] or data["pending"]
     current_property = active_booking.property if active_booking else None
- 
-      # Stats
-    applications_count = Booking.objects.filter(user=tenant, status="pending").count()
-    maintenance_requests_count = Maintenance.objects.filter(tenant=tenant).count()
     monthly_rent = current_property.rent if current_property else 0
 
-
     context = {
         "section": "overview",
         "tenant": tenant,
         "monthly_rent": monthly_rent,
-        "applications_count": applications_count,
-        "maintenance_requests": maintenance_requests_count,
+        "applications_count": data["applications_count"],
+        "maintenance_requests": data["maintenance_requests"],
         "current_property": current_property,
         "active_booking": active_booking,
     }
 
-    return render(request, "rentalapp/tenant_dashboard.html", context)
+    return await sync_to_async(render)(request, "rentalapp/tenant_dashboard.html", context)
 # -------------------------
 # Tenant: Bookings
 # -------------------------
+@replica_reads
+@query_budget(8)
 @login_required
-def tenant_bookings(request):
+def tenant_bookings(request, status=None):
     tenant = request.user
-    bookings = Booking.objects.filter(user=tenant).order_by("-id")
+    # tenant/bookings/<status>/ narrows the list to one status
+    bookings = selectors.tenant_bookings(tenant, status=status)
     return render(request, "rentalapp/tenant_dashboard.html", {
         "section": "bookings",
         "tenant": tenant,
@@ -431,11 +430,13 @@ def tenant_bookings(request):
 # -------------------------
 # Tenant Applications
 # -------------------------
+@replica_reads
+@query_budget(8)
 @login_required
 def tenant_applications(request):
     tenant = request.user
     # Only show "pending" bookings here (acts like applications)
-    applications = Booking.objects.filter(user=tenant).exclude(status="cancelled").order_by("-id")
+    applications = selectors.tenant_applications(tenant)
     
     return render(request, "rentalapp/tenant_dashboard.html", {
         "section": "applications",
@@ -461,10 +462,12 @@ def cancel_application(request, app_id):
 # -------------------------
 # Tenant: Payments
 # -------------------------
+@replica_reads
+@query_budget(8)
 @login_required
 def tenant_payments(request):
     tenant = request.user
-    payments = Payment.objects.filter(booking__user=tenant).order_by("-date")
+    payments = selectors.tenant_payments(tenant)
     return render(request, "rentalapp/tenant_dashboard.html", {
         "section": "payments",
         "tenant": tenant,
@@ -483,7 +486,7 @@ def tenant_maintenance(request):
         if form.is_valid():
             m = form.save(commit=False)
             # try to attach to the tenant's active property (if any) or fail fast
-            active_booking = Booking.objects.filter(user=tenant, status="approved").first()
+            active_booking = selectors.tenant_bookings(tenant, status="approved").first()
             if not active_booking:
                 messages.error(request, "You must have an active lease to file maintenance.")
                 return redirect("tenant_maintenance")
@@ -495,7 +498,7 @@ def tenant_maintenance(request):
     else:
         form = MaintenanceForm()
 
-    maintenance_list = Maintenance.objects.filter(tenant=tenant).order_by("-created_at")
+    maintenance_list = selectors.tenant_maintenance(tenant)
     return render(request, "rentalapp/tenant_dashboard.html", {
         "section": "maintenance",
         "tenant": tenant,
@@ -526,16 +529,42 @@ def cancel_booking(request, booking_id):
 def make_payment(request, booking_id):
     booking = get_object_or_404(Booking, id=booking_id, user=request.user, status="approved")
     if request.method == "POST":
-        Payment.objects.create(
+        month = date.today().replace(day=1)  # first day of this month
+        # Settle this month's invoice (generate_rent_invoices) if there is one;
+        # (booking, month) is unique, so never add a second row
+        payment, created = Payment.objects.get_or_create(
             booking=booking,
-            amount=booking.property.rent,
-            status="received",
-            month=date.today().replace(day=1),  # first day of this month
-            due_date=date.today() + timedelta(days=7)  # example: 7 days from today
+            month=month,
+            defaults={
+                "amount": booking.property.rent,
+                "status": "received",
+                "due_date": date.today() + timedelta(days=7),  # example: 7 days from today
+            },
         )
+        if not created and payment.status == "received":
+            messages.info(request, f"Rent for {month:%B %Y} is already paid.")
+            return redirect("tenant_payments")
+        if not created:
+            payment.status = "received"
+            payment.save()
+        messages.success(request, "Payment recorded successfully.")
+        return redirect("tenant_payments")
+    return render(request, "rentalapp/make_payment.html", {"booking": booking, "amount": booking.property.rent})
+
+
+@login_required
+def pay_now(request, payment_id):
+    """Pay a pending or failed invoice from the tenant's payment history."""
+    payment = get_object_or_404(
+        Payment.objects.select_related("booking__property"),
+        id=payment_id, booking__user=request.user, status__in=["pending", "failed"],
+    )
+    if request.method == "POST":
+        payment.status = "received"
+        payment.save()
         messages.success(request, "Payment recorded successfully.")
         return redirect("tenant_payments")
-    return render(request, "rentalapp/make_payment.html", {"booking": booking})
+    return render(request, "rentalapp/make_payment.html", {"booking": payment.booking, "amount": payment.amount})
 
 
 # -------------------------
@@ -595,6 +624,8 @@ def approve_application(request, app_id):
     )
 
 
+@replica_reads
+@query_budget(8)
 @login_required
 def landlord_payments(request):
     landlord = request.user
@@ -602,7 +633,7 @@ def landlord_payments(request):
         return render(request, "rentalapp/forbidden.html")
 
     # Fetch payments for this landlord
-    payments = Payment.objects.filter(booking__property__owner=landlord).order_by("-date")[:10]  # queryset
+    payments = selectors.landlord_payments(landlord)[:10]
 
     context = {
         "landlord": landlord,
@@ -612,13 +643,15 @@ def landlord_payments(request):
 
     return render(request, "rentalapp/landlord_dashboard.html", context)
 
+@replica_reads
+@query_budget(8)
 @login_required
 def landlord_applications(request):
     landlord = request.user
     if landlord.role != "landlord":
         return render(request, "rentalapp/forbidden.html")
 
-    applications = Booking.objects.filter(property__owner=landlord).order_by("-created_at")
+    applications = selectors.landlord_applications(landlord)
 
     context = {
         "landlord": landlord,
@@ -629,13 +662,15 @@ def landlord_applications(request):
 
 
 
+@replica_reads
+@query_budget(8)
 @login_required
 def landlord_bookings(request):
     landlord = request.user
     if landlord.role != "landlord":
         return render(request, "rentalapp/forbidden.html")
 
-    bookings = Booking.objects.filter(property__owner=landlord).order_by("-start_date")
+    bookings = selectors.landlord_bookings(landlord).order_by("-start_date")
 
     context = {
         "landlord": landlord,
@@ -650,9 +685,7 @@ def landlord_maintenance(request):
     if landlord.role != "landlord":
         return render(request, "rentalapp/forbidden.html")
 
-    maintenance_requests = Maintenance.objects.filter(
-    property__in=properties
-).select_related("tenant", "property").order_by("-created_at")
+    maintenance_requests = selectors.landlord_maintenance(landlord)
 
 
     context = {
@@ -662,6 +695,43 @@ def landlord_maintenance(request):
     }
     return render(request, "rentalapp/landlord_dashboard.html", context)
 
+
+# =========================
+# Landlord Exports
+# =========================
+@login_required
+def landlord_export(request, dataset):
+    """
+    Full payments/bookings/maintenance history as a streamed CSV or JSONL
+    file: ?format=csv|jsonl, ?from=/&to= (YYYY-MM-DD, inclusive), ?gzip=1.
+    """
+    landlord = request.user
+    if landlord.role != "landlord":
+        return render(request, "rentalapp/forbidden.html")
+    if dataset not in exports.EXPORTS:
+        raise Http404("Unknown export")
+
+    fmt = request.GET.get("format", "csv")
+    if fmt not in exports.ENCODERS:
+        fmt = "csv"
+    compress = request.GET.get("gzip") in ("1", "true", "yes")
+
+    stream = exports.export_stream(
+        dataset, landlord, fmt=fmt,
+        date_from=_to_date(request.GET.get("from")),
+        date_to=_to_date(request.GET.get("to")),
+        compress=compress,
+    )
+    filename = f"{dataset}-{date.today().isoformat()}.{fmt}"
+    if compress:
+        response = StreamingHttpResponse(stream, content_type="application/gzip")
+        filename += ".gz"
+    else:
+        response = StreamingHttpResponse(stream, content_type=exports.ENCODERS[fmt][1])
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["Cache-Control"] = "private, no-store"
+    return response
+
 @login_required
 def update_maintenance(request, pk):
     # Only allow the owner of the property to update
@@ -674,85 +744,95 @@ def update_maintenance(request, pk):
             req.save()
             messages.success(request, f"Maintenance request #{req.id} updated to {req.status}.")
             return redirect("landlord_maintenance")
-@login_required
-def landlord_dashboard(request):
-    landlord = request.user
-    properties = Property.objects.filter(owner=landlord)
-    section = request.GET.get('section', 'overview')
+def _landlord_dashboard_action(request, landlord):
     # Handle Approve/Reject actions
-    if request.method == "POST":
-        booking_id = request.POST.get("booking_id")
-        action = request.POST.get("action")
+    booking_id = request.POST.get("booking_id")
+    action = request.POST.get("action")
 
-        if booking_id and action:
-            try:
-                booking = Booking.objects.get(id=booking_id, property__in=properties)
+    if booking_id and action:
+        try:
+            with transaction.atomic():
+                booking = Booking.objects.select_for_update().get(id=booking_id, property__owner=landlord)
                 if action == "approve":
-                    booking.status = "approved"
+                    if is_available(booking.property_id, booking.start_date, booking.end_date, exclude_booking=booking.pk):
+                        booking.status = "approved"
+                    else:
+                        messages.error(request, "❌ Those dates overlap an approved booking for this property.")
                 elif action == "reject":
                     booking.status = "rejected"
                 booking.save()
-            except Booking.DoesNotExist:
-                pass
-
-        return redirect(f"{reverse('landlord_dashboard')}?section=applications")
-
-    # Applications (bookings awaiting landlord approval)
-    applications_qs = Booking.objects.filter(
-        property__in=properties, status="pending"
-    ).order_by("-created_at")
-    applications_count = applications_qs.count()
-
-    # Recent applications (show 5 latest pending)
-    recent_applications = applications_qs[:5]
-
-    # All bookings (approved/active)
-    bookings_qs = Booking.objects.filter(property__in=properties).order_by("-start_date")
-    bookings_count = bookings_qs.count()
+        except Booking.DoesNotExist:
+            pass
 
-    # Payments (latest 10)
-    payments_qs = Payment.objects.filter(
-        booking__property__in=properties
-    ).order_by("-date")[:10]
+    return redirect(f"{reverse('landlord_dashboard')}?section=applications")
 
-    # Maintenance requests (latest 10)
-    maintenance_requests = MaintenanceRequest.objects.filter(
-        property__in=properties
-    ).select_related("tenant", "property").order_by("-created_at")[:10]
-    maintenance_count = maintenance_requests.count()
 
-    # Stats
-    total_properties = properties.count()
-    monthly_income = payments_qs.aggregate(models.Sum("amount"))["amount__sum"] or 0
-    occupancy_rate = f"{(bookings_qs.count() / total_properties * 100) if total_properties else 0:.0f}%"
+@replica_reads
+@query_budget(10)
+@login_required
+async def landlord_dashboard(request):
+    landlord = await request.auser()
+    section = request.GET.get('section', 'overview')
+    if request.method == "POST":
+        return await sync_to_async(_landlord_dashboard_action)(request, landlord)
+
+    # Counters come from the LandlordStats row (one query); the lists are
+    # only fetched for the section the template shows. All of it runs
+    # concurrently (rentalapp.dashboards)
+    jobs = {
+        "stats": lambda: get_landlord_stats(landlord),
+        # Maintenance requests (latest 10)
+        "maintenance_count": lambda: selectors.landlord_maintenance_requests(landlord)[:10].count(),
+    }
+    if section == "overview":
+        # Recent applications (show 5 latest pending)
+        jobs["recent_applications"] = lambda: list(selectors.landlord_applications(landlord, status="pending")[:5])
+        # What comparable units rent for, per bucket the landlord lists in
+        jobs["market"] = lambda: market.landlord_comparables(landlord)
+        # Share of property-days let over the last 30 and 90 days
+        jobs["occupancy"] = lambda: occupancy.recent_occupancy(landlord, 30, 90)
+    elif section == "my_properties":
+        jobs["my_properties"] = lambda: list(selectors.landlord_properties(landlord))
+    elif section == "applications":
+        # Applications (bookings awaiting landlord approval)
+        jobs["applications"] = lambda: list(selectors.landlord_applications(landlord, status="pending"))
+    elif section == "bookings":
+        # All bookings (approved/active)
+        jobs["bookings"] = lambda: list(selectors.landlord_bookings(landlord).order_by("-start_date"))
+    elif section == "payments":
+        # Payments (latest 10)
+        jobs["payments"] = lambda: list(selectors.landlord_payments(landlord)[:10])
+    elif section == "maintenance":
+        jobs["maintenance_requests"] = lambda: list(selectors.landlord_maintenance_requests(landlord)[:10])
+    data = await dashboards.gather(jobs)
+    stats = data["stats"]
 
     context = {
         "landlord": landlord,
-        "total_properties": total_properties,
-        'total_properties': Property.objects.filter(owner=landlord).count(),
-        'my_properties': Property.objects.filter(owner=landlord),  
-        "monthly_income": monthly_income,
-        "occupancy_rate": occupancy_rate,
-        "applications": applications_qs,
-        "applications_count": applications_count,
-        "recent_applications": recent_applications,
-        "bookings_count": bookings_count,
-        "bookings": bookings_qs,
-        "payments": payments_qs,
-        "maintenance_requests": maintenance_requests,
-        "maintenance_count": maintenance_count,
-        "section": request.GET.get("section", "overview"),
+        "stats": stats,
+        "total_properties": stats.total_properties,
+        'my_properties': data.get("my_properties", []),
+        "monthly_income": stats.total_income,
+        "occupancy_rate": data.get("occupancy", [0, 0])[0],
+        "occupancy_rate_quarter": data.get("occupancy", [0, 0])[1],
+        "applications": data.get("applications", []),
+        "applications_count": stats.pending_applications,
+        "recent_applications": data.get("recent_applications", []),
+        "bookings_count": stats.total_bookings,
+        "bookings": data.get("bookings", []),
+        "payments": data.get("payments", []),
+        "maintenance_requests": data.get("maintenance_requests", []),
+        "maintenance_count": data["maintenance_count"],
+        "market": data.get("market", []),
+        "section": section,
     }
-    if section == 'my_properties':
-        # Fetch only properties owned by this landlord
-        context['my_properties'] = Property.objects.filter(owner=landlord)
-    return render(request, "rentalapp/landlord_dashboard.html", context)
+    return await sync_to_async(render)(request, "rentalapp/landlord_dashboard.html", context)
 from django.contrib.auth.decorators import login_required
 
 @login_required
 def landlord_properties(request):
     landlord = request.user
-    my_properties = Property.objects.filter(owner=landlord)
+    my_properties = selectors.landlord_properties(landlord)
 
     context = {
         "section": "my_properties",
@@ -764,32 +844,114 @@ def landlord_properties(request):
 
 from .models import Property, DISTRICT_CHOICES  # Make sure DISTRICT_CHOICES exists
 
+# Distances offered by the browse page's "near" filter, in km
+RADIUS_CHOICES = (2, 5, 10, 25, 50)
+
+
+def _browse_page(request, filters):
+    properties = selectors.property_cards(filters)
+    after = request.GET.get("after")
+    page_size = parse_page_size(request.GET.get("page_size"))
+
+    # "near" searches are sorted by distance, everything else is one keyset
+    # page ordered by (created_at, id), or by relevance first when
+    # searching; ?after= is the cursor either way
+    if "near" in filters:
+        return nearest_page(properties, *filters["near"], filters["radius_km"], after=after, page_size=page_size)
+    return keyset_paginate(properties, after=after, page_size=page_size, keys=browse_ordering(filters))
+
+
+def _facet_links(request, filters):
+    """Facet rows for the sidebar, each option linking to the filtered page (or back)."""
+    rows = []
+    for param, label, options in facets.facet_options(filters, facets.facet_counts(filters)):
+        links = []
+        for value, option_label, count, selected in options:
+            params = request.GET.copy()
+            params.pop("after", None)
+            if selected:
+                params.pop(param, None)
+            else:
+                params[param] = value
+            links.append({"label": option_label, "count": count, "selected": selected, "query": params.urlencode()})
+        rows.append({"label": label, "options": links})
+    return rows
+
+
+# "near" searches take up to four widening lookups, each one fetching the page, facets
+# one grouped query per facet on SQLite when they are not cached
+@replica_reads
+@query_budget(11)
+@cache_public_page
 def property_list(request):
-    properties = Property.objects.all()
-
-    # Get filter parameters
-    district = request.GET.get('district')
-    max_rent = request.GET.get('max_rent')
-    bedrooms = request.GET.get('bedrooms')
-    property_type = request.GET.get('property_type')
-    q = request.GET.get('q')  # optional search query
-
-    # Apply filters
-    if district and district != "all":  # ignore 'all'
-        properties = properties.filter(district=district)
-    if max_rent:
-        properties = properties.filter(rent__lte=max_rent)
-    if bedrooms:
-        properties = properties.filter(bedrooms=bedrooms)
-    if property_type:
-        properties = properties.filter(property_type=property_type)
-    if q:
-        properties = properties.filter(title__icontains=q)
+    # Get filter parameters ('all' district and bad numbers are ignored)
+    filters = clean_property_filters(request.GET)
+    page = _browse_page(request, filters)
+
+    # Query string for the "next page" link, keeping the current filters
+    next_params = request.GET.copy()
+    next_params["after"] = page.next_cursor
 
     context = {
-        'properties': properties,
+        'properties': page.items,
+        'page': page,
+        'has_more': page.has_more,
+        'next_query': next_params.urlencode() if page.has_more else "",
+        'search_query': filters.get("q", ""),
         'DISTRICTS': DISTRICT_CHOICES,
+        'radius_choices': RADIUS_CHOICES,
+        'radius_km': filters.get("radius_km", DEFAULT_RADIUS_KM),
+        'facets': _facet_links(request, filters),
     }
     return render(request, 'rentalapp/property_list.html', context)
 
 
+@replica_reads
+@query_budget(6)
+def api_property_list(request):
+    """
+    JSON twin of property_list: same filters and ?after=/?page_size=, card
+    payloads only. Answers If-None-Match with a 304 when the page is unchanged.
+    """
+    filters = clean_property_filters(request.GET)
+    page = _browse_page(request, filters)
+
+    etag = api.page_etag(page)
+    if api.etag_matches(request.headers.get("If-None-Match"), etag):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            "results": [api.card_payload(prop) for prop in page.items],
+            "has_more": page.has_more,
+            "next_cursor": page.next_cursor or None,
+        })
+    response["ETag"] = etag
+    # Cache anywhere, but always revalidate: the 304 keeps that cheap
+    response["Cache-Control"] = "public, max-age=0, must-revalidate"
+    return response
+
+
+@query_budget(4)
+@login_required
+def api_rent_suggestion(request):
+    """
+    Suggested rent for the add/edit property form: median and quartiles of
+    the k most comparable listings (rentalapp/comparables.py). ?exclude= is
+    the listing being edited, so it is not its own comparable.
+    """
+    if request.user.role != "landlord":
+        return JsonResponse({"error": "Only landlords can ask for rent suggestions."}, status=403)
+    features = comparables.clean_features(request.GET)
+    if features is None:
+        return JsonResponse({"error": "district and property_type are required."}, status=400)
+
+    exclude = request.GET.get("exclude", "")
+    suggestion = comparables.suggest_rent(
+        features,
+        k=comparables.clean_k(request.GET.get("k")),
+        exclude=[int(exclude)] if exclude.isdigit() else [],
+    )
+    if suggestion is None:
+        return JsonResponse({"error": "No comparable listings yet."}, status=404)
+    return JsonResponse(suggestion)
+